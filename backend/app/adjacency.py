@@ -0,0 +1,147 @@
+"""
+In-memory precinct adjacency graph and turf growing behind /api/turfs.
+
+scripts/05c_adjacency.py stores each contiguous pair once in
+precinct_adjacency. A worker loads a state's edges into CSR arrays
+(indptr/indices/weights, both directions), along with the per-precinct
+attributes the turf filters and totals need, and keeps the graph for
+cache_ttl_seconds so a new run is picked up without a restart.
+
+Turfs are grown greedily: the best-scored unassigned precinct seeds a turf,
+which then absorbs the eligible neighbor sharing the longest boundary with
+it until its youth population reaches the target. Turfs that stay under
+half the target (a small island, the leftovers of a component) are merged
+into their smallest adjacent turf.
+"""
+import heapq
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.cache import LRUCache, flights
+from app.config import settings
+
+UNDERSIZED_FRACTION = 0.5
+
+
+class AdjacencyGraph:
+    def __init__(self, nodes: list, edges: list):
+        self.precinct_id = [r.precinct_id for r in nodes]
+        self.cd_number = np.array([-1 if r.cd_number is None else r.cd_number for r in nodes], dtype=np.int32)
+        self.tier = np.array([r.tier or "" for r in nodes], dtype=object)
+        self.pop_18_29 = np.array([r.pop_18_29 or 0 for r in nodes], dtype=np.int64)
+        self.total_pop = np.array([r.total_pop or 0 for r in nodes], dtype=np.int64)
+        self.score = np.array([np.nan if r.score is None else r.score for r in nodes])
+
+        index = {pid: i for i, pid in enumerate(self.precinct_id)}
+        pairs = [(index[a], index[b], w) for a, b, w in edges if a in index and b in index]
+        src = np.array([p[0] for p in pairs], dtype=np.int64)
+        dst = np.array([p[1] for p in pairs], dtype=np.int64)
+        weight = np.array([p[2] for p in pairs], dtype=float)
+        src, dst, weight = np.concatenate([src, dst]), np.concatenate([dst, src]), np.concatenate([weight, weight])
+        order = np.argsort(src, kind="stable")
+        self.indices, self.weights = dst[order], weight[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=len(nodes)))])
+
+    def __len__(self) -> int:
+        return len(self.precinct_id)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices) // 2
+
+    def neighbors(self, i: int):
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return zip(self.indices[start:end].tolist(), self.weights[start:end].tolist())
+
+    def eligible(self, tiers: list[str], district: Optional[int] = None) -> np.ndarray:
+        mask = np.isin(self.tier, tiers)
+        if district is not None:
+            mask &= self.cd_number == district
+        return mask
+
+
+def load_graph(db: Session, state: str) -> AdjacencyGraph:
+    nodes = db.execute(text("""
+        SELECT precinct_id, cd_number, tier, pop_18_29, total_pop, score
+        FROM precincts
+        WHERE state_fips = :state
+    """), {"state": state}).all()
+    edges = db.execute(text("""
+        SELECT precinct_id, neighbor_id, shared_m
+        FROM precinct_adjacency
+        WHERE state_fips = :state
+    """), {"state": state}).all()
+    return AdjacencyGraph(nodes, edges)
+
+
+_graphs = LRUCache(maxsize=8, ttl=settings.cache_ttl_seconds)
+
+
+def get_graph(db: Session, state: str) -> AdjacencyGraph:
+    graph = _graphs.get(state)
+    if graph is None:
+        def fill() -> AdjacencyGraph:
+            loaded = load_graph(db, state)
+            _graphs.set(state, loaded)
+            return loaded
+        graph = flights.do(("adjacency", state), fill)
+    return graph
+
+
+def grow_turfs(graph: AdjacencyGraph, mask: np.ndarray, target: int) -> list[list[int]]:
+    """Partition the eligible nodes into contiguous turfs of about `target` youth population."""
+    turf_of = np.full(len(graph), -1, dtype=np.int64)
+    turf_pop: list[int] = []
+    seeds = np.flatnonzero(mask)
+    seeds = seeds[np.argsort(-np.nan_to_num(graph.score[seeds], nan=-np.inf), kind="stable")]
+
+    for seed in seeds.tolist():
+        if turf_of[seed] != -1:
+            continue
+        t = len(turf_pop)
+        turf_of[seed] = t
+        pop = int(graph.pop_18_29[seed])
+        # Frontier keyed by the boundary shared with the turf so far
+        shared: dict[int, float] = {}
+        heap: list[tuple[float, int]] = []
+
+        def expand(node: int) -> None:
+            for nb, w in graph.neighbors(node):
+                if mask[nb] and turf_of[nb] == -1:
+                    shared[nb] = shared.get(nb, 0.0) + w
+                    heapq.heappush(heap, (-shared[nb], nb))
+
+        expand(seed)
+        while pop < target and heap:
+            negative_shared, node = heapq.heappop(heap)
+            if turf_of[node] != -1 or -negative_shared != shared[node]:
+                continue
+            turf_of[node] = t
+            pop += int(graph.pop_18_29[node])
+            expand(node)
+        turf_pop.append(pop)
+
+    # Fold undersized turfs into their smallest adjacent turf
+    members: list[list[int]] = [[] for _ in turf_pop]
+    for node in seeds.tolist():
+        members[turf_of[node]].append(node)
+    for t in sorted(range(len(turf_pop)), key=turf_pop.__getitem__):
+        if not members[t] or turf_pop[t] >= target * UNDERSIZED_FRACTION:
+            continue
+        adjacent = {
+            int(turf_of[nb]) for node in members[t] for nb, _ in graph.neighbors(node)
+            if mask[nb] and turf_of[nb] not in (-1, t)
+        }
+        if not adjacent:
+            continue
+        into = min(adjacent, key=turf_pop.__getitem__)
+        for node in members[t]:
+            turf_of[node] = into
+        members[into].extend(members[t])
+        turf_pop[into] += turf_pop[t]
+        members[t], turf_pop[t] = [], 0
+
+    return [m for m in members if m]
@@ -0,0 +1,269 @@
+"""
+Optional embedded analytics engine (ANALYTICS_ENABLED=true).
+
+scripts/06_export.py snapshots each run's published rows to Parquet under
+output_dir/analytics/<run_id>/: precincts.parquet (attributes, bounding box,
+simplified geometry as WKB) and election_results.parquet (every contest).
+With the engine enabled, district rollups, live CSV exports and the
+/api/analytics endpoints query those files through an in-process DuckDB
+database instead of PostgreSQL, which is left with map, tile and geometry
+work. DuckDB runs each query vectorized over analytics_threads cores.
+
+One database per worker process; every query gets its own cursor, since a
+DuckDB connection must not be shared between threads. Each snapshot is
+exposed as two views named after its run. The spatial extension is loaded
+when analytics_spatial is set and it can be installed. Without it,
+everything except `within=` polygon filters still works, because bbox
+filters use the stored bounding-box columns.
+"""
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from app.artifacts import analytics_path, latest_run_id
+from app.cache import LRUCache
+from app.config import settings
+
+log = logging.getLogger(__name__)
+
+EXPORT_BATCH_ROWS = 10_000
+
+ROLLUP_KEYS = {
+    "district": "cd_number",
+    "county": "county_fips",
+    "tier": "tier",
+}
+
+# Same aggregates as scripts/05b_aggregates.py STATS_SQL
+ROLLUP_STATS_SQL = """
+    COUNT(*)                                                          AS precinct_count,
+    SUM(total_pop)                                                    AS total_pop,
+    SUM(pop_18_29)                                                    AS pop_18_29,
+    SUM(pop_18_29)::DOUBLE / NULLIF(SUM(total_pop), 0)                AS youth_share,
+    SUM(dem_votes - rep_votes)::DOUBLE / NULLIF(SUM(total_votes), 0)  AS dem_margin,
+    SUM(score * total_pop) / NULLIF(SUM(total_pop) FILTER (WHERE score IS NOT NULL), 0) AS score,
+    COUNT(*) FILTER (WHERE tier = 'priority')                         AS priority_count,
+    COUNT(*) FILTER (WHERE tier = 'target')                           AS target_count,
+    COUNT(*) FILTER (WHERE tier = 'watchlist')                        AS watchlist_count,
+    COUNT(*) FILTER (WHERE tier = 'low')                              AS low_count"""
+
+
+class SpatialUnavailable(RuntimeError):
+    """A geometry filter was requested but the spatial extension is not loaded."""
+
+
+@dataclass(frozen=True)
+class AnalyticsSnapshot:
+    run_id: int
+    precincts: str          # view over precincts.parquet
+    election_results: str   # view over election_results.parquet
+
+
+def _rows(cursor) -> list[dict]:
+    names = [d[0] for d in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+class AnalyticsEngine:
+    def __init__(self):
+        self._db = None
+        self._lock = threading.Lock()
+        self._views: set[int] = set()
+        self._latest = LRUCache(maxsize=64, ttl=settings.cache_ttl_seconds)
+        self.spatial = False
+
+    def _database(self):
+        with self._lock:
+            if self._db is None:
+                import duckdb
+
+                config = {"memory_limit": settings.analytics_memory_limit}
+                if settings.analytics_threads:
+                    config["threads"] = settings.analytics_threads
+                db = duckdb.connect(":memory:", config=config)
+                if settings.analytics_spatial:
+                    try:
+                        db.install_extension("spatial")
+                        db.load_extension("spatial")
+                        self.spatial = True
+                    except duckdb.Error:
+                        log.warning("DuckDB spatial extension unavailable; within= filters disabled", exc_info=True)
+                self._db = db
+            return self._db
+
+    def cursor(self):
+        return self._database().cursor()
+
+    def snapshot(self, db: Session, state: str) -> Optional[AnalyticsSnapshot]:
+        """The latest run's snapshot for a state, or None (disabled, or not written yet)."""
+        if not settings.analytics_enabled:
+            return None
+        run_id = self._latest.get(state)
+        if run_id is None:
+            run_id = latest_run_id(db, state)
+            if run_id is None:
+                return None
+            self._latest.set(state, run_id)
+        path = analytics_path(run_id)
+        if not (path / "precincts.parquet").is_file():
+            return None
+        snap = AnalyticsSnapshot(run_id, f"precincts_{run_id}", f"election_results_{run_id}")
+        if run_id not in self._views:
+            database = self._database()
+            with self._lock:
+                for view, name in ((snap.precincts, "precincts"), (snap.election_results, "election_results")):
+                    file = str(path / f"{name}.parquet").replace("'", "''")
+                    database.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM read_parquet('{file}')")
+                self._views.add(run_id)
+        return snap
+
+    def district_stats(self, snap: AnalyticsSnapshot) -> bytes:
+        """Same rows as the districts SQL (app/routers/districts.py)."""
+        with self.cursor() as cur:
+            cur.execute(f"""
+                SELECT
+                    cd_number,
+                    COUNT(*) AS precinct_count,
+                    AVG(youth_share) AS avg_youth_share,
+                    AVG(dem_margin) AS avg_dem_margin,
+                    COUNT(*) FILTER (WHERE tier = 'priority') AS priority_count,
+                    COUNT(*) FILTER (WHERE tier = 'target') AS target_count
+                FROM {snap.precincts}
+                WHERE cd_number IS NOT NULL
+                GROUP BY cd_number
+                ORDER BY cd_number
+            """)
+            return json.dumps(_rows(cur)).encode()
+
+    def export_rows(
+        self,
+        snap: AnalyticsSnapshot,
+        columns: list[str],
+        youth_min: float,
+        margin_floor: float,
+        district: Optional[int] = None,
+        tier: Optional[str] = None,
+    ) -> Iterator[tuple]:
+        """Rows of the live export query, in its order, fetched in batches."""
+        conditions = ["youth_share >= ?", "dem_margin >= ?"]
+        params: list = [youth_min, margin_floor]
+        if district is not None:
+            conditions.append("cd_number = ?")
+            params.append(district)
+        if tier is not None:
+            conditions.append("tier = ?")
+            params.append(tier)
+        cur = self.cursor()
+        try:
+            cur.execute(f"""
+                SELECT {", ".join(columns)} FROM {snap.precincts}
+                WHERE {" AND ".join(conditions)}
+                ORDER BY score DESC NULLS LAST, precinct_id
+            """, params)
+            while batch := cur.fetchmany(EXPORT_BATCH_ROWS):
+                yield from batch
+        finally:
+            cur.close()
+
+    def rollup(
+        self,
+        snap: AnalyticsSnapshot,
+        by: str,
+        bbox: Optional[tuple[float, float, float, float]] = None,
+        within: Optional[str] = None,
+    ) -> bytes:
+        """Population-weighted stats and tier counts per district, county or tier."""
+        key = ROLLUP_KEYS[by]
+        conditions = [f"{key} IS NOT NULL"]
+        params: list = []
+        if bbox is not None:
+            conditions.append("xmax >= ? AND ymax >= ? AND xmin <= ? AND ymin <= ?")
+            params.extend(bbox)
+        if within is not None:
+            if not self.spatial:
+                raise SpatialUnavailable("within= needs the DuckDB spatial extension")
+            conditions.append("ST_Intersects(ST_GeomFromWKB(geom), ST_GeomFromGeoJSON(?))")
+            params.append(within)
+        with self.cursor() as cur:
+            cur.execute(f"""
+                SELECT {key} AS key, {ROLLUP_STATS_SQL}
+                FROM {snap.precincts}
+                WHERE {" AND ".join(conditions)}
+                GROUP BY {key}
+                ORDER BY {key}
+            """, params)
+            return json.dumps({"by": by, "run_id": snap.run_id, "groups": _rows(cur)}).encode()
+
+    def whatif(
+        self,
+        snap: AnalyticsSnapshot,
+        weights: dict[str, float],
+        thresholds: dict[str, float],
+        contest: Optional[str] = None,
+    ) -> bytes:
+        """
+        Re-score every precinct with other weights / tier cut-offs, and
+        optionally another contest's margin from election_results. Returns
+        the resulting tier counts per district and how many precincts would
+        change tier.
+        """
+        if contest is None:
+            margin_join, params = "", []
+            margin = "p.dem_margin"
+        else:
+            margin_join = f"""
+                LEFT JOIN (
+                    SELECT precinct_id, dem_margin FROM {snap.election_results} WHERE contest_name = ?
+                ) r ON r.precinct_id = p.precinct_id"""
+            params = [contest]
+            margin = "r.dem_margin"
+        params += [
+            weights["youth_share"], weights["dem_margin"],
+            thresholds["priority"], thresholds["target"], thresholds["watchlist"],
+        ]
+        with self.cursor() as cur:
+            cur.execute(f"""
+                WITH base AS (
+                    SELECT p.cd_number, p.tier AS current_tier, p.youth_share, {margin} AS dem_margin
+                    FROM {snap.precincts} p {margin_join}
+                    WHERE p.cd_number IS NOT NULL
+                ), scored AS (
+                    SELECT *, GREATEST(0, LEAST(1, ? * youth_share + ? * ((dem_margin + 1.0) / 2.0))) AS score
+                    FROM base
+                    WHERE youth_share IS NOT NULL AND dem_margin IS NOT NULL
+                ), tiered AS (
+                    SELECT *, CASE WHEN score >= ? THEN 'priority'
+                                   WHEN score >= ? THEN 'target'
+                                   WHEN score >= ? THEN 'watchlist'
+                                   ELSE 'low' END AS tier
+                    FROM scored
+                )
+                SELECT
+                    cd_number,
+                    COUNT(*) AS precinct_count,
+                    AVG(score) AS avg_score,
+                    COUNT(*) FILTER (WHERE tier = 'priority')  AS priority_count,
+                    COUNT(*) FILTER (WHERE tier = 'target')    AS target_count,
+                    COUNT(*) FILTER (WHERE tier = 'watchlist') AS watchlist_count,
+                    COUNT(*) FILTER (WHERE tier = 'low')       AS low_count,
+                    COUNT(*) FILTER (WHERE tier IS DISTINCT FROM current_tier) AS changed_count
+                FROM tiered
+                GROUP BY cd_number
+                ORDER BY cd_number
+            """, params)
+            districts = _rows(cur)
+        return json.dumps({
+            "run_id": snap.run_id,
+            "weights": weights,
+            "thresholds": thresholds,
+            "contest": contest,
+            "changed_count": sum(d["changed_count"] for d in districts),
+            "districts": districts,
+        }).encode()
+
+
+analytics = AnalyticsEngine()
@@ -0,0 +1,67 @@
+"""
+Locations of run-versioned files written by the pipeline (scripts/06_export.py).
+
+Artifacts are immutable once a run is marked successful, so anything served
+from here can be cached indefinitely by browsers and CDNs.
+"""
+from pathlib import Path
+from typing import Literal, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def latest_run_id(db: Session, state: str) -> Optional[int]:
+    """Id of the most recent successful pipeline run for a state, or None."""
+    row = db.execute(text("""
+        SELECT id FROM pipeline_runs
+        WHERE status = 'success' AND state_fips = :state
+        ORDER BY finished_at DESC NULLS LAST, id DESC
+        LIMIT 1
+    """), {"state": state}).fetchone()
+    return row[0] if row else None
+
+
+def attributes_path(run_id: int) -> Path:
+    return Path(settings.output_dir) / "attributes" / f"{run_id}.bin"
+
+
+def tiles_path(run_id: int) -> Path:
+    return Path(settings.output_dir) / "tiles" / f"{run_id}.pmtiles"
+
+
+def history_path(run_id: int) -> Path:
+    """Per-run score history (precinct_id, score, tier, youth_share, dem_margin) as Parquet."""
+    return Path(settings.output_dir) / "history" / f"{run_id}.parquet"
+
+
+def export_bundle_name(
+    youth_min: float,
+    margin_floor: float,
+    district: Optional[int],
+    tier: Optional[str],
+    fmt: Literal["csv", "csv.gz", "parquet"],
+) -> str:
+    """File name of a pre-rendered export, shared by scripts/06_export.py and the export router."""
+    scope = f"cd{district}" if district is not None else "all"
+    return f"y{youth_min:g}_m{margin_floor:g}_{scope}_{tier or 'all'}.{fmt}"
+
+
+def export_bundle_path(run_id: int, youth_min: float, margin_floor: float, district, tier, fmt) -> Path:
+    return Path(settings.output_dir) / "exports" / str(run_id) / export_bundle_name(
+        youth_min, margin_floor, district, tier, fmt
+    )
+
+
+def analytics_path(run_id: int) -> Path:
+    """Parquet snapshot (precincts.parquet, election_results.parquet) read by app/analytics.py."""
+    return Path(settings.output_dir) / "analytics" / str(run_id)
+
+
+def store_path(state: str, run_id: int) -> Path:
+    """Snapshot directory of the in-process precinct store (app/store.py)."""
+    return Path(settings.output_dir) / "store" / f"{state}_{run_id}"
@@ -0,0 +1,160 @@
+"""
+Small in-process caches shared by the routers.
+
+Each gunicorn worker holds its own copy; entries expire after a TTL so a new
+pipeline run becomes visible without restarting the API.
+
+Cache misses go through a single-flight layer: when many requests with the
+same key arrive together (a campaign email, a cold cache after a deploy),
+one of them renders the body and the others wait for and share it, instead
+of all queuing for pool connections to run the same query.
+"""
+import fcntl
+import hashlib
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional
+
+from app.config import settings
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with an optional per-entry TTL (seconds)."""
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one: the first caller
+    runs fn, later callers block until it finishes and get its result (or
+    its exception).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.value: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._calls: dict[Hashable, SingleFlight._Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+SHARED_FLIGHT_BUCKETS = 256
+
+
+def shared_flight(key: Hashable, render: Callable[[], bytes]) -> bytes:
+    """
+    Cross-worker single flight through flock'ed files. Keys hash into a
+    fixed set of buckets (so the directory stays bounded); the worker holding
+    a bucket's lock renders and leaves the body next to it, and workers that
+    were waiting on the lock reuse that body if it is for their key and
+    younger than single_flight_shared_seconds.
+    """
+    digest = hashlib.sha256(repr(key).encode()).digest()
+    directory = Path(settings.output_dir) / "singleflight"
+    directory.mkdir(parents=True, exist_ok=True)
+    bucket = directory / f"{zlib.crc32(digest) % SHARED_FLIGHT_BUCKETS:03d}"
+
+    with open(f"{bucket}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if time.time() - os.path.getmtime(bucket) <= settings.single_flight_shared_seconds:
+                data = bucket.read_bytes()
+                if data[:len(digest)] == digest:
+                    return data[len(digest):]
+        except FileNotFoundError:
+            pass
+        body = render()
+        tmp = bucket.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(digest + body)
+        tmp.replace(bucket)
+        return body
+
+
+# Serialized JSON bodies of the expensive list/aggregate endpoints, keyed by
+# endpoint name + query parameters.
+response_cache = LRUCache(maxsize=settings.response_cache_size, ttl=settings.cache_ttl_seconds)
+
+
+flights = SingleFlight()
+
+
+def cached_body(key: Hashable, render: Callable[[], bytes]) -> bytes:
+    """
+    Return the cached body for key. On a miss, concurrent callers share one
+    render (see SingleFlight / shared_flight) and the result is stored.
+    """
+    body = response_cache.get(key)
+    if body is not None:
+        return body
+
+    def fill() -> bytes:
+        rendered = shared_flight(key, render) if settings.single_flight_shared else render()
+        response_cache.set(key, rendered)
+        return rendered
+
+    return flights.do(key, fill)
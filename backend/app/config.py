@@ -1,5 +1,10 @@
+from pathlib import Path
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
@@ -8,9 +13,92 @@ class Settings(BaseSettings):
     allowed_origins: str = "http://localhost:3000"
     secret_key: str = "change-me-in-production"
 
+    # Connection pool. Pool sizes default to an even split of the server's
+    # max_connections across WEB_CONCURRENCY workers (see app.engine.pool_limits).
+    # db_pgbouncer: DATABASE_URL points at PgBouncer in transaction-pooling mode.
+    web_concurrency: int = 1
+    db_max_connections: int = 100
+    db_reserved_connections: int = 10
+    db_pool_size: Optional[int] = None
+    db_max_overflow: Optional[int] = None
+    db_pool_recycle_seconds: int = 1800
+    db_pgbouncer: bool = False
+
+    # Read replicas (comma-separated URLs) for the read-only routes. A replica
+    # leaves rotation when unreachable or more than replica_max_lag_seconds behind.
+    read_replica_urls: str = ""
+    replica_max_lag_seconds: float = 10.0
+    replica_check_interval_seconds: float = 5.0
+
+    # Per-route limits (SET LOCAL per request): map/detail reads must stay
+    # fast; exports may run longer and sort in memory.
+    statement_timeout_ms: int = 5000
+    work_mem: str = "4MB"
+    export_statement_timeout_ms: int = 60000
+    export_work_mem: str = "64MB"
+
+    # State FIPS served when a request does not pass ?state=
+    default_state: str = "06"
+
+    # Where the pipeline writes run-versioned artifacts (scripts/config.py OUTPUT_DIR)
+    output_dir: str = str(BACKEND_DIR / "data" / "output")
+
+    # In-process caches (per worker)
+    cache_ttl_seconds: int = 300
+    precinct_detail_cache_size: int = 512
+    response_cache_size: int = 64
+    near_cache_size: int = 1024
+    near_cache_precision: int = 3   # decimals of lat/lon; 3 ≈ 100 m
+
+    # Single-flight (app/cache.py): concurrent identical cache misses share one
+    # query per worker; with single_flight_shared also across the workers of
+    # a host, through lock files under output_dir/singleflight/.
+    single_flight_shared: bool = False
+    single_flight_shared_seconds: float = 2.0   # how long another worker's result is reused
+
+    # Instrumentation: Server-Timing header is opt-in; slow SELECTs over the
+    # threshold are EXPLAIN (ANALYZE, BUFFERS)-ed at the given sample rate.
+    server_timing_enabled: bool = False
+    slow_query_ms: float = 500.0
+    slow_query_sample_rate: float = 0.1
+
+    # In-process precinct store (app/store.py): memory-mapped snapshot of the
+    # latest run per state, answering list/district/export reads without the DB.
+    # States default to default_state; checked for new runs every refresh period.
+    precinct_store_enabled: bool = False
+    precinct_store_states: str = ""
+    precinct_store_refresh_seconds: float = 60.0
+
+    # Embedded analytics engine (app/analytics.py): district rollups, live
+    # exports and /api/analytics/* read the latest run's Parquet snapshot
+    # through in-process DuckDB instead of PostgreSQL. analytics_threads
+    # defaults to all cores; the spatial extension enables `within=` filters.
+    analytics_enabled: bool = False
+    analytics_threads: Optional[int] = None
+    analytics_memory_limit: str = "1GB"
+    analytics_spatial: bool = True
+
+    # Pipeline control (app/routers/pipeline.py): POST /api/pipeline/runs needs
+    # "Authorization: Bearer <pipeline_api_token>" and is disabled while the
+    # token is empty. The events stream re-reads progress every poll period.
+    pipeline_api_token: str = ""
+    pipeline_events_poll_seconds: float = 1.0
+    pipeline_events_keepalive_seconds: float = 15.0
+
+    # Open the pool and pre-render default responses before reporting healthy
+    warmup_enabled: bool = True
+
     @property
     def allowed_origins_list(self) -> list[str]:
         return [o.strip() for o in self.allowed_origins.split(",")]
 
+    @property
+    def precinct_store_states_list(self) -> list[str]:
+        return [s.strip() for s in self.precinct_store_states.split(",") if s.strip()] or [self.default_state]
+
+    @property
+    def read_replica_urls_list(self) -> list[str]:
+        return [u.strip() for u in self.read_replica_urls.split(",") if u.strip()]
+
 
 settings = Settings()
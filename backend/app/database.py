@@ -1,25 +1,162 @@
-from sqlalchemy import create_engine
+import logging
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from sqlalchemy import event, text
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import QueuePool
 
+from app import metrics
 from app.config import settings
+from app.engine import PreparedQuery, make_engine, pool_limits
+from app.replicas import ReplicaRouter
+
+slow_query_log = logging.getLogger("app.slow_query")
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.record_pool_wait(time.perf_counter() - start)
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
+
+_pool_size, _max_overflow = pool_limits(
+    settings.db_max_connections, settings.web_concurrency, settings.db_reserved_connections
 )
 
+
+def build_api_engine(url: str, application_name: str):
+    """Engine with the API's pool sizing and instrumentation (primary and replicas)."""
+    eng = make_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.db_pool_size or _pool_size,
+        max_overflow=settings.db_max_overflow if settings.db_max_overflow is not None else _max_overflow,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pgbouncer=settings.db_pgbouncer,
+        application_name=application_name,
+    )
+    event.listen(eng, "before_cursor_execute", _start_query_timer)
+    event.listen(eng, "after_cursor_execute", _record_query)
+    return eng
+
+
+# EXPLAIN ANALYZE re-runs the statement, so outliers are explained off the
+# request path, one at a time.
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    metrics.record_query(elapsed, cursor.rowcount)
+
+    if elapsed * 1000 >= settings.slow_query_ms and random.random() < settings.slow_query_sample_rate:
+        explainable = _explainable(statement)
+        if explainable is not None:
+            _explain_executor.submit(_explain_slow_query, conn.engine, explainable, parameters, elapsed)
+
+
+_EXECUTE = re.compile(r"\s*EXECUTE\s+(\w+)", re.IGNORECASE)
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+
+def _explainable(statement: str) -> Optional[str]:
+    """
+    The SQL to EXPLAIN for a slow statement, or None. EXECUTE of a
+    PreparedQuery maps back to its SQL text (the explaining connection has
+    not prepared it); queries, CTEs included, are explained as sent unless
+    they write.
+    """
+    match = _EXECUTE.match(statement)
+    if match:
+        query = PreparedQuery.registry.get(match.group(1))
+        return query.driver_sql if query is not None else None
+    first_word = statement.split(None, 1)[0].upper() if statement.strip() else ""
+    if first_word not in ("SELECT", "WITH") or _WRITES.search(statement):
+        return None
+    return statement
+
+
+def _explain_slow_query(eng, statement, parameters, elapsed: float) -> None:
+    try:
+        with eng.connect() as conn:
+            # EXPLAIN ANALYZE executes the statement; make sure it cannot write
+            conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+            plan = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters).scalars().all()
+        slow_query_log.warning(
+            "Slow query (%.0f ms) on %s:\n%s\n%s",
+            elapsed * 1000, eng.url.host, statement.strip(), "\n".join(plan),
+        )
+    except Exception:
+        slow_query_log.exception("Could not EXPLAIN slow query (%.0f ms)", elapsed * 1000)
+
+
+engine = build_api_engine(settings.database_url, "youthvoting-api")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+@event.listens_for(SessionLocal, "after_begin")
+def _apply_transaction_settings(session, transaction, connection):
+    # Applied when the session first touches a connection, so requests served
+    # from a cache (or waiting on another request's query) never check one out
+    config = session.info.get("transaction_settings")
+    if config:
+        connection.execute(
+            text("SELECT set_config('statement_timeout', :timeout, true), set_config('work_mem', :mem, true)"),
+            config,
+        )
+
+# Read-only routes go to a healthy, caught-up replica when any are configured
+replicas = ReplicaRouter(
+    [build_api_engine(url, "youthvoting-api-read") for url in settings.read_replica_urls_list],
+    max_lag_seconds=settings.replica_max_lag_seconds,
+    check_interval_seconds=settings.replica_check_interval_seconds,
+)
+
+
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def db_session(
+    statement_timeout_ms: Optional[int] = None,
+    work_mem: Optional[str] = None,
+    read_only: bool = False,
+):
+    """
+    Build a get_db-style dependency whose transaction runs with its own
+    statement_timeout / work_mem. SET LOCAL ends with the transaction, so the
+    pooled connection (or PgBouncer server connection) is not left modified.
+
+    read_only sessions are bound to a read replica when one is healthy and
+    within the lag threshold, else to the primary.
+    """
+    timeout = statement_timeout_ms or settings.statement_timeout_ms
+    mem = work_mem or settings.work_mem
+
+    def dependency():
+        db = SessionLocal(bind=replicas.choose() or engine) if read_only else SessionLocal()
+        db.info["transaction_settings"] = {"timeout": f"{timeout}ms", "mem": mem}
+        try:
+            yield db
+        finally:
+            db.close()
+
+    return dependency
+
+
+get_db = db_session()
+get_read_db = db_session(read_only=True)
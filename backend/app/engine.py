@@ -0,0 +1,118 @@
+"""
+Shared SQLAlchemy engine factory for the API and the pipeline scripts.
+
+Liveness: instead of pool_pre_ping (a round trip on every checkout),
+connections are recycled after pool_recycle seconds and TCP keepalives let
+the kernel notice dead peers; a connection that still fails mid-query is
+invalidated along with the rest of the pool by SQLAlchemy's disconnect
+handling.
+
+PgBouncer transaction pooling (pgbouncer=True): a server connection is only
+ours for one transaction, so nothing session-scoped is used — no startup
+options, no server-side prepared statements, and per-request settings are
+applied with SET LOCAL (see app.database.db_session).
+
+This module only depends on SQLAlchemy so scripts/ can import it without
+loading the API settings.
+"""
+import re
+from typing import Any, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+KEEPALIVE_ARGS = {
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 3,
+}
+
+
+def pool_limits(max_connections: int, workers: int, reserved: int = 10) -> tuple[int, int]:
+    """
+    Split the server's max_connections between worker processes, keeping
+    `reserved` back for the pipeline, migrations and psql. Returns
+    (pool_size, max_overflow) for one worker.
+    """
+    share = max(1, (max_connections - reserved) // max(1, workers))
+    pool_size = max(1, min(10, share // 2 or 1))
+    return pool_size, max(0, share - pool_size)
+
+
+def make_engine(
+    url: str,
+    *,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_recycle: int = 1800,
+    pgbouncer: bool = False,
+    application_name: Optional[str] = None,
+    poolclass=QueuePool,
+) -> Engine:
+    connect_args: dict[str, Any] = dict(KEEPALIVE_ARGS)
+    if application_name:
+        connect_args["application_name"] = application_name
+    engine = create_engine(
+        url,
+        poolclass=poolclass,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=pool_recycle,
+        pool_use_lifo=True,   # idle extras age out and get recycled instead of staying warm
+        connect_args=connect_args,
+    )
+    # Session-scoped prepared statements don't survive transaction pooling
+    return engine.execution_options(prepare_statements=not pgbouncer)
+
+
+class PreparedQuery:
+    """
+    A fixed query run as a server-side prepared statement.
+
+    The statement is PREPAREd lazily, once per pooled connection, and then
+    run with EXECUTE, so PostgreSQL skips parse/plan on the hot path (after
+    five executions it may switch to a cached generic plan). Falls back to
+    plain execution when the engine sits behind PgBouncer.
+
+    `sql` uses the usual :name parameters.
+    """
+
+    _PARAM = re.compile(r"(?<!:):(\w+)")
+
+    # name → query, so an EXECUTE seen on the wire can be traced back to its SQL
+    registry: dict[str, "PreparedQuery"] = {}
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        self.params = list(dict.fromkeys(self._PARAM.findall(sql)))
+        # The SQL in the driver's pyformat style, for the EXECUTE's parameters
+        self.driver_sql = self._PARAM.sub(r"%(\1)s", sql.replace("%", "%%"))
+        PreparedQuery.registry[name] = self
+        positions = {p: i + 1 for i, p in enumerate(self.params)}
+        self._prepare = f"PREPARE {name} AS " + self._PARAM.sub(lambda m: f"${positions[m.group(1)]}", sql)
+        args = ", ".join(f":{p}" for p in self.params)
+        self._execute = text(f"EXECUTE {name}({args})" if args else f"EXECUTE {name}")
+
+    def prepare(self, conn: Connection) -> bool:
+        """
+        PREPARE the statement on this connection unless it already is (the
+        warm-up calls this on every pooled connection). False when the
+        engine does not use prepared statements.
+        """
+        if not conn.get_execution_options().get("prepare_statements"):
+            return False
+        # connection.info lives as long as the DBAPI connection, like the statement
+        prepared = conn.connection.info.setdefault("prepared_statements", set())
+        if self.name not in prepared:
+            conn.exec_driver_sql(self._prepare)
+            prepared.add(self.name)
+        return True
+
+    def __call__(self, db: Session, params: dict):
+        if not self.prepare(db.connection()):
+            return db.execute(text(self.sql), params)
+        return db.execute(self._execute, params)
@@ -0,0 +1,64 @@
+"""
+SQL that encodes a precinct row (alias p) as a GeoJSON Feature.
+
+Shared by the precinct routers, the in-process store and
+scripts/06_export.py, which stores every precinct's encoded Feature in
+precinct_features per geometry mode and coordinate precision. List responses
+are then assembled from those fragments with string_agg, and the live
+encoding below is only the fallback for precincts without one — so both
+paths produce the same bytes.
+
+Only depends on the standard library so the pipeline can import it.
+"""
+
+PROPERTIES_SQL = """json_build_object(
+                    'precinct_id', p.precinct_id,
+                    'county_name', p.county_name,
+                    'cd_number', p.cd_number,
+                    'total_pop', p.total_pop,
+                    'pop_18_29', p.pop_18_29,
+                    'youth_share', p.youth_share,
+                    'dem_votes', p.dem_votes,
+                    'rep_votes', p.rep_votes,
+                    'total_votes', p.total_votes,
+                    'dem_pct', p.dem_pct,
+                    'dem_margin', p.dem_margin,
+                    'score', p.score,
+                    'tier', p.tier
+                )"""
+
+GEOMETRY_MODES = ("simplified", "centroid", "bbox", "none")
+
+# Coordinate decimal digits pre-encoded by the pipeline: ~0.1 m and ~10 m
+PRECISIONS = (6, 4)
+DEFAULT_PRECISION = 6
+
+
+def geometry_members_sql(mode: str, precision: int = DEFAULT_PRECISION) -> str:
+    """
+    Feature members per list mode: the map needs simplified shapes, while
+    lists, tables and markers only need properties plus a point or bounding box.
+    """
+    if mode == "simplified":
+        return f"'geometry', ST_AsGeoJSON(COALESCE(p.geom_simplified, p.geom), {precision})::json"
+    if mode == "centroid":
+        return f"'geometry', ST_AsGeoJSON(ST_PointOnSurface(p.geom), {precision})::json"
+    if mode == "bbox":
+        return f"""'geometry', NULL,
+                'bbox', json_build_array(
+                    round(ST_XMin(p.geom)::numeric, {precision}), round(ST_YMin(p.geom)::numeric, {precision}),
+                    round(ST_XMax(p.geom)::numeric, {precision}), round(ST_YMax(p.geom)::numeric, {precision})
+                )"""
+    if mode == "none":
+        return "'geometry', NULL"
+    raise ValueError(f"Unknown geometry mode: {mode!r}")
+
+
+def feature_sql(mode: str, precision: int = DEFAULT_PRECISION) -> str:
+    """json_build_object(...) expression for one Feature (cast to ::text to store or concatenate)."""
+    return f"""json_build_object(
+                'type', 'Feature',
+                'id', p.id,
+                {geometry_members_sql(mode, precision)},
+                'properties', {PROPERTIES_SQL}
+            )"""
@@ -1,29 +1,89 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.config import settings
-from app.routers import precincts, districts, config, export
+from app.database import replicas
+from app.metrics import MetricsMiddleware, render_metrics
+from app.routers import precincts, districts, config, export, attributes, aggregates, tiles, rankings, turfs, runs, pipeline, analytics
+from app.store import store
+from app.warmup import warm_up
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+log = logging.getLogger(__name__)
+
+
+async def _warm_up_in_background(app: FastAPI) -> None:
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception:
+        # A failed warm-up only costs latency; requests still work cold.
+        log.exception("Warm-up failed; serving cold")
+    app.state.ready = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = not settings.warmup_enabled
+    replicas.start()
+    if settings.precinct_store_enabled:
+        store.start()
+    task = asyncio.create_task(_warm_up_in_background(app)) if settings.warmup_enabled else None
+    yield
+    if task is not None:
+        task.cancel()
+    replicas.stop()
+    store.stop()
+
 
 app = FastAPI(
     title="Youth Voter Outreach API",
     version="1.0.0",
     description="California youth voter outreach data pipeline and dashboard API",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins_list,
     allow_credentials=True,
-    allow_methods=["GET"],
+    allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    # PMTiles clients read byte ranges (/api/tiles) and validate them by ETag
+    expose_headers=["Content-Range", "Content-Length", "ETag"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(precincts.router, prefix="/api")
 app.include_router(districts.router, prefix="/api")
 app.include_router(config.router, prefix="/api")
 app.include_router(export.router, prefix="/api")
+app.include_router(attributes.router, prefix="/api")
+app.include_router(aggregates.router, prefix="/api")
+app.include_router(tiles.router, prefix="/api")
+app.include_router(rankings.router, prefix="/api")
+app.include_router(turfs.router, prefix="/api")
+app.include_router(runs.router, prefix="/api")
+app.include_router(pipeline.router, prefix="/api")
+app.include_router(analytics.router, prefix="/api")
 
 
 @app.get("/healthz")
 def health_check():
+    """Reports 503 until this worker has finished warming up."""
+    if not getattr(app.state, "ready", True):
+        return JSONResponse({"status": "warming"}, status_code=503)
+    if replicas.replicas:
+        return {"status": "ok", "replicas": replicas.status()}
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of this worker's request and DB metrics."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,180 @@
+"""
+Request-level performance instrumentation exposed in Prometheus text format.
+
+MetricsMiddleware times every HTTP request and counts response bytes; the
+engine hooks in app.database add DB time, query count, rows and pool checkout
+wait to the stats of the request that issued them (tracked via a contextvar,
+which Starlette copies into the threadpool running sync endpoints).
+
+Metrics are per process: each gunicorn worker serves its own /metrics.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config import settings
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7)
+
+
+@dataclass
+class RequestStats:
+    """Accumulated DB work for the request in flight."""
+    db_seconds: float = 0.0
+    db_queries: int = 0
+    db_rows: int = 0
+    pool_wait_seconds: float = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self, label_names: tuple) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple):
+        self.name, self.help, self.buckets = name, help, buckets
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.setdefault(labels, [0.0] * (len(self.buckets) + 2))
+            row[idx] += 1
+            row[-1] += value
+
+    def render(self, label_names: tuple) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, row in sorted(self._values.items()):
+                cumulative = 0.0
+                for bound, count in zip(self.buckets + ("+Inf",), row[:-1]):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else f"{bound:g}"
+                    lines.append(
+                        f"{self.name}_bucket{_labels(label_names + ('le',), labels + (le,))} {cumulative}"
+                    )
+                lines.append(f"{self.name}_sum{_labels(label_names, labels)} {row[-1]}")
+                lines.append(f"{self.name}_count{_labels(label_names, labels)} {cumulative}")
+        return lines
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{v}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency by route.", LATENCY_BUCKETS)
+RESPONSE_BYTES = Histogram("http_response_size_bytes", "Response body size by route.", BYTES_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in SQL per request.", LATENCY_BUCKETS)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed, by route.")
+DB_ROWS = Counter("db_rows_total", "Rows returned or affected by SQL statements, by route.")
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", LATENCY_BUCKETS
+)
+
+_ROUTE_METRICS = (
+    (REQUEST_SECONDS, ("method", "route", "status")),
+    (RESPONSE_BYTES, ("route",)),
+    (REQUEST_DB_SECONDS, ("route",)),
+    (DB_QUERIES, ("route",)),
+    (DB_ROWS, ("route",)),
+    (POOL_WAIT_SECONDS, ()),
+)
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric, label_names in _ROUTE_METRICS:
+        lines.extend(metric.render(label_names))
+    return "\n".join(lines) + "\n"
+
+
+def record_query(seconds: float, rows: int) -> None:
+    stats = current_request.get()
+    if stats is not None:
+        stats.db_seconds += seconds
+        stats.db_queries += 1
+        stats.db_rows += max(rows, 0)
+
+
+def record_pool_wait(seconds: float) -> None:
+    POOL_WAIT_SECONDS.observe(seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so streamed bodies are counted chunk by chunk."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+        body_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status, body_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.server_timing_enabled:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    timing = (
+                        f"db;dur={stats.db_seconds * 1000:.1f};desc=\"{stats.db_queries} queries\", "
+                        f"pool;dur={stats.pool_wait_seconds * 1000:.1f}, "
+                        f"app;dur={elapsed_ms:.1f}"
+                    )
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", timing.encode("latin-1"))
+                    ]
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = scope.get("route")
+            route_label = getattr(route, "path", "unmatched")
+            REQUEST_SECONDS.observe(time.perf_counter() - start, (scope["method"], route_label, status))
+            RESPONSE_BYTES.observe(body_bytes, (route_label,))
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, (route_label,))
+            DB_QUERIES.inc((route_label,), stats.db_queries)
+            DB_ROWS.inc((route_label,), stats.db_rows)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Float, ForeignKey, Integer, String
+
+from app.database import Base
+
+
+class PrecinctAdjacency(Base):
+    __tablename__ = "precinct_adjacency"
+
+    state_fips = Column(String(2), primary_key=True)
+    precinct_id = Column(String(50), primary_key=True)   # precinct_id < neighbor_id
+    neighbor_id = Column(String(50), primary_key=True)
+    shared_m = Column(Float, nullable=False)             # shared boundary length, meters
+    pipeline_run_id = Column(Integer, ForeignKey("pipeline_runs.id", ondelete="SET NULL"), nullable=True)
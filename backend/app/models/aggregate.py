@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, ForeignKey, UniqueConstraint
+from geoalchemy2 import Geometry
+
+from app.database import Base
+
+
+class PrecinctAggregate(Base):
+    __tablename__ = "precinct_aggregates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    state_fips = Column(String(2), nullable=False)
+    level = Column(String(20), nullable=False)  # county | district | hex_<size>
+    key = Column(String(20), nullable=False)    # county FIPS, CD number or hex "i_j"
+    precinct_count = Column(Integer, nullable=False)
+    total_pop = Column(BigInteger, nullable=True)
+    pop_18_29 = Column(BigInteger, nullable=True)
+    youth_share = Column(Float, nullable=True)
+    dem_margin = Column(Float, nullable=True)
+    score = Column(Float, nullable=True)  # population-weighted mean precinct score
+    priority_count = Column(Integer, nullable=False)
+    target_count = Column(Integer, nullable=False)
+    geom = Column(Geometry("MULTIPOLYGON", srid=4326), nullable=True)
+    pipeline_run_id = Column(Integer, ForeignKey("pipeline_runs.id", ondelete="SET NULL"), nullable=True)
+
+    __table_args__ = (UniqueConstraint("state_fips", "level", "key"),)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, Index
+from sqlalchemy import Column, Integer, String, Float, Date, Index, UniqueConstraint
 
 from app.database import Base
 
@@ -7,6 +7,7 @@ class ElectionResult(Base):
     __tablename__ = "election_results"
 
     id = Column(Integer, primary_key=True, index=True)
+    state_fips = Column(String(2), nullable=False)
     election_date = Column(Date, nullable=False)
     county_name = Column(String, nullable=False)
     precinct_id = Column(String, nullable=False)
@@ -18,6 +19,8 @@ class ElectionResult(Base):
     dem_margin = Column(Float, nullable=True)
 
     __table_args__ = (
+        UniqueConstraint("state_fips", "election_date", "contest_name", "precinct_id", name="uq_election_results_key"),
         Index("idx_election_results_precinct_id", "precinct_id"),
         Index("idx_election_results_county_contest", "county_name", "contest_name"),
+        Index("idx_election_results_state_contest", "state_fips", "contest_name"),
     )
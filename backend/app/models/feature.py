@@ -0,0 +1,14 @@
+from sqlalchemy import Column, ForeignKey, Integer, SmallInteger, String, Text
+
+from app.database import Base
+
+
+class PrecinctFeature(Base):
+    __tablename__ = "precinct_features"
+
+    state_fips = Column(String(2), primary_key=True)
+    geometry_mode = Column(String(12), primary_key=True)     # simplified | centroid | bbox | none
+    coord_precision = Column(SmallInteger, primary_key=True)  # coordinate decimal digits
+    precinct_id = Column(String(50), primary_key=True)
+    feature = Column(Text, nullable=False)                    # serialized GeoJSON Feature
+    pipeline_run_id = Column(Integer, ForeignKey("pipeline_runs.id"), nullable=True)  # run the fragment encodes
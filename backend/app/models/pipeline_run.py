@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, JSON, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -9,11 +9,42 @@ class PipelineRun(Base):
     __tablename__ = "pipeline_runs"
 
     id = Column(Integer, primary_key=True, index=True)
-    status = Column(String, nullable=False, default="running")  # running, success, failed
+    status = Column(String, nullable=False, default="running")  # queued, running, success, failed
+    state_fips = Column(String(2), nullable=True)  # state loaded by this run
     config_snapshot = Column(JSON, nullable=True)
     precincts_scored = Column(Integer, nullable=True)
     error_message = Column(String, nullable=True)
+    queued_at = Column(DateTime(timezone=True), nullable=True)  # enqueued through the API
+    worker_id = Column(String(100), nullable=True)  # host:pid of scripts/pipeline_worker.py
+    planned_stages = Column(JSON, nullable=True)  # stage names, in order
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     finished_at = Column(DateTime(timezone=True), nullable=True)
 
     precincts = relationship("Precinct", back_populates="pipeline_run")
+    stages = relationship("PipelineRunStage", back_populates="pipeline_run", cascade="all, delete-orphan")
+
+
+class PipelineRunStage(Base):
+    __tablename__ = "pipeline_run_stages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    pipeline_run_id = Column(Integer, ForeignKey("pipeline_runs.id", ondelete="CASCADE"), nullable=False)
+    stage = Column(String(50), nullable=False)  # e.g. "01_fetch_census"
+    status = Column(String(20), nullable=False)  # running, success, failed
+    wall_seconds = Column(Float, nullable=True)
+    cpu_seconds = Column(Float, nullable=True)
+    peak_rss_mb = Column(Float, nullable=True)
+    rows_in = Column(BigInteger, nullable=True)
+    rows_out = Column(BigInteger, nullable=True)
+    rows_per_second = Column(Float, nullable=True)
+    db_round_trips = Column(Integer, nullable=True)
+    details = Column(JSON, nullable=True)  # sub-step timings, stage-specific counters
+    error_message = Column(String, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    pipeline_run = relationship("PipelineRun", back_populates="stages")
+
+    __table_args__ = (
+        UniqueConstraint("pipeline_run_id", "stage"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geometry
 
@@ -8,8 +8,11 @@ from app.database import Base
 class Precinct(Base):
     __tablename__ = "precincts"
 
-    id = Column(Integer, primary_key=True, index=True)
-    precinct_id = Column(String, nullable=False, unique=True)
+    # List-partitioned by state_fips (one partition per state, see db/schema.sql)
+    id = Column(Integer, primary_key=True)
+    state_fips = Column(String(2), primary_key=True)
+    precinct_id = Column(String, nullable=False)
+    county_fips = Column(String(5), nullable=False)
     county_name = Column(String, nullable=False)
     cd_number = Column(Integer, nullable=True)  # Congressional district 1–52
 
@@ -33,16 +36,33 @@ class Precinct(Base):
     score = Column(Float, nullable=True)
     tier = Column(String, nullable=True)  # "priority", "target", "watchlist", "low"
 
+    # Ranks (1 = best) and percentiles (0–1) of score, from 05_merge_score.py
+    state_rank = Column(Integer, nullable=True)
+    state_percentile = Column(Float, nullable=True)
+    district_rank = Column(Integer, nullable=True)
+    district_percentile = Column(Float, nullable=True)
+    county_rank = Column(Integer, nullable=True)
+    county_percentile = Column(Float, nullable=True)
+    tier_rank = Column(Integer, nullable=True)
+    tier_percentile = Column(Float, nullable=True)
+
     # Audit
     pipeline_run_id = Column(Integer, ForeignKey("pipeline_runs.id"), nullable=True)
     pipeline_run = relationship("PipelineRun", back_populates="precincts")
 
     __table_args__ = (
+        UniqueConstraint("state_fips", "precinct_id"),
         Index("idx_precincts_geom", "geom", postgresql_using="gist"),
         Index("idx_precincts_geom_simplified", "geom_simplified", postgresql_using="gist"),
+        Index("idx_precincts_county_fips", "county_fips"),
         Index("idx_precincts_cd_number", "cd_number"),
         Index("idx_precincts_tier", "tier"),
         Index("idx_precincts_score", "score"),
         Index("idx_precincts_youth_share", "youth_share"),
         Index("idx_precincts_dem_margin", "dem_margin"),
+        Index("idx_precincts_state_rank", "state_rank"),
+        Index("idx_precincts_district_rank", "cd_number", "district_rank"),
+        Index("idx_precincts_county_rank", "county_fips", "county_rank"),
+        Index("idx_precincts_tier_rank", "tier", "tier_rank"),
+        {"postgresql_partition_by": "LIST (state_fips)"},
     )
@@ -0,0 +1,31 @@
+"""Shared query parameters for the API routers."""
+from typing import Optional
+
+from fastapi import HTTPException, Query
+
+from app.config import settings
+
+
+def state_param(
+    state: Optional[str] = Query(
+        None,
+        pattern=r"^\d{2}$",
+        description="State FIPS code (defaults to DEFAULT_STATE). Prunes queries to that state's partition.",
+    ),
+) -> str:
+    return state or settings.default_state
+
+
+def bbox_param(
+    bbox: Optional[str] = Query(
+        None,
+        description="minx,miny,maxx,maxy in lon/lat; keeps precincts whose bounding box overlaps it",
+    ),
+) -> Optional[tuple[float, float, float, float]]:
+    if bbox is None:
+        return None
+    try:
+        minx, miny, maxx, maxy = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="bbox must be minx,miny,maxx,maxy")
+    return minx, miny, maxx, maxy
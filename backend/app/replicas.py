@@ -0,0 +1,90 @@
+"""
+Read-replica selection for the read-only routes.
+
+A daemon thread polls every replica (started from the app lifespan). A
+replica is eligible while it answers and its replay lag is within
+max_lag_seconds; eligible replicas are handed out round-robin. With no
+eligible replica, choose() returns None and callers use the primary — so
+pipeline UPDATE passes lagging a replica push reads back to the primary
+instead of serving stale scores.
+"""
+import itertools
+import logging
+import threading
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+# Lag is zero when everything received has been replayed (an idle primary
+# would otherwise look ever more behind via the replay timestamp).
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class Replica:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.engine.url.host}:{self.engine.url.port or 5432}"
+
+
+class ReplicaRouter:
+    def __init__(self, engines: list[Engine], max_lag_seconds: float, check_interval_seconds: float):
+        self.replicas = [Replica(e) for e in engines]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._next = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def choose(self) -> Optional[Engine]:
+        """Next eligible replica engine, or None to use the primary."""
+        eligible = [r for r in self.replicas if r.healthy]
+        if not eligible:
+            return None
+        return eligible[next(self._next) % len(eligible)].engine
+
+    def check(self, replica: Replica) -> None:
+        try:
+            with replica.engine.connect() as conn:
+                lag = float(conn.execute(LAG_SQL).scalar())
+            healthy = lag <= self.max_lag_seconds
+        except Exception as exc:
+            lag, healthy = None, False
+            if replica.healthy:
+                log.warning("Replica %s failed its health check: %s", replica.name, exc)
+        if healthy != replica.healthy:
+            log.info("Replica %s %s (lag %s s)", replica.name, "in rotation" if healthy else "out of rotation", lag)
+        replica.lag_seconds, replica.healthy = lag, healthy
+
+    def check_all(self) -> None:
+        for replica in self.replicas:
+            self.check(replica)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.check_all()
+            self._stop.wait(self.check_interval_seconds)
+
+    def start(self) -> None:
+        if self.replicas and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def status(self) -> list[dict]:
+        return [{"replica": r.name, "healthy": r.healthy, "lag_seconds": r.lag_seconds} for r in self.replicas]
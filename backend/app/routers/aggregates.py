@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.cache import cached_body
+from app.database import get_read_db
+from app.params import state_param
+
+router = APIRouter(tags=["aggregates"])
+
+EMPTY_FEATURE_COLLECTION = '{"type": "FeatureCollection", "features": []}'
+
+
+def render_aggregates(db: Session, state: str, level: str) -> bytes:
+    """Serialized aggregate FeatureCollection for one level (cached per worker)."""
+    return cached_body(("aggregates", state, level), lambda: _query_aggregates(db, state, level))
+
+
+def _query_aggregates(db: Session, state: str, level: str) -> bytes:
+    sql = text("""
+        SELECT json_build_object(
+            'type', 'FeatureCollection',
+            'features', COALESCE(json_agg(json_build_object(
+                'type', 'Feature',
+                'id', a.id,
+                'geometry', ST_AsGeoJSON(a.geom)::json,
+                'properties', json_build_object(
+                    'level', a.level,
+                    'key', a.key,
+                    'precinct_count', a.precinct_count,
+                    'total_pop', a.total_pop,
+                    'pop_18_29', a.pop_18_29,
+                    'youth_share', a.youth_share,
+                    'dem_margin', a.dem_margin,
+                    'score', a.score,
+                    'priority_count', a.priority_count,
+                    'target_count', a.target_count
+                )
+            ) ORDER BY a.key), '[]'::json)
+        )::text
+        FROM precinct_aggregates a
+        WHERE a.state_fips = :state AND a.level = :level
+    """)
+    geojson = db.execute(sql, {"state": state, "level": level}).scalar()
+    return (geojson or EMPTY_FEATURE_COLLECTION).encode()
+
+
+@router.get("/aggregates")
+def get_aggregates(
+    level: str = Query("county", pattern=r"^(county|district|hex_\w+)$"),
+    state: str = Depends(state_param),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Low-zoom summaries as a GeoJSON FeatureCollection: dissolved county or
+    congressional-district outlines, or hexbin cells (e.g. `hex_25km`), each
+    with population-weighted youth share and score, vote-weighted margin and
+    tier counts. Precomputed by scripts/05b_aggregates.py.
+    """
+    return Response(content=render_aggregates(db, state, level), media_type="application/json")
@@ -0,0 +1,73 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+from app.analytics import AnalyticsSnapshot, SpatialUnavailable, analytics
+from app.cache import cached_body
+from app.config import settings
+from app.database import get_read_db
+from app.params import bbox_param, state_param
+from app.routers.config import PIPELINE_CONFIG
+from app.routers.precincts import within_geojson
+from app.schemas.precinct import AnalyticsRollup, WhatIfResult
+
+router = APIRouter(tags=["analytics"])
+
+
+def analytics_snapshot(state: str = Depends(state_param), db: Session = Depends(get_read_db)) -> AnalyticsSnapshot:
+    if not settings.analytics_enabled:
+        raise HTTPException(status_code=503, detail="The analytics engine is disabled (ANALYTICS_ENABLED is not set)")
+    snapshot = analytics.snapshot(db, state)
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail=f"No analytics snapshot published for state {state} yet")
+    return snapshot
+
+
+@router.get("/analytics/rollup", response_model=AnalyticsRollup)
+def get_rollup(
+    by: Literal["district", "county", "tier"] = "district",
+    bbox: Optional[tuple[float, float, float, float]] = Depends(bbox_param),
+    within: Optional[str] = Query(None, description="GeoJSON geometry (lon/lat); keeps precincts intersecting it"),
+    snapshot: AnalyticsSnapshot = Depends(analytics_snapshot),
+):
+    """
+    Population-weighted youth share, margin and score, plus tier counts, per
+    district, county or tier over the latest run's snapshot, optionally
+    limited to a bounding box or a polygon.
+    """
+    within = within_geojson(within)
+    try:
+        body = cached_body(
+            ("analytics_rollup", snapshot.run_id, by, bbox, within),
+            lambda: analytics.rollup(snapshot, by, bbox, within),
+        )
+    except SpatialUnavailable as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/analytics/whatif", response_model=WhatIfResult)
+def get_whatif(
+    youth_weight: float = Query(PIPELINE_CONFIG["score_weights"]["youth_share"], ge=0, le=1),
+    margin_weight: float = Query(PIPELINE_CONFIG["score_weights"]["dem_margin"], ge=0, le=1),
+    priority_min: float = Query(PIPELINE_CONFIG["tiers"]["priority"]["score_min"], ge=0, le=1),
+    target_min: float = Query(PIPELINE_CONFIG["tiers"]["target"]["score_min"], ge=0, le=1),
+    watchlist_min: float = Query(PIPELINE_CONFIG["tiers"]["watchlist"]["score_min"], ge=0, le=1),
+    contest: Optional[str] = Query(None, description="Score against this contest's margin instead of the published one"),
+    snapshot: AnalyticsSnapshot = Depends(analytics_snapshot),
+):
+    """
+    Re-score the latest run with other weights, tier cut-offs or contest and
+    report the resulting tiers per district, with how many precincts would
+    change tier. Nothing is written; the published scores stay as they are.
+    """
+    if not priority_min >= target_min >= watchlist_min:
+        raise HTTPException(status_code=422, detail="Tier cut-offs must satisfy priority_min >= target_min >= watchlist_min")
+    weights = {"youth_share": youth_weight, "dem_margin": margin_weight}
+    thresholds = {"priority": priority_min, "target": target_min, "watchlist": watchlist_min}
+    body = cached_body(
+        ("analytics_whatif", snapshot.run_id, youth_weight, margin_weight, priority_min, target_min, watchlist_min, contest),
+        lambda: analytics.whatif(snapshot, weights, thresholds, contest),
+    )
+    return Response(content=body, media_type="application/json")
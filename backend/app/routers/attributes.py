@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.artifacts import IMMUTABLE_CACHE_CONTROL, attributes_path, latest_run_id
+from app.database import get_read_db
+from app.params import state_param
+
+router = APIRouter(tags=["attributes"])
+
+
+@router.get("/attributes")
+def get_latest_attributes(state: str = Depends(state_param), db: Session = Depends(get_read_db)):
+    """Points the client at the attribute arrays of the state's latest successful run."""
+    run_id = latest_run_id(db, state)
+    if run_id is None or not attributes_path(run_id).exists():
+        raise HTTPException(status_code=404, detail="No attribute arrays published yet")
+    return {"run_id": run_id, "url": f"/api/attributes/{run_id}.bin"}
+
+
+@router.get("/attributes/{run_id}.bin")
+def get_attributes(run_id: int):
+    """
+    Per-precinct filter attributes as columnar typed arrays (see
+    scripts/06_export.py export_attributes for the layout). Files are
+    versioned by pipeline run and never change, so they are cached forever.
+    """
+    path = attributes_path(run_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail=f"No attribute arrays for run {run_id}")
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
@@ -1,17 +1,22 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import text
+import json
+
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.analytics import analytics
+from app.cache import cached_body
+from app.database import get_read_db
+from app.engine import PreparedQuery
+from app.params import state_param
 from app.schemas.precinct import DistrictStats
+from app.store import store
 
 router = APIRouter(tags=["districts"])
 
 
-@router.get("/districts", response_model=list[DistrictStats])
-def get_districts(db: Session = Depends(get_db)):
-    """Aggregate stats per congressional district."""
-    sql = text("""
+DISTRICTS_QUERY = PreparedQuery("districts_by_state", """
+    SELECT COALESCE(json_agg(d ORDER BY d.cd_number), '[]'::json)::text
+    FROM (
         SELECT
             cd_number,
             COUNT(*) AS precinct_count,
@@ -20,9 +25,32 @@ def get_districts(db: Session = Depends(get_db)):
             COUNT(*) FILTER (WHERE tier = 'priority') AS priority_count,
             COUNT(*) FILTER (WHERE tier = 'target') AS target_count
         FROM precincts
-        WHERE cd_number IS NOT NULL
+        WHERE state_fips = :state
+          AND cd_number IS NOT NULL
         GROUP BY cd_number
-        ORDER BY cd_number
-    """)
-    rows = db.execute(sql).mappings().all()
-    return [dict(r) for r in rows]
+    ) d
+""")
+
+
+def render_districts(db: Session, state: str) -> bytes:
+    """
+    Serialized district stats body: from the in-process store, else the
+    analytics snapshot or the DB (cached per worker).
+    """
+    snapshot = store.get(state)
+    if snapshot is not None:
+        return json.dumps(snapshot.district_stats()).encode()
+    parquet = analytics.snapshot(db, state)
+    if parquet is not None:
+        return cached_body(("districts", state), lambda: analytics.district_stats(parquet))
+    return cached_body(("districts", state), lambda: _query_districts(db, state))
+
+
+def _query_districts(db: Session, state: str) -> bytes:
+    return DISTRICTS_QUERY(db, {"state": state}).scalar().encode()
+
+
+@router.get("/districts", response_model=list[DistrictStats])
+def get_districts(state: str = Depends(state_param), db: Session = Depends(get_read_db)):
+    """Aggregate stats per congressional district of one state."""
+    return Response(content=render_districts(db, state), media_type="application/json")
@@ -1,16 +1,29 @@
 import csv
 import io
-from typing import Optional
+from itertools import chain
+from pathlib import Path
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import StreamingResponse
+import pandas as pd
+from fastapi import APIRouter, Depends, Header, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.analytics import analytics
+from app.artifacts import export_bundle_path, latest_run_id
+from app.cache import LRUCache
+from app.config import settings
+from app.database import db_session
+from app.params import state_param
+from app.store import store
 
 router = APIRouter(tags=["export"])
 
+# Exports scan and sort a whole state; give them room without letting the
+# map routes' limits follow suit.
+get_export_db = db_session(settings.export_statement_timeout_ms, settings.export_work_mem, read_only=True)
+
 EXPORT_COLUMNS = [
     "precinct_id", "county_name", "cd_number",
     "total_pop", "pop_18_29", "youth_share",
@@ -18,21 +31,37 @@ EXPORT_COLUMNS = [
     "score", "tier",
 ]
 
+# Nullable integer columns, typed as in the pre-rendered Parquet bundles
+INTEGER_COLUMNS = ["cd_number", "total_pop", "pop_18_29", "dem_votes", "rep_votes", "total_votes"]
 
-@router.get("/export/csv")
-def export_csv(
-    district: Optional[int] = None,
-    youth_min: float = 0.0,
-    margin_floor: float = -1.0,
-    tier: Optional[str] = None,
-    db: Session = Depends(get_db),
-):
-    """Stream a CSV export of filtered precincts."""
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# Latest run per state, so a request answered from a bundle touches no connection
+_bundle_runs = LRUCache(maxsize=64, ttl=settings.cache_ttl_seconds)
+
+
+def bundle_path(
+    db: Session, state: str, youth_min: float, margin_floor: float,
+    district: Optional[int], tier: Optional[str], fmt: Literal["csv", "csv.gz", "parquet"],
+) -> Optional[Path]:
+    """The export pre-rendered by scripts/06_export.py for these filters, if there is one."""
+    run_id = _bundle_runs.get(state)
+    if run_id is None:
+        run_id = latest_run_id(db, state)
+        if run_id is None:
+            return None
+        _bundle_runs.set(state, run_id)
+    path = export_bundle_path(run_id, youth_min, margin_floor, district, tier, fmt)
+    return path if path.is_file() else None
+
+
+def _export_query(state, district, youth_min, margin_floor, tier):
     conditions = [
+        "state_fips = :state",
         "youth_share >= :youth_min",
         "dem_margin >= :margin_floor",
     ]
-    params: dict = {"youth_min": youth_min, "margin_floor": margin_floor}
+    params: dict = {"state": state, "youth_min": youth_min, "margin_floor": margin_floor}
 
     if district is not None:
         conditions.append("cd_number = :district")
@@ -44,7 +73,47 @@ def export_csv(
 
     where_clause = " AND ".join(conditions)
     cols = ", ".join(EXPORT_COLUMNS)
-    sql = text(f"SELECT {cols} FROM precincts WHERE {where_clause} ORDER BY score DESC NULLS LAST")
+    sql = text(f"SELECT {cols} FROM precincts WHERE {where_clause} ORDER BY score DESC NULLS LAST, precinct_id")
+    return sql, params
+
+
+@router.get("/export/csv")
+def export_csv(
+    district: Optional[int] = None,
+    youth_min: float = 0.0,
+    margin_floor: float = -1.0,
+    tier: Optional[str] = None,
+    state: str = Depends(state_param),
+    accept_encoding: Optional[str] = Header(None),
+    db: Session = Depends(get_export_db),
+):
+    """
+    CSV export of filtered precincts. Statewide, per-district and per-tier
+    exports at the common thresholds are sent from files pre-rendered by the
+    pipeline (the gzipped copy when the client accepts it, else the plain
+    one, both with Content-Length and Range support); other filters stream from the in-process store when
+    it holds this state, else from the analytics snapshot when
+    ANALYTICS_ENABLED is set, else from the database.
+    """
+    headers = {"Content-Disposition": "attachment; filename=precincts.csv"}
+
+    gzipped = "gzip" in (accept_encoding or "")
+    path = bundle_path(db, state, youth_min, margin_floor, district, tier, "csv.gz" if gzipped else "csv")
+    if path is not None:
+        headers["Vary"] = "Accept-Encoding"
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+        return FileResponse(path, media_type="text/csv", headers=headers)
+
+    snapshot = store.get(state)
+    if snapshot is not None:
+        header = io.StringIO()
+        csv.writer(header).writerow(EXPORT_COLUMNS)
+        lines = snapshot.csv_lines(snapshot.select(youth_min, margin_floor, district, tier))
+        return StreamingResponse(chain([header.getvalue().encode()], lines), media_type="text/csv", headers=headers)
+
+    parquet = analytics.snapshot(db, state)
+    sql, params = _export_query(state, district, youth_min, margin_floor, tier)
 
     def generate():
         output = io.StringIO()
@@ -54,15 +123,40 @@ def export_csv(
         output.seek(0)
         output.truncate(0)
 
-        rows = db.execute(sql, params)
+        if parquet is not None:
+            rows = analytics.export_rows(parquet, EXPORT_COLUMNS, youth_min, margin_floor, district, tier)
+        else:
+            rows = db.execute(sql, params)
         for row in rows:
             writer.writerow(row)
             yield output.getvalue()
             output.seek(0)
             output.truncate(0)
 
-    return StreamingResponse(
-        generate(),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=precincts.csv"},
+    return StreamingResponse(generate(), media_type="text/csv", headers=headers)
+
+
+@router.get("/export/parquet")
+def export_parquet(
+    district: Optional[int] = None,
+    youth_min: float = 0.0,
+    margin_floor: float = -1.0,
+    tier: Optional[str] = None,
+    state: str = Depends(state_param),
+    db: Session = Depends(get_export_db),
+):
+    """Same rows as /export/csv as a Parquet file; pre-rendered filter combinations are sent from disk."""
+    path = bundle_path(db, state, youth_min, margin_floor, district, tier, "parquet")
+    if path is not None:
+        return FileResponse(path, media_type=PARQUET_MEDIA_TYPE, filename="precincts.parquet")
+
+    sql, params = _export_query(state, district, youth_min, margin_floor, tier)
+    df = pd.DataFrame(db.execute(sql, params).all(), columns=EXPORT_COLUMNS)
+    df[INTEGER_COLUMNS] = df[INTEGER_COLUMNS].astype("Int64")
+    body = io.BytesIO()
+    df.to_parquet(body, engine="pyarrow", compression="zstd", index=False)
+    return Response(
+        content=body.getvalue(),
+        media_type=PARQUET_MEDIA_TYPE,
+        headers={"Content-Disposition": "attachment; filename=precincts.parquet"},
     )
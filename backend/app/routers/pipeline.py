@@ -0,0 +1,163 @@
+"""
+Pipeline control: enqueue runs, inspect them, stream their progress.
+
+Runs execute in scripts/pipeline_worker.py, never in the API process; the
+API only inserts a queued pipeline_runs row and reads back what the stages
+record in pipeline_run_stages.
+"""
+import asyncio
+import hmac
+import json
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, get_db
+from app.schemas.precinct import PipelineRunRequest, PipelineRunStatus
+
+router = APIRouter(tags=["pipeline"])
+
+# pg_advisory_xact_lock(ENQUEUE_LOCK_CLASS, state) serializes the
+# "no active run for this state" check with the insert
+ENQUEUE_LOCK_CLASS = 0x59560002
+FINISHED = ("success", "failed")
+
+
+def require_pipeline_token(authorization: Optional[str] = Header(None)) -> None:
+    if not settings.pipeline_api_token:
+        raise HTTPException(status_code=403, detail="Pipeline control is disabled (PIPELINE_API_TOKEN is not set)")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token, settings.pipeline_api_token):
+        raise HTTPException(status_code=401, detail="Invalid pipeline token")
+
+
+def run_status(db: Session, run_id: int) -> Optional[dict]:
+    """The run, its stages so far and an ETA from the same state's last successful run."""
+    run = db.execute(text("""
+        SELECT id, status, state_fips, error_message, planned_stages,
+               queued_at, started_at, finished_at
+        FROM pipeline_runs WHERE id = :run_id
+    """), {"run_id": run_id}).mappings().first()
+    if run is None:
+        return None
+    stages = db.execute(text("""
+        SELECT stage, status, wall_seconds, rows_in, rows_out, rows_per_second, error_message,
+               started_at, finished_at
+        FROM pipeline_run_stages WHERE pipeline_run_id = :run_id
+        ORDER BY started_at
+    """), {"run_id": run_id}).mappings().all()
+    previous = dict(db.execute(text("""
+        SELECT s.stage, s.wall_seconds
+        FROM pipeline_run_stages s
+        WHERE s.status = 'success' AND s.pipeline_run_id = (
+            SELECT id FROM pipeline_runs
+            WHERE status = 'success' AND state_fips = :state AND id <> :run_id
+            ORDER BY finished_at DESC NULLS LAST, id DESC
+            LIMIT 1
+        )
+    """), {"state": run["state_fips"], "run_id": run_id}).all())
+
+    planned = run["planned_stages"] or []
+    done = {s["stage"] for s in stages if s["status"] == "success"}
+    current = next((s for s in stages if s["status"] == "running"), None)
+    eta = None
+    if run["status"] not in FINISHED and planned and all(stage in previous for stage in planned):
+        remaining = [stage for stage in planned if stage not in done]
+        eta = sum(previous[stage] for stage in remaining)
+        if current is not None and current["stage"] in previous:
+            eta -= min(previous[current["stage"]], current["wall_seconds"] or 0)
+        eta = round(max(eta, 0.0), 1)
+
+    return {
+        **run,
+        "planned_stages": planned,
+        "stages_done": len(done),
+        "current_stage": current["stage"] if current else None,
+        "eta_seconds": eta,
+        "stages": [dict(s) for s in stages],
+    }
+
+
+@router.post("/pipeline/runs", status_code=202, response_model=PipelineRunStatus,
+             dependencies=[Depends(require_pipeline_token)])
+def create_run(request: PipelineRunRequest, db: Session = Depends(get_db)):
+    """
+    Queue a pipeline run for a state; scripts/pipeline_worker.py picks it up.
+    409 while the state already has a queued or running run.
+    """
+    state = request.state or settings.default_state
+    db.execute(text("SELECT pg_advisory_xact_lock(:cls, :state)"), {"cls": ENQUEUE_LOCK_CLASS, "state": int(state)})
+    active = db.execute(text("""
+        SELECT id FROM pipeline_runs
+        WHERE state_fips = :state AND status IN ('queued', 'running')
+        ORDER BY id LIMIT 1
+    """), {"state": state}).scalar()
+    if active is not None:
+        raise HTTPException(status_code=409, detail=f"Run {active} for state {state} is already queued or running")
+    run_id = db.execute(text("""
+        INSERT INTO pipeline_runs (status, state_fips, queued_at)
+        VALUES ('queued', :state, :now)
+        RETURNING id
+    """), {"state": state, "now": datetime.now(timezone.utc)}).scalar()
+    db.commit()
+    return run_status(db, run_id)
+
+
+@router.get("/pipeline/runs/{run_id}", response_model=PipelineRunStatus)
+def get_run(run_id: int, db: Session = Depends(get_db)):
+    """Status of a pipeline run with per-stage rows, throughput and ETA."""
+    status = run_status(db, run_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Pipeline run {run_id} not found")
+    return status
+
+
+def _snapshot(run_id: int) -> Optional[dict]:
+    # A short session per poll, so an open stream holds no pooled connection
+    with SessionLocal() as db:
+        return run_status(db, run_id)
+
+
+def _event(name: str, data: dict) -> bytes:
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+@router.get("/pipeline/runs/{run_id}/events")
+async def stream_run_events(run_id: int, request: Request):
+    """
+    Server-Sent Events: a `progress` event with the run status (as
+    GET /pipeline/runs/{id}) whenever it changes, then a final `done` event
+    once the run has succeeded or failed.
+    """
+    first = await asyncio.to_thread(_snapshot, run_id)
+    if first is None:
+        raise HTTPException(status_code=404, detail=f"Pipeline run {run_id} not found")
+
+    async def events():
+        status, last, last_sent = first, None, 0.0
+        while True:
+            if status != last:
+                yield _event("progress", status)
+                last, last_sent = status, time.monotonic()
+            elif time.monotonic() - last_sent >= settings.pipeline_events_keepalive_seconds:
+                yield b": keepalive\n\n"
+                last_sent = time.monotonic()
+            if status["status"] in FINISHED:
+                yield _event("done", {"id": run_id, "status": status["status"], "error_message": status["error_message"]})
+                return
+            await asyncio.sleep(settings.pipeline_events_poll_seconds)
+            if await request.is_disconnected():
+                return
+            status = await asyncio.to_thread(_snapshot, run_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,31 +1,135 @@
-from typing import Optional
-from fastapi import APIRouter, Depends
+import json
+import math
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.cache import LRUCache, cached_body
+from app.config import settings
+from app.database import get_read_db
+from app.engine import PreparedQuery
+from app.features import DEFAULT_PRECISION, PROPERTIES_SQL, feature_sql, geometry_members_sql
+from app.params import bbox_param, state_param
+from app.schemas.precinct import NearBatchRequest, PrecinctDetail
+from app.store import store
 
 router = APIRouter(tags=["precincts"])
 
+EMPTY_FEATURE_COLLECTION = '{"type": "FeatureCollection", "features": []}'
+PRECINCT_LIMIT = 5000
 
-@router.get("/precincts")
-def get_precincts(
+# Fixed queries behind /precincts/{precinct_id}, prepared once per connection
+DETAIL_FEATURE_QUERY = PreparedQuery("precinct_detail_feature", f"""
+    SELECT json_build_object(
+        'type', 'Feature',
+        'id', p.id,
+        'geometry', ST_AsGeoJSON(p.geom)::json,
+        'properties', {PROPERTIES_SQL}
+    )
+    FROM precincts p
+    WHERE p.state_fips = :state AND p.precinct_id = :precinct_id
+""")
+
+DETAIL_NEIGHBORS_QUERY = PreparedQuery("precinct_detail_neighbors", """
+    SELECT
+        n.precinct_id, n.county_name, n.cd_number, n.score, n.tier,
+        ST_Distance(n.geom::geography, p.geom::geography) AS distance_m
+    FROM precincts p
+    CROSS JOIN LATERAL (
+        SELECT precinct_id, county_name, cd_number, score, tier, geom
+        FROM precincts
+        WHERE state_fips = p.state_fips
+          AND precinct_id <> p.precinct_id
+          AND geom IS NOT NULL
+        ORDER BY geom <-> p.geom
+        LIMIT :k
+    ) n
+    WHERE p.state_fips = :state
+      AND p.precinct_id = :precinct_id
+      AND p.geom IS NOT NULL
+""")
+
+DETAIL_CENSUS_QUERY = PreparedQuery("precinct_detail_census", """
+    SELECT geoid, county_fips, total_pop, pop_18_29, youth_share, acs_vintage
+    FROM census_block_groups
+    WHERE geoid = :precinct_id
+      AND left(county_fips, 2) = :state
+""")
+
+DETAIL_ELECTIONS_QUERY = PreparedQuery("precinct_detail_elections", """
+    SELECT election_date, county_name, precinct_id, contest_name,
+           dem_votes, rep_votes, total_votes, dem_pct, dem_margin
+    FROM election_results
+    WHERE state_fips = :state
+      AND precinct_id = :precinct_id
+    ORDER BY election_date DESC, contest_name
+""")
+
+_detail_cache = LRUCache(maxsize=settings.precinct_detail_cache_size, ttl=settings.cache_ttl_seconds)
+
+# Near-search bodies keyed by the rounded search point (see near_cache_precision)
+_near_cache = LRUCache(maxsize=settings.near_cache_size, ttl=settings.cache_ttl_seconds)
+
+METERS_PER_DEGREE_LAT = 110_540
+METERS_PER_DEGREE_LON = 111_320
+
+
+def within_geojson(within: Optional[str]) -> Optional[str]:
+    """Validate a `within=` GeoJSON (Multi)Polygon; returns it normalized for cache keys."""
+    if within is None:
+        return None
+    try:
+        geom = json.loads(within)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="within must be a GeoJSON geometry")
+    if not isinstance(geom, dict) or geom.get("type") not in ("Polygon", "MultiPolygon"):
+        raise HTTPException(status_code=422, detail="within must be a GeoJSON Polygon or MultiPolygon")
+    return json.dumps(geom, sort_keys=True, separators=(",", ":"))
+
+
+WITHIN_SQL = "ST_Intersects({geom}, ST_SetSRID(ST_GeomFromGeoJSON(:within), 4326))"
+
+
+def render_precincts(
+    db: Session,
+    state: str,
     district: Optional[int] = None,
     youth_min: float = 0.15,
     margin_floor: float = 0.0,
     tier: Optional[str] = None,
-    db: Session = Depends(get_db),
-):
+    geometry: str = "simplified",
+    within: Optional[str] = None,
+    bbox: Optional[tuple[float, float, float, float]] = None,
+    precision: int = DEFAULT_PRECISION,
+) -> bytes:
     """
-    Returns a GeoJSON FeatureCollection of precincts built entirely in PostgreSQL
-    via json_build_object + json_agg + ST_AsGeoJSON for maximum performance.
+    Serialized FeatureCollection body for the given filters: from the
+    in-process store when it holds this state, else from PostgreSQL (cached
+    per worker).
     """
+    snapshot = store.get(state)
+    if snapshot is not None and geometry == "simplified" and precision == DEFAULT_PRECISION and within is None:
+        idx = snapshot.select(youth_min, margin_floor, district, tier, bbox, scored_only=True)
+        return snapshot.feature_collection(idx[:PRECINCT_LIMIT])
+
+    key = ("precincts", state, district, youth_min, margin_floor, tier, geometry, within, bbox, precision)
+    return cached_body(
+        key,
+        lambda: _query_precincts(db, state, district, youth_min, margin_floor, tier, geometry, within, bbox, precision),
+    )
+
+
+def _query_precincts(
+    db, state, district, youth_min, margin_floor, tier, geometry, within=None, bbox=None, precision=DEFAULT_PRECISION
+) -> bytes:
     conditions = [
+        "state_fips = :state",
         "score IS NOT NULL",
         "youth_share >= :youth_min",
         "dem_margin >= :margin_floor",
     ]
-    params: dict = {"youth_min": youth_min, "margin_floor": margin_floor}
+    params: dict = {"state": state, "youth_min": youth_min, "margin_floor": margin_floor}
 
     if district is not None:
         conditions.append("cd_number = :district")
@@ -35,43 +139,224 @@ def get_precincts(
         conditions.append("tier = :tier")
         params["tier"] = tier
 
+    if within is not None:
+        conditions.append(WITHIN_SQL.format(geom="geom"))
+        params["within"] = within
+
+    if bbox is not None:
+        conditions.append("geom && ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326)")
+        params.update(zip(("minx", "miny", "maxx", "maxy"), bbox))
+
     where_clause = " AND ".join(conditions)
 
+    # Features pre-encoded by scripts/06_export.py are concatenated as stored;
+    # precincts without a current fragment are encoded live: new ones, and
+    # ones a later run's 05 has re-scored (and re-tagged with its
+    # pipeline_run_id) before that run's 06 rebuilt the fragments.
+    # Either way the API never parses and re-encodes the (multi-MB) document.
+    sql = text(f"""
+        SELECT '{{"type": "FeatureCollection", "features": ['
+            || COALESCE(string_agg(COALESCE(f.feature, {feature_sql(geometry, precision)}::text), ', '
+                                   ORDER BY ids.score DESC), '')
+            || ']}}' AS geojson
+        FROM (
+            SELECT state_fips, precinct_id, score
+            FROM precincts
+            WHERE {where_clause}
+            ORDER BY score DESC
+            LIMIT {PRECINCT_LIMIT}
+        ) ids
+        JOIN precincts p USING (state_fips, precinct_id)
+        LEFT JOIN precinct_features f
+          ON f.state_fips = p.state_fips
+         AND f.precinct_id = p.precinct_id
+         AND f.geometry_mode = :geometry
+         AND f.coord_precision = :precision
+         AND f.pipeline_run_id IS NOT DISTINCT FROM p.pipeline_run_id
+    """)
+    params.update(geometry=geometry, precision=precision)
+
+    geojson = db.execute(sql, params).scalar()
+    return (geojson or EMPTY_FEATURE_COLLECTION).encode()
+
+
+@router.get("/precincts")
+def get_precincts(
+    district: Optional[int] = None,
+    youth_min: float = 0.15,
+    margin_floor: float = 0.0,
+    tier: Optional[str] = None,
+    geometry: Literal["simplified", "centroid", "bbox", "none"] = "simplified",
+    within: Optional[str] = Query(None, description="GeoJSON Polygon/MultiPolygon to restrict results to"),
+    bbox: Optional[tuple[float, float, float, float]] = Depends(bbox_param),
+    precision: Literal[6, 4] = 6,
+    state: str = Depends(state_param),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Returns a GeoJSON FeatureCollection of precincts assembled in PostgreSQL
+    from the Feature fragments the pipeline pre-encodes (see app/features.py).
+
+    `geometry` selects how much shape data to ship: simplified polygons (map),
+    a point on surface, a bbox member, or none (properties only). Full
+    resolution geometry is only available from /precincts/{precinct_id}.
+    `precision` is the number of coordinate decimals (4 ≈ 10 m, for
+    overview zooms).
+    """
+    body = render_precincts(
+        db, state, district, youth_min, margin_floor, tier, geometry, within_geojson(within), bbox, precision
+    )
+    return Response(content=body, media_type="application/json")
+
+
+def render_near(
+    db: Session,
+    state: str,
+    lat: float,
+    lon: float,
+    radius_m: float,
+    tier: Optional[str],
+    limit: int,
+    geometry: str,
+    within: Optional[str] = None,
+) -> bytes:
+    """
+    Precincts within radius_m metres of a point, nearest first. The point is
+    rounded to near_cache_precision decimals (~100 m at 3) so nearby requests
+    share a cached body.
+    """
+    lat = round(lat, settings.near_cache_precision)
+    lon = round(lon, settings.near_cache_precision)
+    key = (state, lat, lon, radius_m, tier, limit, geometry, within)
+    body = _near_cache.get(key)
+    if body is None:
+        body = _query_near(db, state, lat, lon, radius_m, tier, limit, geometry, within)
+        _near_cache.set(key, body)
+    return body
+
+
+def _query_near(db, state, lat, lon, radius_m, tier, limit, geometry, within) -> bytes:
+    # The degree box around the point lets the geometry GiST index do the
+    # first cut; ST_DWithin on geography then applies the exact metric radius.
+    conditions = [
+        "p.state_fips = :state",
+        "p.geom && ST_Expand(pt.g, :dx, :dy)",
+        "ST_DWithin(p.geom::geography, pt.g::geography, :radius_m)",
+    ]
+    params: dict = {
+        "state": state,
+        "lat": lat,
+        "lon": lon,
+        "radius_m": radius_m,
+        "dx": radius_m / (METERS_PER_DEGREE_LON * max(math.cos(math.radians(lat)), 0.01)),
+        "dy": radius_m / METERS_PER_DEGREE_LAT,
+        "limit": limit,
+    }
+    if tier is not None:
+        conditions.append("p.tier = :tier")
+        params["tier"] = tier
+    if within is not None:
+        conditions.append(WITHIN_SQL.format(geom="p.geom"))
+        params["within"] = within
+
     sql = text(f"""
+        WITH pt AS (SELECT ST_SetSRID(ST_MakePoint(:lon, :lat), 4326) AS g)
         SELECT json_build_object(
             'type', 'FeatureCollection',
-            'features', COALESCE(json_agg(f.feature), '[]'::json)
-        ) AS geojson
-        FROM (
-            SELECT json_build_object(
+            'features', COALESCE(json_agg(json_build_object(
                 'type', 'Feature',
-                'geometry', ST_AsGeoJSON(COALESCE(p.geom_simplified, p.geom))::json,
-                'properties', json_build_object(
-                    'precinct_id', p.precinct_id,
-                    'county_name', p.county_name,
-                    'cd_number', p.cd_number,
-                    'total_pop', p.total_pop,
-                    'pop_18_29', p.pop_18_29,
-                    'youth_share', p.youth_share,
-                    'dem_votes', p.dem_votes,
-                    'rep_votes', p.rep_votes,
-                    'total_votes', p.total_votes,
-                    'dem_pct', p.dem_pct,
-                    'dem_margin', p.dem_margin,
-                    'score', p.score,
-                    'tier', p.tier
-                )
-            ) AS feature
-            FROM (
-                SELECT precinct_id
-                FROM precincts
-                WHERE {where_clause}
-                ORDER BY score DESC
-                LIMIT 5000
-            ) ids
-            JOIN precincts p USING (precinct_id)
-        ) f
+                'id', p.id,
+                {geometry_members_sql(geometry)},
+                'properties', ({PROPERTIES_SQL})::jsonb || jsonb_build_object('distance_m', p.distance_m)
+            ) ORDER BY p.distance_m), '[]'::json)
+        )::text
+        FROM (
+            -- KNN on the GiST index, nearest first
+            SELECT p.*, ST_Distance(p.geom::geography, pt.g::geography) AS distance_m
+            FROM precincts p, pt
+            WHERE {" AND ".join(conditions)}
+            ORDER BY p.geom <-> pt.g
+            LIMIT :limit
+        ) p
     """)
+    return db.execute(sql, params).scalar().encode()
+
+
+NearGeometry = Literal["centroid", "simplified", "none"]
+
+
+@router.get("/precincts/near")
+def get_precincts_near(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(5000, gt=0, le=100_000),
+    tier: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    geometry: NearGeometry = "centroid",
+    within: Optional[str] = Query(None, description="GeoJSON Polygon/MultiPolygon to restrict results to"),
+    state: str = Depends(state_param),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Precincts within `radius_m` metres of a point (e.g. a campus), nearest
+    first, as a GeoJSON FeatureCollection whose properties include
+    `distance_m`. Declared before /precincts/{precinct_id} so "near" is not
+    taken for an id.
+    """
+    body = render_near(db, state, lat, lon, radius_m, tier, limit, geometry, within_geojson(within))
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("/precincts/near")
+def post_precincts_near(
+    request: NearBatchRequest,
+    state: str = Depends(state_param),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Batch near search: one FeatureCollection per point, in request order,
+    under `results`. Each point is served from the same per-location cache as
+    the GET variant.
+    """
+    bodies = [
+        render_near(db, state, p.lat, p.lon, request.radius_m, request.tier, request.limit, request.geometry)
+        for p in request.points
+    ]
+    return Response(content=b'{"results": [' + b", ".join(bodies) + b"]}", media_type="application/json")
+
+
+@router.get("/precincts/{precinct_id}", response_model=PrecinctDetail)
+def get_precinct(
+    precinct_id: str,
+    neighbors: int = Query(8, ge=0, le=50),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Full-resolution detail for a single precinct: unsimplified geometry, the
+    nearest precincts (GiST KNN on geom) and the census and election rows it
+    was built from. Results are kept in a small per-id LRU.
+    """
+    # VTD GEOIDs start with the state FIPS, which pins the lookup to one partition
+    state = precinct_id[:2]
+    key = (precinct_id, neighbors)
+    cached = _detail_cache.get(key)
+    if cached is not None:
+        return cached
+
+    params = {"state": state, "precinct_id": precinct_id}
+    feature = DETAIL_FEATURE_QUERY(db, params).scalar()
+    if feature is None:
+        raise HTTPException(status_code=404, detail=f"Precinct {precinct_id} not found")
+
+    nearby = DETAIL_NEIGHBORS_QUERY(db, {**params, "k": neighbors}).mappings().all() if neighbors else []
+    census = DETAIL_CENSUS_QUERY(db, params).mappings().first()
+    elections = DETAIL_ELECTIONS_QUERY(db, params).mappings().all()
 
-    row = db.execute(sql, params).fetchone()
-    return row[0] if row and row[0] else {"type": "FeatureCollection", "features": []}
+    detail = {
+        **feature,
+        "neighbors": [dict(r) for r in nearby],
+        "census": dict(census) if census else None,
+        "election_results": [dict(r) for r in elections],
+    }
+    _detail_cache.set(key, detail)
+    return detail
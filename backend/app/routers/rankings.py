@@ -0,0 +1,124 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+from app.cache import cached_body
+from app.database import get_read_db
+from app.engine import PreparedQuery
+from app.params import state_param
+from app.schemas.precinct import PrecinctRanks, RankedPrecinct
+
+router = APIRouter(tags=["rankings"])
+
+RANKING_LIMIT = 500
+
+# Rank columns are precomputed by scripts/05_merge_score.py (compute_ranks);
+# each scope reads a contiguous rank range off its (group, rank) index.
+SCOPE_GROUPS = {
+    "state": None,
+    "district": "cd_number",
+    "county": "county_fips",
+    "tier": "tier",
+}
+
+
+def _top_query(scope: str, group: Optional[str]) -> PreparedQuery:
+    group_condition = f"AND p.{group} = :key" if group else ""
+    return PreparedQuery(f"rankings_{scope}", f"""
+        SELECT COALESCE(json_agg(r ORDER BY r.rank), '[]'::json)::text
+        FROM (
+            SELECT p.{scope}_rank AS rank, p.{scope}_percentile AS percentile,
+                   p.precinct_id, p.county_name, p.cd_number, p.score, p.tier,
+                   p.youth_share, p.dem_margin
+            FROM precincts p
+            WHERE p.state_fips = :state {group_condition}
+              AND p.{scope}_rank BETWEEN :first AND :last
+        ) r
+    """)
+
+
+TOP_QUERIES = {scope: _top_query(scope, group) for scope, group in SCOPE_GROUPS.items()}
+
+# Group sizes are the highest rank in each group: a backward probe of the
+# same indexes, not a count.
+PRECINCT_RANKS_QUERY = PreparedQuery("precinct_ranks", """
+    SELECT
+        p.precinct_id, p.score, p.tier,
+        p.state_rank, p.state_percentile,
+        (SELECT max(state_rank) FROM precincts
+          WHERE state_fips = p.state_fips) AS state_count,
+        p.district_rank, p.district_percentile,
+        (SELECT max(district_rank) FROM precincts
+          WHERE state_fips = p.state_fips AND cd_number = p.cd_number) AS district_count,
+        p.county_rank, p.county_percentile,
+        (SELECT max(county_rank) FROM precincts
+          WHERE state_fips = p.state_fips AND county_fips = p.county_fips) AS county_count,
+        p.tier_rank, p.tier_percentile,
+        (SELECT max(tier_rank) FROM precincts
+          WHERE state_fips = p.state_fips AND tier = p.tier) AS tier_count
+    FROM precincts p
+    WHERE p.state_fips = :state AND p.precinct_id = :precinct_id
+""")
+
+
+def _group_key(scope: str, key: Optional[str], state: str):
+    if scope == "state":
+        return None
+    if key is None:
+        raise HTTPException(status_code=422, detail=f"key is required for scope={scope}")
+    if scope == "district":
+        if not key.isdigit():
+            raise HTTPException(status_code=422, detail="key must be a district number")
+        return int(key)
+    if scope == "county":
+        if not key.isdigit() or len(key) not in (3, 5):
+            raise HTTPException(status_code=422, detail="key must be a 3- or 5-digit county FIPS")
+        return state + key if len(key) == 3 else key
+    return key
+
+
+@router.get("/rankings", response_model=list[RankedPrecinct])
+def get_rankings(
+    scope: Literal["state", "district", "county", "tier"] = "state",
+    key: Optional[str] = Query(None, description="District number, county FIPS or tier name (not for scope=state)"),
+    limit: int = Query(50, ge=1, le=RANKING_LIMIT),
+    offset: int = Query(0, ge=0),
+    state: str = Depends(state_param),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Top-N precincts by score within the state, a district, a county or a
+    tier, e.g. ?scope=district&key=27&limit=50. Each entry carries its rank
+    (1 = best) and percentile within that group.
+    """
+    group_key = _group_key(scope, key, state)
+    params = {"state": state, "key": group_key, "first": offset + 1, "last": offset + limit}
+    body = cached_body(
+        ("rankings", state, scope, group_key, offset, limit),
+        lambda: TOP_QUERIES[scope](db, params).scalar().encode(),
+    )
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/rankings/{precinct_id}", response_model=PrecinctRanks)
+def get_precinct_ranks(precinct_id: str, db: Session = Depends(get_read_db)):
+    """Where one precinct stands: rank, group size and percentile statewide and within its district, county and tier."""
+    row = PRECINCT_RANKS_QUERY(db, {"state": precinct_id[:2], "precinct_id": precinct_id}).mappings().first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Precinct {precinct_id} not found")
+
+    def position(group: str) -> Optional[dict]:
+        if row[f"{group}_rank"] is None:
+            return None
+        return {"rank": row[f"{group}_rank"], "of": row[f"{group}_count"], "percentile": row[f"{group}_percentile"]}
+
+    return {
+        "precinct_id": row["precinct_id"],
+        "score": row["score"],
+        "tier": row["tier"],
+        "state": position("state"),
+        "district": position("district"),
+        "county": position("county"),
+        "tier_rank": position("tier"),
+    }
@@ -0,0 +1,96 @@
+import json
+
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from app.artifacts import IMMUTABLE_CACHE_CONTROL, history_path
+from app.cache import LRUCache, cached_body
+from app.schemas.precinct import RunDiff
+
+router = APIRouter(tags=["runs"])
+
+DIFF_CHANGE_LIMIT = 5000
+
+# History files never change once written, so the frames need no TTL
+_history = LRUCache(maxsize=8)
+
+
+def load_history(run_id: int) -> pd.DataFrame:
+    frame = _history.get(run_id)
+    if frame is None:
+        path = history_path(run_id)
+        if not path.exists():
+            raise HTTPException(status_code=404, detail=f"No score history for run {run_id}")
+        frame = pd.read_parquet(path).set_index("precinct_id")
+        frame["tier"] = frame["tier"].astype(object)
+        _history.set(run_id, frame)
+    return frame
+
+
+def _value(value):
+    """JSON-ready cell: None for NaN, float32 noise rounded off."""
+    if pd.isna(value):
+        return None
+    return round(float(value), 6) if isinstance(value, float) or hasattr(value, "dtype") else value
+
+
+def render_diff(a: int, b: int, limit: int, tier_changes_only: bool) -> bytes:
+    """Tier transitions and score deltas between two runs, from one outer join of their history files."""
+    old, new = load_history(a), load_history(b)
+    both = old.join(new, how="outer", lsuffix="_a", rsuffix="_b")
+    in_a, in_b = both.index.isin(old.index), both.index.isin(new.index)
+    both["score_delta"] = both["score_b"] - both["score_a"]
+    tier_a, tier_b = both["tier_a"].fillna("unscored"), both["tier_b"].fillna("unscored")
+    common = in_a & in_b
+    tier_changed = common & (tier_a != tier_b).to_numpy()
+
+    transitions = (
+        pd.DataFrame({"from": tier_a[common], "to": tier_b[common]})
+        .value_counts().rename("count").reset_index()
+        .sort_values(["count", "from", "to"], ascending=[False, True, True])
+    )
+    deltas = both["score_delta"][common].dropna()
+
+    changes = both[tier_changed] if tier_changes_only else both[common & both["score_delta"].ne(0).to_numpy()]
+    changes = changes.reindex(changes["score_delta"].abs().sort_values(ascending=False, na_position="first").index)
+    changes = changes.head(limit)
+
+    return json.dumps({
+        "from_run": a,
+        "to_run": b,
+        "precincts": {"common": int(common.sum()), "added": int((in_b & ~in_a).sum()), "removed": int((in_a & ~in_b).sum())},
+        "tier_changed": int(tier_changed.sum()),
+        "tier_transitions": transitions.to_dict(orient="records"),
+        "score_delta": {
+            "mean": _value(deltas.mean()) if len(deltas) else None,
+            "median": _value(deltas.median()) if len(deltas) else None,
+            "max_increase": _value(deltas.max()) if len(deltas) else None,
+            "max_decrease": _value(deltas.min()) if len(deltas) else None,
+        },
+        "changes": [
+            {
+                "precinct_id": precinct_id,
+                "score_a": _value(row.score_a), "score_b": _value(row.score_b),
+                "score_delta": _value(row.score_delta),
+                "tier_a": _value(row.tier_a), "tier_b": _value(row.tier_b),
+            }
+            for precinct_id, row in zip(changes.index, changes.itertuples(index=False))
+        ],
+    }).encode()
+
+
+@router.get("/runs/{a}/diff/{b}", response_model=RunDiff)
+def get_run_diff(
+    a: int,
+    b: int,
+    limit: int = Query(500, ge=0, le=DIFF_CHANGE_LIMIT),
+    tier_changes_only: bool = Query(True, description="List only precincts whose tier changed (else any score change)"),
+):
+    """
+    What changed between pipeline runs a and b: precincts added / removed,
+    counts of every tier transition, score delta summary and the largest
+    individual changes. Read from the runs' Parquet score history
+    (scripts/06_export.py), so any two past runs can be compared.
+    """
+    body = cached_body(("run_diff", a, b, limit, tier_changes_only), lambda: render_diff(a, b, limit, tier_changes_only))
+    return Response(content=body, media_type="application/json", headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import FileResponse
+from pmtiles.reader import MmapSource, Reader
+from sqlalchemy.orm import Session
+
+from app.artifacts import IMMUTABLE_CACHE_CONTROL, latest_run_id, tiles_path
+from app.cache import LRUCache
+from app.database import get_read_db
+from app.params import state_param
+
+router = APIRouter(tags=["tiles"])
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+# Archives never change once written, so the memory-mapped readers need no TTL
+_archives = LRUCache(maxsize=8)
+
+
+def archive(run_id: int) -> Reader:
+    reader = _archives.get(run_id)
+    if reader is None:
+        path = tiles_path(run_id)
+        if not path.exists():
+            raise HTTPException(status_code=404, detail=f"No tile archive for run {run_id}")
+        with open(path, "rb") as f:
+            # The mapping keeps its own handle on the file
+            reader = Reader(MmapSource(f))
+        _archives.set(run_id, reader)
+    return reader
+
+
+@router.get("/tiles")
+def get_latest_tiles(state: str = Depends(state_param), db: Session = Depends(get_read_db)):
+    """
+    Points the client at the tile pyramid of the state's latest successful
+    run: the PMTiles archive itself, and a z/x/y template for map clients
+    without a PMTiles reader.
+    """
+    run_id = latest_run_id(db, state)
+    if run_id is None or not tiles_path(run_id).exists():
+        raise HTTPException(status_code=404, detail="No tile archive published yet")
+    header = archive(run_id).header()
+    return {
+        "run_id": run_id,
+        "url": f"/api/tiles/{run_id}.pmtiles",
+        "tiles": f"/api/tiles/{run_id}/{{z}}/{{x}}/{{y}}.mvt",
+        "minzoom": header["min_zoom"],
+        "maxzoom": header["max_zoom"],
+    }
+
+
+@router.get("/tiles/{run_id}.pmtiles")
+def get_tiles(run_id: int):
+    """
+    The precinct vector tile pyramid of one pipeline run as a single PMTiles
+    archive (see scripts/06_export.py export_tiles). Map clients fetch the
+    header, directories and tiles with HTTP Range requests, which
+    FileResponse answers with 206 partial content — no database involved, and
+    the file can equally be published to any static host or CDN.
+    """
+    path = tiles_path(run_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail=f"No tile archive for run {run_id}")
+    return FileResponse(
+        path,
+        media_type="application/vnd.pmtiles",
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
+
+
+@router.get("/tiles/{run_id}/{z}/{x}/{y}.mvt")
+def get_tile(run_id: int, z: int, x: int, y: int):
+    """
+    One vector tile, read from the run's memory-mapped PMTiles archive and
+    sent as stored (gzip). Tiles outside the pyramid are 204 No Content,
+    which map clients draw as empty. Like the archive, no database involved.
+    """
+    tile = archive(run_id).get(z, x, y) if 0 <= x < 2 ** z and 0 <= y < 2 ** z else None
+    if tile is None:
+        return Response(status_code=204, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+    return Response(
+        content=bytes(tile),
+        media_type=MVT_MEDIA_TYPE,
+        headers={"Content-Encoding": "gzip", "Cache-Control": IMMUTABLE_CACHE_CONTROL},
+    )
@@ -0,0 +1,61 @@
+import json
+from typing import Literal, Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+
+from app.adjacency import AdjacencyGraph, get_graph, grow_turfs
+from app.cache import cached_body
+from app.database import get_read_db
+from app.params import state_param
+from app.schemas.precinct import TurfCollection
+
+router = APIRouter(tags=["turfs"])
+
+
+def _render_turfs(graph: AdjacencyGraph, tiers: list[str], district: Optional[int], target: int) -> bytes:
+    mask = graph.eligible(tiers, district)
+    turfs = []
+    for members in grow_turfs(graph, mask, target):
+        members.sort(key=lambda i: graph.precinct_id[i])
+        scores = graph.score[members]
+        cds = sorted({int(cd) for cd in graph.cd_number[members] if cd >= 0})
+        turfs.append({
+            "precinct_ids": [graph.precinct_id[i] for i in members],
+            "precinct_count": len(members),
+            "pop_18_29": int(graph.pop_18_29[members].sum()),
+            "total_pop": int(graph.total_pop[members].sum()),
+            "avg_score": float(np.nanmean(scores)) if (~np.isnan(scores)).any() else None,
+            "cd_numbers": cds,
+        })
+    turfs.sort(key=lambda t: -t["pop_18_29"])
+    for i, turf in enumerate(turfs, start=1):
+        turf["turf_id"] = i
+    return json.dumps({
+        "target_youth_pop": target,
+        "precinct_count": int(mask.sum()),
+        "turfs": turfs,
+    }).encode()
+
+
+@router.get("/turfs", response_model=TurfCollection)
+def get_turfs(
+    tier: list[Literal["priority", "target", "watchlist", "low"]] = Query(["priority", "target"]),
+    district: Optional[int] = Query(None),
+    target_youth_pop: int = Query(2000, ge=100, le=1_000_000, description="Youth (18–29) population to aim for per turf"),
+    state: str = Depends(state_param),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Contiguous canvassing turfs of roughly equal youth population, grown over
+    the precinct adjacency graph (scripts/05c_adjacency.py) from the
+    precincts in the given tiers, optionally within one district. Each turf
+    lists its precinct_ids; draw them from /api/precincts or /api/tiles.
+    """
+    tiers = sorted(set(tier))
+    body = cached_body(
+        ("turfs", state, tuple(tiers), district, target_youth_pop),
+        lambda: _render_turfs(get_graph(db, state), tiers, district, target_youth_pop),
+    )
+    return Response(content=body, media_type="application/json")
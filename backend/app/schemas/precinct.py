@@ -1,5 +1,6 @@
-from typing import Any, Optional
-from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Any, Literal, Optional, Union
+from pydantic import BaseModel, Field
 
 
 class PrecinctProperties(BaseModel):
@@ -29,6 +30,56 @@ class PrecinctFeatureCollection(BaseModel):
     features: list[PrecinctFeature]
 
 
+class PrecinctNeighbor(BaseModel):
+    precinct_id: str
+    county_name: str
+    cd_number: Optional[int]
+    score: Optional[float]
+    tier: Optional[str]
+    distance_m: float
+
+
+class CensusRecord(BaseModel):
+    geoid: str
+    county_fips: str
+    total_pop: Optional[int]
+    pop_18_29: Optional[int]
+    youth_share: Optional[float]
+    acs_vintage: int
+
+
+class ElectionRecord(BaseModel):
+    election_date: date
+    county_name: str
+    precinct_id: str
+    contest_name: str
+    dem_votes: int
+    rep_votes: int
+    total_votes: int
+    dem_pct: Optional[float]
+    dem_margin: Optional[float]
+
+
+class PrecinctDetail(PrecinctFeature):
+    id: int
+    neighbors: list[PrecinctNeighbor]
+    census: Optional[CensusRecord]
+    election_results: list[ElectionRecord]
+
+
+class NearPoint(BaseModel):
+    lat: float = Field(ge=-90, le=90)
+    lon: float = Field(ge=-180, le=180)
+
+
+class NearBatchRequest(BaseModel):
+    points: list[NearPoint] = Field(min_length=1, max_length=50)
+    radius_m: float = Field(5000, gt=0, le=100_000)
+    tier: Optional[str] = None
+    limit: int = Field(100, ge=1, le=500)
+    geometry: Literal["centroid", "simplified", "none"] = "centroid"
+
+
 class DistrictStats(BaseModel):
     cd_number: int
     precinct_count: int
@@ -38,6 +89,106 @@ class DistrictStats(BaseModel):
     target_count: int
 
 
+class RankedPrecinct(BaseModel):
+    rank: int
+    percentile: float
+    precinct_id: str
+    county_name: str
+    cd_number: Optional[int]
+    score: float
+    tier: str
+    youth_share: Optional[float]
+    dem_margin: Optional[float]
+
+
+class RankPosition(BaseModel):
+    rank: int
+    of: int
+    percentile: float
+
+
+class PrecinctRanks(BaseModel):
+    precinct_id: str
+    score: Optional[float]
+    tier: Optional[str]
+    state: Optional[RankPosition]
+    district: Optional[RankPosition]
+    county: Optional[RankPosition]
+    tier_rank: Optional[RankPosition]
+
+
+class Turf(BaseModel):
+    turf_id: int
+    precinct_ids: list[str]
+    precinct_count: int
+    pop_18_29: int
+    total_pop: int
+    avg_score: Optional[float]
+    cd_numbers: list[int]
+
+
+class TurfCollection(BaseModel):
+    target_youth_pop: int
+    precinct_count: int
+    turfs: list[Turf]
+
+
+class TierTransition(BaseModel):
+    from_: str = Field(alias="from")
+    to: str
+    count: int
+
+
+class PrecinctChange(BaseModel):
+    precinct_id: str
+    score_a: Optional[float]
+    score_b: Optional[float]
+    score_delta: Optional[float]
+    tier_a: Optional[str]
+    tier_b: Optional[str]
+
+
+class RunDiff(BaseModel):
+    from_run: int
+    to_run: int
+    precincts: dict[str, int]            # common | added | removed
+    tier_changed: int
+    tier_transitions: list[TierTransition]
+    score_delta: dict[str, Optional[float]]   # mean | median | max_increase | max_decrease
+    changes: list[PrecinctChange]
+
+
+class PipelineRunRequest(BaseModel):
+    state: Optional[str] = Field(None, pattern=r"^\d{2}$")
+
+
+class PipelineStageStatus(BaseModel):
+    stage: str
+    status: str
+    wall_seconds: Optional[float]
+    rows_in: Optional[int]
+    rows_out: Optional[int]
+    rows_per_second: Optional[float]
+    error_message: Optional[str]
+    started_at: datetime
+    finished_at: Optional[datetime]
+
+
+class PipelineRunStatus(BaseModel):
+    id: int
+    status: str
+    state_fips: Optional[str]
+    error_message: Optional[str]
+    planned_stages: list[str]
+    stages_done: int
+    current_stage: Optional[str]
+    eta_seconds: Optional[float]
+    queued_at: Optional[datetime]
+    started_at: datetime
+    finished_at: Optional[datetime]
+    stages: list[PipelineStageStatus]
+
+
 class PipelineConfig(BaseModel):
     youth_share_min: float
     dem_margin_floor: float
@@ -45,3 +196,43 @@ class PipelineConfig(BaseModel):
     tiers: dict[str, dict[str, Any]]
     acs_vintage: int
     election_contest: str
+
+
+class AnalyticsRollupGroup(BaseModel):
+    key: Union[int, str]      # cd_number, county_fips or tier
+    precinct_count: int
+    total_pop: Optional[int]
+    pop_18_29: Optional[int]
+    youth_share: Optional[float]
+    dem_margin: Optional[float]
+    score: Optional[float]
+    priority_count: int
+    target_count: int
+    watchlist_count: int
+    low_count: int
+
+
+class AnalyticsRollup(BaseModel):
+    by: str
+    run_id: int
+    groups: list[AnalyticsRollupGroup]
+
+
+class WhatIfDistrict(BaseModel):
+    cd_number: int
+    precinct_count: int
+    avg_score: Optional[float]
+    priority_count: int
+    target_count: int
+    watchlist_count: int
+    low_count: int
+    changed_count: int
+
+
+class WhatIfResult(BaseModel):
+    run_id: int
+    weights: dict[str, float]
+    thresholds: dict[str, float]
+    contest: Optional[str]
+    changed_count: int
+    districts: list[WhatIfDistrict]
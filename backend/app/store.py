@@ -0,0 +1,252 @@
+"""
+Optional in-process precinct store (PRECINCT_STORE_ENABLED=true).
+
+For the latest successful run of each state in PRECINCT_STORE_STATES the
+API keeps a columnar snapshot of the precincts table on disk under
+output_dir/store/<state>_<run_id>/:
+
+    *.npy          filter columns (score order, NaN / -1 / 0 for NULL)
+    features.bin   pre-encoded GeoJSON Feature per precinct (simplified geometry)
+    csv.bin        pre-encoded export CSV line per precinct
+    *_offsets.npy  byte offsets into the two .bin files
+
+Every gunicorn worker memory-maps the same files, so the OS page cache holds
+one copy; only an STRtree over the precinct bounding boxes is per worker.
+The first worker to see a new run builds the snapshot under a file lock and
+the others wait for it and map the result.
+
+Rows are stored in the order the DB paths use (score DESC NULLS LAST), so a
+boolean filter mask keeps the response order without sorting. The routers
+fall back to PostgreSQL for anything the store does not cover (other
+states, geometry modes other than simplified, `within=`).
+"""
+import csv
+import fcntl
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import shapely
+from sqlalchemy import text
+
+from app.artifacts import latest_run_id, store_path
+from app.config import settings
+from app.features import feature_sql
+
+log = logging.getLogger(__name__)
+
+TIER_CODES = {"priority": 1, "target": 2, "watchlist": 3, "low": 4}   # 0 = unscored
+NO_DISTRICT = -1
+
+
+class PrecinctSnapshot:
+    """Read-only, memory-mapped view of one state's precincts for one run."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.meta = json.loads((path / "meta.json").read_text())
+        self.run_id: int = self.meta["run_id"]
+
+        def column(name: str) -> np.ndarray:
+            return np.load(path / f"{name}.npy", mmap_mode="r")
+
+        self.cd_number = column("cd_number")
+        self.youth_share = column("youth_share")
+        self.dem_margin = column("dem_margin")
+        self.score = column("score")
+        self.tier = column("tier")
+        self.bbox = column("bbox")
+        self.feature_offsets = column("features_offsets")
+        self.csv_offsets = column("csv_offsets")
+        self.features = np.memmap(path / "features.bin", dtype=np.uint8, mode="r") if self.feature_offsets[-1] else b""
+        self.csv = np.memmap(path / "csv.bin", dtype=np.uint8, mode="r") if self.csv_offsets[-1] else b""
+
+        has_bbox = ~np.isnan(self.bbox[:, 0])
+        self._bbox_index = np.flatnonzero(has_bbox)
+        self._tree = shapely.STRtree(shapely.box(*np.asarray(self.bbox[has_bbox]).T))
+
+    def __len__(self) -> int:
+        return len(self.score)
+
+    def select(
+        self,
+        youth_min: float,
+        margin_floor: float,
+        district: Optional[int] = None,
+        tier: Optional[str] = None,
+        bbox: Optional[tuple[float, float, float, float]] = None,
+        scored_only: bool = False,
+    ) -> np.ndarray:
+        """Row indices matching the filters, in score order (NaN comparisons are False, like SQL NULL)."""
+        mask = (self.youth_share >= youth_min) & (self.dem_margin >= margin_floor)
+        if scored_only:
+            mask &= ~np.isnan(self.score)
+        if district is not None:
+            mask &= self.cd_number == district
+        if tier is not None:
+            mask &= self.tier == TIER_CODES.get(tier, -1)
+        if bbox is not None:
+            hits = np.zeros(len(self), dtype=bool)
+            hits[self._bbox_index[self._tree.query(shapely.box(*bbox))]] = True
+            mask &= hits
+        return np.flatnonzero(mask)
+
+    def _slices(self, blob, offsets: np.ndarray, idx: np.ndarray) -> Iterator[bytes]:
+        for start, end in zip(offsets[idx], offsets[idx + 1]):
+            yield bytes(blob[start:end])
+
+    def feature_collection(self, idx: np.ndarray) -> bytes:
+        return b'{"type": "FeatureCollection", "features": [' + b", ".join(
+            self._slices(self.features, self.feature_offsets, idx)
+        ) + b"]}"
+
+    def csv_lines(self, idx: np.ndarray) -> Iterator[bytes]:
+        return self._slices(self.csv, self.csv_offsets, idx)
+
+    def district_stats(self) -> list[dict]:
+        """Same aggregates as the districts SQL (AVG ignores NULLs)."""
+        cd = np.asarray(self.cd_number)
+        stats = []
+        for number in np.unique(cd[cd != NO_DISTRICT]):
+            rows = cd == number
+            youth, margin = self.youth_share[rows], self.dem_margin[rows]
+            tiers = self.tier[rows]
+            stats.append({
+                "cd_number": int(number),
+                "precinct_count": int(rows.sum()),
+                "avg_youth_share": float(np.nanmean(youth)) if (~np.isnan(youth)).any() else None,
+                "avg_dem_margin": float(np.nanmean(margin)) if (~np.isnan(margin)).any() else None,
+                "priority_count": int((tiers == TIER_CODES["priority"]).sum()),
+                "target_count": int((tiers == TIER_CODES["target"]).sum()),
+            })
+        return stats
+
+
+def _float(value) -> float:
+    return float("nan") if value is None else float(value)
+
+
+def build_snapshot(db, state: str, run_id: int, dest: Path) -> None:
+    """Write a snapshot of one state's precincts to dest (atomically, via a temp dir)."""
+    # The export router owns the CSV columns; import late to avoid a cycle
+    from app.routers.export import EXPORT_COLUMNS
+
+    export_cols = ", ".join(f"p.{c}" for c in EXPORT_COLUMNS)
+    rows = db.execute(text(f"""
+        SELECT
+            p.cd_number, p.youth_share, p.dem_margin, p.score, p.tier,
+            ST_XMin(p.geom), ST_YMin(p.geom), ST_XMax(p.geom), ST_YMax(p.geom),
+            {feature_sql("simplified")}::text,
+            {export_cols}
+        FROM precincts p
+        WHERE p.state_fips = :state
+        ORDER BY p.score DESC NULLS LAST, p.precinct_id
+    """), {"state": state}).all()
+
+    n = len(rows)
+    cd_number = np.full(n, NO_DISTRICT, dtype=np.int16)
+    youth_share, dem_margin, score = (np.empty(n) for _ in range(3))
+    tier = np.zeros(n, dtype=np.uint8)
+    bbox = np.empty((n, 4))
+    features, feature_offsets = io.BytesIO(), np.zeros(n + 1, dtype=np.int64)
+    lines, csv_offsets = io.BytesIO(), np.zeros(n + 1, dtype=np.int64)
+    line = io.StringIO()
+    writer = csv.writer(line)
+
+    for i, row in enumerate(rows):
+        if row[0] is not None:
+            cd_number[i] = row[0]
+        youth_share[i], dem_margin[i], score[i] = _float(row[1]), _float(row[2]), _float(row[3])
+        tier[i] = TIER_CODES.get(row[4], 0)
+        bbox[i] = [_float(v) for v in row[5:9]]
+        feature_offsets[i + 1] = feature_offsets[i] + features.write(row[9].encode())
+        line.seek(0)
+        line.truncate(0)
+        writer.writerow(row[10:])
+        csv_offsets[i + 1] = csv_offsets[i] + lines.write(line.getvalue().encode())
+
+    tmp = dest.with_name(dest.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, array in {
+        "cd_number": cd_number, "youth_share": youth_share, "dem_margin": dem_margin,
+        "score": score, "tier": tier, "bbox": bbox,
+        "features_offsets": feature_offsets, "csv_offsets": csv_offsets,
+    }.items():
+        np.save(tmp / f"{name}.npy", array)
+    (tmp / "features.bin").write_bytes(features.getvalue())
+    (tmp / "csv.bin").write_bytes(lines.getvalue())
+    (tmp / "meta.json").write_text(json.dumps({"state": state, "run_id": run_id, "count": n}))
+    os.replace(tmp, dest)
+
+
+class PrecinctStore:
+    """Current snapshot per state, refreshed when a new run succeeds."""
+
+    def __init__(self, states: list[str], refresh_seconds: float):
+        self.states = states
+        self.refresh_seconds = refresh_seconds
+        self._snapshots: dict[str, PrecinctSnapshot] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self, state: str) -> Optional[PrecinctSnapshot]:
+        return self._snapshots.get(state)
+
+    def _load(self, db, state: str, run_id: int) -> PrecinctSnapshot:
+        dest = store_path(state, run_id)
+        if not (dest / "meta.json").exists():
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            # One worker builds; the rest block on the lock, then find it built
+            with open(dest.parent / f"{dest.name}.lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if not (dest / "meta.json").exists():
+                    log.info("Building precinct store for state %s, run %d...", state, run_id)
+                    build_snapshot(db, state, run_id, dest)
+                    # Older runs' files can go: workers still mapping them keep
+                    # their pages until they switch over
+                    for old in dest.parent.glob(f"{state}_*"):
+                        if old.is_dir() and old != dest:
+                            shutil.rmtree(old, ignore_errors=True)
+        return PrecinctSnapshot(dest)
+
+    def refresh(self) -> None:
+        from app.database import SessionLocal
+
+        with SessionLocal() as db:
+            for state in self.states:
+                run_id = latest_run_id(db, state)
+                current = self._snapshots.get(state)
+                if run_id is None or (current is not None and current.run_id == run_id):
+                    continue
+                try:
+                    self._snapshots[state] = self._load(db, state, run_id)
+                    log.info("Precinct store: state %s at run %d (%d precincts)",
+                             state, run_id, len(self._snapshots[state]))
+                except Exception:
+                    log.exception("Could not load precinct store for state %s, run %d", state, run_id)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                log.exception("Precinct store refresh failed")
+            self._stop.wait(self.refresh_seconds)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="precinct-store", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+store = PrecinctStore(settings.precinct_store_states_list, settings.precinct_store_refresh_seconds)
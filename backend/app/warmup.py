@@ -0,0 +1,71 @@
+"""
+Per-worker warm-up run from the app lifespan.
+
+A cold gunicorn worker pays for TCP/TLS + auth on every pooled connection,
+for PREPARE of the hot statements on each of them and for PostgreSQL
+buffer-cache misses on the precinct aggregation. Warm-up opens the whole pool
+(primary and read replicas), prepares the fixed district, detail and ranking
+statements on every connection, runs the hot queries once and leaves the
+default-filter responses in the response cache, so the first real user hits a
+warm worker.
+"""
+import logging
+import time
+
+from app.config import settings
+from app.database import SessionLocal, engine, replicas
+from app.routers.districts import DISTRICTS_QUERY, render_districts
+from app.routers.precincts import (
+    DETAIL_CENSUS_QUERY, DETAIL_ELECTIONS_QUERY, DETAIL_FEATURE_QUERY, DETAIL_NEIGHBORS_QUERY, render_precincts,
+)
+from app.routers.rankings import PRECINCT_RANKS_QUERY, TOP_QUERIES
+
+log = logging.getLogger(__name__)
+
+
+# Fixed statements prepared on every pooled connection (the list query is
+# built per filter combination and cannot be)
+HOT_QUERIES = [
+    DISTRICTS_QUERY,
+    DETAIL_FEATURE_QUERY, DETAIL_NEIGHBORS_QUERY, DETAIL_CENSUS_QUERY, DETAIL_ELECTIONS_QUERY,
+    PRECINCT_RANKS_QUERY, *TOP_QUERIES.values(),
+]
+
+
+def open_pool() -> int:
+    """
+    Check out pool_size connections of the primary and of each replica at
+    once, so each is established and has the hot statements prepared up front.
+    """
+    conns = [
+        eng.connect()
+        for eng in [engine, *(r.engine for r in replicas.replicas)]
+        for _ in range(eng.pool.size())
+    ]
+    try:
+        for conn in conns:
+            for query in HOT_QUERIES:
+                query.prepare(conn)
+            conn.commit()
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
+
+
+def prime_responses() -> None:
+    """Render the responses the map requests on first load into the cache."""
+    with SessionLocal() as db:
+        render_precincts(db, settings.default_state)
+        render_districts(db, settings.default_state)
+
+
+def warm_up() -> float:
+    """Run all warm-up steps; returns elapsed seconds."""
+    start = time.perf_counter()
+    opened = open_pool()
+    log.info("Warm-up: opened %d pooled connections (%.2fs)", opened, time.perf_counter() - start)
+    prime_responses()
+    elapsed = time.perf_counter() - start
+    log.info("Warm-up complete in %.2fs", elapsed)
+    return elapsed
@@ -0,0 +1,227 @@
+"""
+Generate a synthetic, California-shaped input dataset for the pipeline.
+
+Writes the same files the pipeline reads from RAW_DIR (see scripts/config.py),
+with realistic shapes and volumes at scale 1:
+    nhgis/  ~700k-row NHGIS-format block CSV (P12 / U7S age columns)
+    rdh/    RDH-format precinct election CSV (~3% unmatched, ~7% only
+            matchable via the COUNTYFP + PRECINCT fallback key)
+    baf/    block → congressional district assignment file
+    vtd/    ~25k VTD polygons (jittered grid, shared edges) as a shapefile
+    cd/     52 congressional district polygons as a shapefile
+
+--scale multiplies the number of VTDs and blocks (1, 5, 50, ...).
+
+Usage:
+    python bench/generate_synthetic.py --out bench/data/scale1 [--scale 1] [--seed 42]
+"""
+
+import argparse
+import logging
+import math
+import os
+import sys
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+import config as cfg
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+log = logging.getLogger(__name__)
+
+STATE_FIPS = "06"
+BBOX = (-124.4, 32.5, -114.1, 42.0)   # CA extent (lon/lat)
+VTDS_PER_SCALE = 25_000
+BLOCKS_PER_VTD = 28                    # ~700k blocks at scale 1
+N_COUNTIES = 58
+CD_GRID = (4, 13)                      # columns × rows of district rectangles
+UNASSIGNED_BLOCK_RATE = 0.02
+RDH_UNMATCHED_RATE = 0.03
+RDH_FALLBACK_KEY_RATE = 0.07
+
+AGE_VARS = cfg.MALE_18_29_VARS + cfg.FEMALE_18_29_VARS
+
+
+def raw_path(cfg_path: str, out_dir: Path) -> Path:
+    """Map a cfg.* input path onto the output directory, keeping its layout."""
+    path = out_dir / os.path.relpath(cfg_path, cfg.RAW_DIR)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def build_vtds(n_vtds: int, rng: np.random.Generator) -> gpd.GeoDataFrame:
+    """Jittered-grid VTD polygons; neighbouring cells share their vertices."""
+    minx, miny, maxx, maxy = BBOX
+    aspect = (maxx - minx) / (maxy - miny)
+    nx = max(1, round(math.sqrt(n_vtds * aspect)))
+    ny = max(1, math.ceil(n_vtds / nx))
+    dx, dy = (maxx - minx) / nx, (maxy - miny) / ny
+
+    # Node grid with interior jitter so cells are irregular quads
+    gx, gy = np.meshgrid(np.linspace(minx, maxx, nx + 1), np.linspace(miny, maxy, ny + 1))
+    jitter = np.zeros_like(gx), np.zeros_like(gy)
+    jitter[0][1:-1, 1:-1] = rng.uniform(-0.3, 0.3, (ny - 1, nx - 1)) * dx
+    jitter[1][1:-1, 1:-1] = rng.uniform(-0.3, 0.3, (ny - 1, nx - 1)) * dy
+    gx, gy = gx + jitter[0], gy + jitter[1]
+
+    iy, ix = np.divmod(np.arange(nx * ny), nx)
+    ring = np.stack([
+        np.stack([gx[iy, ix], gy[iy, ix]], axis=-1),
+        np.stack([gx[iy, ix + 1], gy[iy, ix + 1]], axis=-1),
+        np.stack([gx[iy + 1, ix + 1], gy[iy + 1, ix + 1]], axis=-1),
+        np.stack([gx[iy + 1, ix], gy[iy + 1, ix]], axis=-1),
+        np.stack([gx[iy, ix], gy[iy, ix]], axis=-1),
+    ], axis=1)
+    polygons = shapely.polygons(ring)
+
+    # Counties: an 8×8 tiling of the state, folded onto 58 odd FIPS codes
+    county_idx = np.minimum((iy * 8 // ny) * 8 + (ix * 8 // nx), N_COUNTIES - 1)
+    county_fp = np.array([f"{2 * i + 1:03d}" for i in range(N_COUNTIES)])[county_idx]
+
+    vtd = gpd.GeoDataFrame({"COUNTYFP20": county_fp, "county_idx": county_idx}, geometry=polygons, crs="EPSG:4326")
+    vtd["local_idx"] = vtd.groupby("COUNTYFP20").cumcount()
+    vtd["VTDI20"] = vtd["local_idx"].map(lambda k: f"{k:06d}")
+    vtd["STATEFP20"] = STATE_FIPS
+    vtd["GEOID20"] = STATE_FIPS + vtd["COUNTYFP20"] + vtd["VTDI20"]
+    vtd["NAMELSAD20"] = "Voting District " + vtd["VTDI20"]
+
+    # Congressional district by cell centre, on a CD_GRID tiling of the bbox
+    cx = (ix + 0.5) / nx
+    cy = (iy + 0.5) / ny
+    vtd["cd_number"] = (np.floor(cy * CD_GRID[1]) * CD_GRID[0] + np.floor(cx * CD_GRID[0])).astype(int) + 1
+
+    # Per-VTD demographic and partisan profile
+    vtd["pop"] = np.maximum(0, rng.lognormal(mean=7.2, sigma=0.6, size=len(vtd))).astype(int)
+    vtd["youth_share"] = rng.beta(2.2, 9.0, size=len(vtd))
+    vtd["dem_lean"] = np.clip(rng.normal(0.22, 0.28, size=len(vtd)), -0.9, 0.95)
+    return vtd.iloc[:n_vtds].copy()
+
+
+def build_cd_polygons() -> gpd.GeoDataFrame:
+    minx, miny, maxx, maxy = BBOX
+    cols, rows = CD_GRID
+    w, h = (maxx - minx) / cols, (maxy - miny) / rows
+    records = []
+    for r in range(rows):
+        for c in range(cols):
+            records.append({
+                "CD118FP": f"{r * cols + c + 1:02d}",
+                "geometry": shapely.box(minx + c * w, miny + r * h, minx + (c + 1) * w, miny + (r + 1) * h),
+            })
+    return gpd.GeoDataFrame(records, crs="EPSG:4326")
+
+
+def build_blocks(vtd: gpd.GeoDataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """NHGIS-format block rows whose populations sum to each VTD's profile."""
+    n_blocks = np.maximum(1, rng.poisson(BLOCKS_PER_VTD, size=len(vtd)))
+    owner = np.repeat(np.arange(len(vtd)), n_blocks)
+    block_no = np.arange(len(owner)) - np.repeat(np.cumsum(n_blocks) - n_blocks, n_blocks)
+
+    # Split each VTD's population across its blocks (some blocks are empty)
+    weights = rng.gamma(0.8, size=len(owner))
+    weights[rng.random(len(owner)) < 0.15] = 0
+    vtd_weight = np.bincount(owner, weights, minlength=len(vtd))
+    share = np.divide(weights, vtd_weight[owner], out=np.zeros_like(weights), where=vtd_weight[owner] > 0)
+    total = np.round(share * vtd["pop"].to_numpy()[owner]).astype(np.int64)
+
+    youth = rng.binomial(total, vtd["youth_share"].to_numpy()[owner])
+    age_split = rng.multinomial(youth, np.full(len(AGE_VARS), 1 / len(AGE_VARS)))
+
+    local_idx = pd.Series(vtd["local_idx"].to_numpy()[owner])
+    county_fp = pd.Series(vtd["COUNTYFP20"].to_numpy()[owner])
+    vtdi = pd.Series(vtd["VTDI20"].to_numpy()[owner])
+    vtdi[rng.random(len(owner)) < UNASSIGNED_BLOCK_RATE] = ""
+
+    tract = (local_idx // 4).astype(str).str.zfill(6)
+    block = ((local_idx % 4) * 1000 + block_no).astype(str).str.zfill(4)
+
+    blocks = pd.DataFrame({
+        "GISJOIN": "G" + STATE_FIPS + "0" + county_fp + "0" + tract + block,
+        "YEAR": "2020",
+        "STUSAB": "CA",
+        "STATE": "California",
+        "STATEA": STATE_FIPS,
+        "COUNTY": "Synthetic County " + county_fp,
+        "COUNTYA": county_fp,
+        "TRACTA": tract,
+        "BLOCKA": block,
+        "VTDI": vtdi,
+        cfg.TOTAL_POP_VAR: total,
+    })
+    for i, col in enumerate(AGE_VARS):
+        blocks[col] = age_split[:, i]
+
+    blocks["block_geoid"] = STATE_FIPS + blocks["COUNTYA"] + blocks["TRACTA"] + blocks["BLOCKA"]
+    blocks["cd_number"] = vtd["cd_number"].to_numpy()[owner]
+    return blocks
+
+
+def build_rdh(vtd: gpd.GeoDataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """RDH-format precinct results; a few rows need the fallback key or never match."""
+    draw = rng.random(len(vtd))
+    keep = draw >= RDH_UNMATCHED_RATE
+    fallback = draw < RDH_UNMATCHED_RATE + RDH_FALLBACK_KEY_RATE
+
+    turnout = rng.uniform(0.3, 0.6, size=len(vtd))
+    total = np.round(vtd["pop"].to_numpy() * turnout).astype(int)
+    dem_share = (1 + vtd["dem_lean"].to_numpy()) / 2 * 0.97
+    dem = rng.binomial(total, dem_share)
+    rep = np.minimum(total - dem, rng.binomial(total, np.clip(1 - dem_share - 0.03, 0, 1)))
+
+    unique_id = np.where(fallback, "CA-" + vtd["COUNTYFP20"] + "-" + vtd["VTDI20"], vtd["GEOID20"])
+    rdh = pd.DataFrame({
+        "UNIQUE_ID": unique_id,
+        "COUNTYFP": STATE_FIPS + vtd["COUNTYFP20"],
+        "COUNTY": "Synthetic County " + vtd["COUNTYFP20"],
+        "PRECINCT": vtd["VTDI20"],
+        cfg.RDH_DEM_COL: dem,
+        cfg.RDH_REP_COL: rep,
+        "G24PREOOTH": total - dem - rep,
+        cfg.RDH_TOTAL_COL: total,
+    })
+    return rdh[keep].reset_index(drop=True)
+
+
+def generate(out_dir: Path, scale: float, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    n_vtds = int(VTDS_PER_SCALE * scale)
+
+    log.info("Building %d VTD polygons...", n_vtds)
+    vtd = build_vtds(n_vtds, rng)
+    vtd[["STATEFP20", "COUNTYFP20", "VTDI20", "GEOID20", "NAMELSAD20", "geometry"]].to_file(
+        raw_path(cfg.VTD_SHAPEFILE, out_dir)
+    )
+    build_cd_polygons().to_file(raw_path(cfg.CD_SHAPEFILE, out_dir))
+
+    log.info("Building block rows...")
+    blocks = build_blocks(vtd, rng)
+    blocks.drop(columns=["block_geoid", "cd_number"]).to_csv(raw_path(cfg.NHGIS_BLOCK_CSV, out_dir), index=False)
+    blocks[["block_geoid", "cd_number"]].to_csv(
+        raw_path(cfg.BAF_CD_TXT, out_dir), sep="|", index=False, header=["BLOCKID", "DISTRICT"]
+    )
+
+    log.info("Building RDH election rows...")
+    rdh = build_rdh(vtd, rng)
+    rdh.to_csv(raw_path(cfg.RDH_PRECINCT_CSV, out_dir), index=False)
+
+    summary = {"scale": scale, "seed": seed, "vtds": len(vtd), "blocks": len(blocks), "rdh_rows": len(rdh)}
+    log.info("Synthetic dataset written to %s: %s", out_dir, summary)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, required=True, help="directory to use as RAW_DIR")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    generate(args.out, args.scale, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Local stand-in for the Census Data API, serving the synthetic dataset.
+
+Answers the two calls scripts/census_api.py makes, computed from the
+synthetic NHGIS block CSV so both CENSUS_SOURCE modes load the same numbers:
+
+    ?get=NAME&for=county:*&in=state:06
+    ?get=P12_...&for=voting district:*&in=state:06 county:037
+
+--error-rate makes that fraction of requests answer 429 with Retry-After: 1,
+to exercise the client's retries.
+
+Usage (from backend/):
+    python bench/mock_census_api.py --data-dir bench/data/scale1 [--port 8765] [--error-rate 0.1]
+    CENSUS_SOURCE=api CENSUS_API_URL=http://127.0.0.1:8765/data RAW_DIR=bench/data/scale1 \\
+        python scripts/01_fetch_census.py
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+import config as cfg
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+log = logging.getLogger(__name__)
+
+
+def load_vtds(data_dir: Path) -> pd.DataFrame:
+    """VTD-level P12 sums, keyed by county, from the synthetic block CSV."""
+    csv = data_dir / Path(cfg.NHGIS_BLOCK_CSV).relative_to(cfg.RAW_DIR)
+    blocks = pd.read_csv(csv, dtype=str)
+    blocks = blocks[blocks["VTDI"].notna()]
+    cols = list(cfg.CENSUS_API_VARS)
+    blocks[cols] = blocks[cols].apply(pd.to_numeric, errors="coerce").fillna(0).astype(int)
+    vtds = blocks.groupby(["STATEA", "COUNTYA", "COUNTY", "VTDI"], as_index=False)[cols].sum()
+    return vtds.rename(columns=cfg.CENSUS_API_VARS)
+
+
+def make_handler(vtds: pd.DataFrame, error_rate: float):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body, headers: dict = None) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if random.random() < error_rate:
+                return self._send(429, {"error": "rate limited"}, {"Retry-After": "1"})
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            scope = dict(part.split(":", 1) for part in query.get("in", "").split())
+            state = scope.get("state")
+            get = query.get("get", "").split(",")
+
+            if query.get("for") == "county:*":
+                rows = vtds[vtds["STATEA"] == state].drop_duplicates("COUNTYA")
+                return self._send(200, [["NAME", "state", "county"]] + [
+                    [f"{r.COUNTY}, Synthetic State", r.STATEA, r.COUNTYA] for r in rows.itertuples()
+                ])
+            if query.get("for") == "voting district:*":
+                rows = vtds[(vtds["STATEA"] == state) & (vtds["COUNTYA"] == scope.get("county"))]
+                unknown = [v for v in get if v not in rows.columns]
+                if unknown:
+                    return self._send(400, {"error": f"unknown variables: {unknown}"})
+                body = rows[get + ["STATEA", "COUNTYA", "VTDI"]].astype(str).values.tolist()
+                return self._send(200, [get + ["state", "county", "voting district"]] + body)
+            return self._send(400, {"error": "unsupported geography"})
+
+        def log_message(self, fmt, *args):
+            log.debug(fmt, *args)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", type=Path, required=True, help="synthetic dataset (generate_synthetic.py --out)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    vtds = load_vtds(args.data_dir)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(vtds, args.error_rate))
+    log.info("Mock Census API for %d VTDs on http://127.0.0.1:%d/data", len(vtds), args.port)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+#!/bin/bash
+# Runs once when the primary in docker-compose.replica.yml initialises.
+set -e
+psql -v ON_ERROR_STOP=1 -U "$POSTGRES_USER" -d "$POSTGRES_DB" \
+    -c "CREATE ROLE replicator WITH REPLICATION LOGIN PASSWORD 'replicator'"
+echo "host replication replicator all scram-sha-256" >> "$PGDATA/pg_hba.conf"
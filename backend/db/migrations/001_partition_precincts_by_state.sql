@@ -0,0 +1,75 @@
+-- Converts a single-state (California) database created from the original
+-- schema.sql to the state-partitioned layout. Run once:
+--   psql $DATABASE_URL -f backend/db/migrations/001_partition_precincts_by_state.sql
+
+BEGIN;
+
+ALTER TABLE election_results ADD COLUMN IF NOT EXISTS state_fips CHAR(2);
+UPDATE election_results SET state_fips = '06' WHERE state_fips IS NULL;
+ALTER TABLE election_results ALTER COLUMN state_fips SET NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_er_state_contest ON election_results (state_fips, contest_name);
+
+ALTER TABLE pipeline_runs ADD COLUMN IF NOT EXISTS state_fips CHAR(2);
+UPDATE pipeline_runs SET state_fips = '06' WHERE state_fips IS NULL;
+
+-- Move the old table aside and keep its sequence for stable feature ids
+ALTER TABLE precincts RENAME TO precincts_unpartitioned;
+ALTER INDEX idx_precincts_geom             RENAME TO idx_precincts_geom_old;
+ALTER INDEX idx_precincts_geom_simplified  RENAME TO idx_precincts_geom_simplified_old;
+ALTER INDEX idx_precincts_cd_number        RENAME TO idx_precincts_cd_number_old;
+ALTER INDEX idx_precincts_tier             RENAME TO idx_precincts_tier_old;
+ALTER INDEX idx_precincts_score            RENAME TO idx_precincts_score_old;
+ALTER INDEX idx_precincts_youth_share      RENAME TO idx_precincts_youth_share_old;
+ALTER INDEX idx_precincts_dem_margin       RENAME TO idx_precincts_dem_margin_old;
+
+CREATE TABLE precincts (
+    id               INTEGER      NOT NULL DEFAULT nextval('precincts_id_seq'),
+    state_fips       CHAR(2)      NOT NULL,
+    precinct_id      VARCHAR(50)  NOT NULL,
+    county_name      VARCHAR(50)  NOT NULL,
+    cd_number        INTEGER,
+    geom             GEOMETRY(MultiPolygon, 4326),
+    geom_simplified  GEOMETRY(MultiPolygon, 4326),
+    total_pop        INTEGER,
+    pop_18_29        INTEGER,
+    youth_share      DOUBLE PRECISION,
+    dem_votes        INTEGER,
+    rep_votes        INTEGER,
+    total_votes      INTEGER,
+    dem_pct          DOUBLE PRECISION,
+    dem_margin       DOUBLE PRECISION,
+    score            DOUBLE PRECISION,
+    tier             VARCHAR(20),
+    pipeline_run_id  INTEGER REFERENCES pipeline_runs(id) ON DELETE SET NULL,
+    PRIMARY KEY (state_fips, id),
+    UNIQUE (state_fips, precinct_id)
+) PARTITION BY LIST (state_fips);
+
+ALTER SEQUENCE precincts_id_seq OWNED BY precincts.id;
+
+CREATE INDEX idx_precincts_geom             ON precincts USING GIST (geom);
+CREATE INDEX idx_precincts_geom_simplified  ON precincts USING GIST (geom_simplified);
+CREATE INDEX idx_precincts_cd_number        ON precincts (cd_number);
+CREATE INDEX idx_precincts_tier             ON precincts (tier);
+CREATE INDEX idx_precincts_score            ON precincts (score DESC NULLS LAST);
+CREATE INDEX idx_precincts_youth_share      ON precincts (youth_share);
+CREATE INDEX idx_precincts_dem_margin       ON precincts (dem_margin);
+
+CREATE TABLE precincts_06 PARTITION OF precincts FOR VALUES IN ('06');
+
+INSERT INTO precincts (
+    id, state_fips, precinct_id, county_name, cd_number, geom, geom_simplified,
+    total_pop, pop_18_29, youth_share, dem_votes, rep_votes, total_votes,
+    dem_pct, dem_margin, score, tier, pipeline_run_id
+)
+SELECT
+    id, '06', precinct_id, county_name, cd_number, geom, geom_simplified,
+    total_pop, pop_18_29, youth_share, dem_votes, rep_votes, total_votes,
+    dem_pct, dem_margin, score, tier, pipeline_run_id
+FROM precincts_unpartitioned;
+
+DROP TABLE precincts_unpartitioned;
+
+COMMIT;
+
+VACUUM ANALYZE precincts;
@@ -0,0 +1,12 @@
+-- Adds precincts.county_fips (state+county FIPS), the shard key for the
+-- per-county pipeline stages (scripts/sharding.py). Run once:
+--   psql $DATABASE_URL -f backend/db/migrations/002_precinct_county_fips.sql
+
+BEGIN;
+
+ALTER TABLE precincts ADD COLUMN IF NOT EXISTS county_fips CHAR(5);
+UPDATE precincts SET county_fips = left(precinct_id, 5) WHERE county_fips IS NULL;
+ALTER TABLE precincts ALTER COLUMN county_fips SET NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_precincts_county_fips ON precincts (county_fips);
+
+COMMIT;
@@ -0,0 +1,22 @@
+-- Adds the precomputed score ranks / percentiles behind /api/rankings
+-- (filled by scripts/05_merge_score.py on the next run). Run once:
+--   psql $DATABASE_URL -f backend/db/migrations/003_precinct_ranks.sql
+
+BEGIN;
+
+ALTER TABLE precincts
+    ADD COLUMN IF NOT EXISTS state_rank          INTEGER,
+    ADD COLUMN IF NOT EXISTS state_percentile    DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS district_rank       INTEGER,
+    ADD COLUMN IF NOT EXISTS district_percentile DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS county_rank         INTEGER,
+    ADD COLUMN IF NOT EXISTS county_percentile   DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS tier_rank           INTEGER,
+    ADD COLUMN IF NOT EXISTS tier_percentile     DOUBLE PRECISION;
+
+CREATE INDEX IF NOT EXISTS idx_precincts_state_rank    ON precincts (state_rank);
+CREATE INDEX IF NOT EXISTS idx_precincts_district_rank ON precincts (cd_number, district_rank);
+CREATE INDEX IF NOT EXISTS idx_precincts_county_rank   ON precincts (county_fips, county_rank);
+CREATE INDEX IF NOT EXISTS idx_precincts_tier_rank     ON precincts (tier, tier_rank);
+
+COMMIT;
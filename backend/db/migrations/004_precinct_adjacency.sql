@@ -0,0 +1,16 @@
+-- Adds the precinct contiguity graph behind /api/turfs (filled by
+-- scripts/05c_adjacency.py on the next run). Run once:
+--   psql $DATABASE_URL -f backend/db/migrations/004_precinct_adjacency.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS precinct_adjacency (
+    state_fips       CHAR(2)      NOT NULL,
+    precinct_id      VARCHAR(50)  NOT NULL,
+    neighbor_id      VARCHAR(50)  NOT NULL,
+    shared_m         DOUBLE PRECISION NOT NULL,
+    pipeline_run_id  INTEGER REFERENCES pipeline_runs(id) ON DELETE SET NULL,
+    PRIMARY KEY (state_fips, precinct_id, neighbor_id)
+);
+
+COMMIT;
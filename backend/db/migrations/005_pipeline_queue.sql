@@ -0,0 +1,14 @@
+-- Lets pipeline_runs act as the queue behind POST /api/pipeline/runs
+-- (claimed by scripts/pipeline_worker.py). Run once:
+--   psql $DATABASE_URL -f backend/db/migrations/005_pipeline_queue.sql
+
+BEGIN;
+
+ALTER TABLE pipeline_runs
+    ADD COLUMN IF NOT EXISTS queued_at      TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS worker_id      VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS planned_stages JSONB;
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_queued ON pipeline_runs (id) WHERE status = 'queued';
+
+COMMIT;
@@ -0,0 +1,20 @@
+-- Gives election_results a natural key so scripts/03_fetch_election.py can
+-- upsert instead of appending a copy of every result on each run. Drops the
+-- copies earlier runs left behind (keeping the newest), then adds the key.
+-- Run once:
+--   psql $DATABASE_URL -f backend/db/migrations/006_election_results_key.sql
+
+BEGIN;
+
+DELETE FROM election_results er
+USING election_results newer
+WHERE newer.state_fips = er.state_fips
+  AND newer.election_date = er.election_date
+  AND newer.contest_name = er.contest_name
+  AND newer.precinct_id = er.precinct_id
+  AND newer.id > er.id;
+
+ALTER TABLE election_results
+    ADD CONSTRAINT uq_election_results_key UNIQUE (state_fips, election_date, contest_name, precinct_id);
+
+COMMIT;
@@ -0,0 +1,18 @@
+-- Adds the pre-encoded GeoJSON fragments behind GET /api/precincts (filled
+-- by scripts/06_export.py on the next run; until then the list is encoded
+-- live). Run once, before 008:
+--   psql $DATABASE_URL -f backend/db/migrations/007_precinct_features.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS precinct_features (
+    state_fips       CHAR(2)      NOT NULL,
+    precinct_id      VARCHAR(50)  NOT NULL,
+    geometry_mode    VARCHAR(12)  NOT NULL,
+    coord_precision  SMALLINT     NOT NULL,
+    feature          TEXT         NOT NULL,
+    pipeline_run_id  INTEGER REFERENCES pipeline_runs(id) ON DELETE SET NULL,
+    PRIMARY KEY (state_fips, geometry_mode, coord_precision, precinct_id)
+);
+
+COMMIT;
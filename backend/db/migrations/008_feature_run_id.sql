@@ -0,0 +1,12 @@
+-- Records which pipeline run each pre-encoded list feature encodes, so
+-- GET /api/precincts falls back to live encoding for precincts a later run
+-- has re-scored before its 06_export rebuilt the fragments. Existing
+-- fragments stay unused until the next 06 run. Run once:
+--   psql $DATABASE_URL -f backend/db/migrations/008_feature_run_id.sql
+
+BEGIN;
+
+ALTER TABLE precinct_features
+    ADD COLUMN IF NOT EXISTS pipeline_run_id INTEGER REFERENCES pipeline_runs(id) ON DELETE SET NULL;
+
+COMMIT;
@@ -0,0 +1,26 @@
+-- Adds the low-zoom county / district / hexbin summaries behind
+-- /api/aggregates (rebuilt by scripts/05b_aggregates.py on the next run).
+-- Run once:
+--   psql $DATABASE_URL -f backend/db/migrations/009_precinct_aggregates.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS precinct_aggregates (
+    id               SERIAL PRIMARY KEY,
+    state_fips       CHAR(2)      NOT NULL,
+    level            VARCHAR(20)  NOT NULL,
+    key              VARCHAR(20)  NOT NULL,
+    precinct_count   INTEGER      NOT NULL,
+    total_pop        BIGINT,
+    pop_18_29        BIGINT,
+    youth_share      DOUBLE PRECISION,
+    dem_margin       DOUBLE PRECISION,
+    score            DOUBLE PRECISION,
+    priority_count   INTEGER      NOT NULL,
+    target_count     INTEGER      NOT NULL,
+    geom             GEOMETRY(MultiPolygon, 4326),
+    pipeline_run_id  INTEGER REFERENCES pipeline_runs(id) ON DELETE SET NULL,
+    UNIQUE (state_fips, level, key)
+);
+
+COMMIT;
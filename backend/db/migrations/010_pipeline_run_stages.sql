@@ -0,0 +1,26 @@
+-- Adds the per-stage performance record written by scripts/profiling.py and
+-- read by /api/pipeline/runs/{id} and its /events stream. Run once:
+--   psql $DATABASE_URL -f backend/db/migrations/010_pipeline_run_stages.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS pipeline_run_stages (
+    id               SERIAL PRIMARY KEY,
+    pipeline_run_id  INTEGER      NOT NULL REFERENCES pipeline_runs(id) ON DELETE CASCADE,
+    stage            VARCHAR(50)  NOT NULL,
+    status           VARCHAR(20)  NOT NULL,
+    wall_seconds     DOUBLE PRECISION,
+    cpu_seconds      DOUBLE PRECISION,
+    peak_rss_mb      DOUBLE PRECISION,
+    rows_in          BIGINT,
+    rows_out         BIGINT,
+    rows_per_second  DOUBLE PRECISION,
+    db_round_trips   INTEGER,
+    details          JSONB,
+    error_message    TEXT,
+    started_at       TIMESTAMPTZ  NOT NULL,
+    finished_at      TIMESTAMPTZ,
+    UNIQUE (pipeline_run_id, stage)
+);
+
+COMMIT;
@@ -26,6 +26,7 @@ CREATE INDEX IF NOT EXISTS idx_cbg_county_fips ON census_block_groups (county_fi
 -- ---------------------------------------------------------------------------
 CREATE TABLE IF NOT EXISTS election_results (
     id            SERIAL PRIMARY KEY,
+    state_fips    CHAR(2)     NOT NULL,
     election_date DATE        NOT NULL,
     county_name   VARCHAR(50) NOT NULL,
     precinct_id   VARCHAR(50) NOT NULL,
@@ -34,31 +35,71 @@ CREATE TABLE IF NOT EXISTS election_results (
     rep_votes     INTEGER NOT NULL DEFAULT 0,
     total_votes   INTEGER NOT NULL DEFAULT 0,
     dem_pct       DOUBLE PRECISION,
-    dem_margin    DOUBLE PRECISION  -- dem_pct - rep_pct (−1 to +1)
+    dem_margin    DOUBLE PRECISION,  -- dem_pct - rep_pct (−1 to +1)
+    CONSTRAINT uq_election_results_key UNIQUE (state_fips, election_date, contest_name, precinct_id)
 );
 
 CREATE INDEX IF NOT EXISTS idx_er_precinct_id    ON election_results (precinct_id);
+CREATE INDEX IF NOT EXISTS idx_er_state_contest  ON election_results (state_fips, contest_name);
 CREATE INDEX IF NOT EXISTS idx_er_county_contest ON election_results (county_name, contest_name);
 
 -- ---------------------------------------------------------------------------
--- pipeline_runs  (audit log)
+-- pipeline_runs  (audit log, and the queue of scripts/pipeline_worker.py)
+--
+-- POST /api/pipeline/runs inserts status=queued; a worker claims the oldest
+-- queued row with FOR UPDATE SKIP LOCKED and runs cfg.PIPELINE_STAGES.
 -- ---------------------------------------------------------------------------
 CREATE TABLE IF NOT EXISTS pipeline_runs (
     id               SERIAL PRIMARY KEY,
-    status           VARCHAR(20)  NOT NULL DEFAULT 'running',  -- running | success | failed
+    status           VARCHAR(20)  NOT NULL DEFAULT 'running',  -- queued | running | success | failed
+    state_fips       CHAR(2),                                   -- state loaded by this run
     config_snapshot  JSONB,
     precincts_scored INTEGER,
     error_message    TEXT,
+    queued_at        TIMESTAMPTZ,                               -- set for runs enqueued through the API
+    worker_id        VARCHAR(100),                              -- host:pid of the worker running it
+    planned_stages   JSONB,                                     -- stage names the worker will run, in order
     started_at       TIMESTAMPTZ  NOT NULL DEFAULT NOW(),
     finished_at      TIMESTAMPTZ
 );
 
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_queued ON pipeline_runs (id) WHERE status = 'queued';
+
+-- ---------------------------------------------------------------------------
+-- pipeline_run_stages  (per-stage performance record, see scripts/profiling.py)
+-- ---------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS pipeline_run_stages (
+    id               SERIAL PRIMARY KEY,
+    pipeline_run_id  INTEGER      NOT NULL REFERENCES pipeline_runs(id) ON DELETE CASCADE,
+    stage            VARCHAR(50)  NOT NULL,  -- script name, e.g. 01_fetch_census
+    status           VARCHAR(20)  NOT NULL,  -- running | success | failed
+    wall_seconds     DOUBLE PRECISION,
+    cpu_seconds      DOUBLE PRECISION,
+    peak_rss_mb      DOUBLE PRECISION,
+    rows_in          BIGINT,
+    rows_out         BIGINT,
+    rows_per_second  DOUBLE PRECISION,
+    db_round_trips   INTEGER,
+    details          JSONB,                  -- sub-step timings and stage-specific counters
+    error_message    TEXT,
+    started_at       TIMESTAMPTZ  NOT NULL,
+    finished_at      TIMESTAMPTZ,
+    UNIQUE (pipeline_run_id, stage)
+);
+
 -- ---------------------------------------------------------------------------
 -- precincts  (scored output — rebuilt each pipeline run)
+--
+-- List-partitioned by state FIPS: one partition per state (precincts_06, ...)
+-- so states load, swap and vacuum independently and API queries filtered on
+-- state_fips are pruned to a single partition. Indexes declared on the parent
+-- are created partition-locally. New states: scripts/partitions.py create <fips>
 -- ---------------------------------------------------------------------------
 CREATE TABLE IF NOT EXISTS precincts (
-    id               SERIAL PRIMARY KEY,
-    precinct_id      VARCHAR(50)  NOT NULL UNIQUE,
+    id               SERIAL,                      -- unique across states (shared sequence); map feature id
+    state_fips       CHAR(2)      NOT NULL,
+    precinct_id      VARCHAR(50)  NOT NULL,       -- VTD GEOID (starts with state_fips)
+    county_fips      CHAR(5)      NOT NULL,       -- state+county; pipeline shard key
     county_name      VARCHAR(50)  NOT NULL,
     cd_number        INTEGER,                     -- Congressional district 1–52
 
@@ -82,14 +123,95 @@ CREATE TABLE IF NOT EXISTS precincts (
     score            DOUBLE PRECISION,
     tier             VARCHAR(20),  -- priority | target | watchlist | low
 
+    -- Score ranks (1 = best, ties broken by precinct_id) and percentiles
+    -- (0–1, share of scored precincts in the group scoring lower); computed
+    -- by scripts/05_merge_score.py, NULL when unscored
+    state_rank          INTEGER,
+    state_percentile    DOUBLE PRECISION,
+    district_rank       INTEGER,
+    district_percentile DOUBLE PRECISION,
+    county_rank         INTEGER,
+    county_percentile   DOUBLE PRECISION,
+    tier_rank           INTEGER,
+    tier_percentile     DOUBLE PRECISION,
+
     -- Audit linkage
-    pipeline_run_id  INTEGER REFERENCES pipeline_runs(id) ON DELETE SET NULL
-);
+    pipeline_run_id  INTEGER REFERENCES pipeline_runs(id) ON DELETE SET NULL,
+
+    PRIMARY KEY (state_fips, id),
+    UNIQUE (state_fips, precinct_id)
+) PARTITION BY LIST (state_fips);
+
+CREATE TABLE IF NOT EXISTS precincts_06 PARTITION OF precincts FOR VALUES IN ('06');
 
 CREATE INDEX IF NOT EXISTS idx_precincts_geom             ON precincts USING GIST (geom);
 CREATE INDEX IF NOT EXISTS idx_precincts_geom_simplified  ON precincts USING GIST (geom_simplified);
+CREATE INDEX IF NOT EXISTS idx_precincts_county_fips      ON precincts (county_fips);
 CREATE INDEX IF NOT EXISTS idx_precincts_cd_number        ON precincts (cd_number);
 CREATE INDEX IF NOT EXISTS idx_precincts_tier             ON precincts (tier);
 CREATE INDEX IF NOT EXISTS idx_precincts_score            ON precincts (score DESC NULLS LAST);
 CREATE INDEX IF NOT EXISTS idx_precincts_youth_share      ON precincts (youth_share);
 CREATE INDEX IF NOT EXISTS idx_precincts_dem_margin       ON precincts (dem_margin);
+CREATE INDEX IF NOT EXISTS idx_precincts_state_rank       ON precincts (state_rank);
+CREATE INDEX IF NOT EXISTS idx_precincts_district_rank    ON precincts (cd_number, district_rank);
+CREATE INDEX IF NOT EXISTS idx_precincts_county_rank      ON precincts (county_fips, county_rank);
+CREATE INDEX IF NOT EXISTS idx_precincts_tier_rank        ON precincts (tier, tier_rank);
+
+-- ---------------------------------------------------------------------------
+-- precinct_aggregates  (low-zoom summaries, rebuilt by scripts/05b_aggregates.py)
+--
+-- One row per county, congressional district or hexbin cell of a state, with
+-- a dissolved + simplified polygon and population-weighted stats.
+-- level: county | district | hex_<size> (see AGGREGATE_HEX_SIZES_M)
+-- ---------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS precinct_aggregates (
+    id               SERIAL PRIMARY KEY,
+    state_fips       CHAR(2)      NOT NULL,
+    level            VARCHAR(20)  NOT NULL,
+    key              VARCHAR(20)  NOT NULL,  -- county FIPS, CD number or hex "i_j"
+    precinct_count   INTEGER      NOT NULL,
+    total_pop        BIGINT,
+    pop_18_29        BIGINT,
+    youth_share      DOUBLE PRECISION,       -- SUM(pop_18_29) / SUM(total_pop)
+    dem_margin       DOUBLE PRECISION,       -- vote-weighted
+    score            DOUBLE PRECISION,       -- population-weighted mean precinct score
+    priority_count   INTEGER      NOT NULL,
+    target_count     INTEGER      NOT NULL,
+    geom             GEOMETRY(MultiPolygon, 4326),
+    pipeline_run_id  INTEGER REFERENCES pipeline_runs(id) ON DELETE SET NULL,
+    UNIQUE (state_fips, level, key)
+);
+
+-- ---------------------------------------------------------------------------
+-- precinct_features  (pre-encoded GeoJSON, rebuilt by scripts/06_export.py)
+--
+-- One serialized Feature per precinct, list geometry mode and coordinate
+-- precision; GET /precincts concatenates them with string_agg. A fragment is
+-- only used while its pipeline_run_id matches the precinct's, so rows a
+-- later run has re-scored are encoded live until 06 rebuilds them.
+-- geometry_mode: simplified | centroid | bbox | none (see app/features.py)
+-- ---------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS precinct_features (
+    state_fips       CHAR(2)      NOT NULL,
+    precinct_id      VARCHAR(50)  NOT NULL,
+    geometry_mode    VARCHAR(12)  NOT NULL,
+    coord_precision  SMALLINT     NOT NULL,  -- coordinate decimal digits
+    feature          TEXT         NOT NULL,
+    pipeline_run_id  INTEGER REFERENCES pipeline_runs(id) ON DELETE SET NULL,
+    PRIMARY KEY (state_fips, geometry_mode, coord_precision, precinct_id)
+);
+
+-- ---------------------------------------------------------------------------
+-- precinct_adjacency  (rook contiguity graph, rebuilt by scripts/05c_adjacency.py)
+--
+-- One row per pair of precincts sharing a boundary segment, stored once
+-- (precinct_id < neighbor_id); /api/turfs loads it as an undirected graph.
+-- ---------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS precinct_adjacency (
+    state_fips       CHAR(2)      NOT NULL,
+    precinct_id      VARCHAR(50)  NOT NULL,
+    neighbor_id      VARCHAR(50)  NOT NULL,
+    shared_m         DOUBLE PRECISION NOT NULL,  -- length of the shared boundary, meters
+    pipeline_run_id  INTEGER REFERENCES pipeline_runs(id) ON DELETE SET NULL,
+    PRIMARY KEY (state_fips, precinct_id, neighbor_id)
+);
@@ -2,6 +2,8 @@
 Script 01 — Load NHGIS block-level P12 age data and aggregate to VTD level.
 
 Reads: data/raw/nhgis/nhgis0002_ds258_2020_block.csv
+       (or, with CENSUS_SOURCE=api, VTD-level P12 counts per county from the
+       Census Data API — see census_api.py)
 Writes: census_block_groups table (repurposed as VTD demographics)
 
 Each row in the output represents one VTD (precinct boundary), with
@@ -9,40 +11,50 @@ total_pop and pop_18_29 aggregated from all census blocks inside it.
 The NHGIS block CSV already contains VTD assignment (VTDI column),
 so no spatial join is needed.
 
+The CSV is read once; aggregation and upsert then run per county over a
+process pool, each county committed in its own transaction (see sharding.py).
+
 Usage:
-    DATABASE_URL=<url> python 01_fetch_census.py
+    DATABASE_URL=<url> [PIPELINE_RUN_ID=<id>] python 01_fetch_census.py [--county 037,059] [--workers N] [--profile]
 """
 
-import os
+import io
 import sys
 import logging
 from pathlib import Path
 
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 
 sys.path.insert(0, str(Path(__file__).parent))
 import config as cfg
+from census_api import CensusClient
+from profiling import current_stage, run_stage
+from sharding import parse_shard_options, run_sharded, select_counties, shard_engine
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 log = logging.getLogger(__name__)
 
-DATABASE_URL = os.environ["DATABASE_URL"]
+def add_population_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce the P12 columns (NHGIS codes) to numbers and derive total_pop / pop_18_29."""
+    age_cols = cfg.MALE_18_29_VARS + cfg.FEMALE_18_29_VARS + [cfg.TOTAL_POP_VAR]
+    for col in age_cols:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+
+    df["pop_18_29"] = df[cfg.MALE_18_29_VARS + cfg.FEMALE_18_29_VARS].sum(axis=1)
+    df["total_pop"] = df[cfg.TOTAL_POP_VAR]
+    return df
 
 
 def load_nhgis_blocks() -> pd.DataFrame:
     """Load NHGIS block CSV and compute youth population per block."""
     log.info("Loading NHGIS block CSV (~288 MB, may take a minute)...")
-    df = pd.read_csv(cfg.NHGIS_BLOCK_CSV, dtype=str, low_memory=False)
+    with current_stage().step("read_csv"):
+        df = pd.read_csv(cfg.NHGIS_BLOCK_CSV, dtype=str, low_memory=False)
     log.info("Loaded %d blocks", len(df))
+    current_stage().rows_in += len(df)
 
-    # Coerce age columns to numeric
-    age_cols = cfg.MALE_18_29_VARS + cfg.FEMALE_18_29_VARS + [cfg.TOTAL_POP_VAR]
-    for col in age_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-
-    df["pop_18_29"] = df[cfg.MALE_18_29_VARS + cfg.FEMALE_18_29_VARS].sum(axis=1)
-    df["total_pop"] = df[cfg.TOTAL_POP_VAR]
+    df = add_population_columns(df)
 
     # Build VTD composite key: state(2) + county(3) + vtdi
     df["STATEA"]  = df["STATEA"].str.strip().str.zfill(2)
@@ -51,13 +63,41 @@ def load_nhgis_blocks() -> pd.DataFrame:
 
     df["vtd_key"] = df["STATEA"] + df["COUNTYA"] + df["VTDI"]
 
-    # Drop blocks with no VTD assignment
-    df = df[df["VTDI"] != ""]
+    # Keep only this run's state (extracts may span several) and drop blocks
+    # with no VTD assignment
+    df = df[(df["STATEA"] == cfg.STATE_FIPS) & (df["VTDI"] != "")]
     log.info("%d blocks have VTD assignment", len(df))
 
     return df[["vtd_key", "STATEA", "COUNTYA", "VTDI", "COUNTY", "total_pop", "pop_18_29"]]
 
 
+def load_api_vtds(options) -> dict[str, pd.DataFrame]:
+    """
+    Fetch VTD-level P12 counts for the selected counties from the Census
+    Data API. Rows come back already at VTD level, in the same columns as
+    the NHGIS blocks, so aggregate_to_vtd treats them alike.
+    """
+    client = CensusClient()
+    stage = current_stage()
+    with stage.step("fetch_api"):
+        names = client.county_names(cfg.STATE_FIPS)
+        counties = select_counties(names, options)
+        frames = client.fetch_counties(counties)
+
+    by_county = {}
+    for county, df in frames.items():
+        df = add_population_columns(df)
+        df["COUNTY"] = names[county]
+        df["vtd_key"] = df["STATEA"] + df["COUNTYA"] + df["VTDI"]
+        by_county[county] = df[["vtd_key", "STATEA", "COUNTYA", "VTDI", "COUNTY", "total_pop", "pop_18_29"]]
+        stage.rows_in += len(df)
+
+    stage.details["census_api"] = {"requests": client.requests_made, "cache_hits": client.cache_hits}
+    log.info("Fetched %d VTDs in %d counties from the Census API (%d requests, %d cached).",
+             stage.rows_in, len(frames), client.requests_made, client.cache_hits)
+    return by_county
+
+
 def load_baf_cd() -> pd.DataFrame:
     """Load block-to-CD crosswalk from BAF file."""
     log.info("Loading BAF congressional district crosswalk...")
@@ -75,7 +115,6 @@ def load_baf_cd() -> pd.DataFrame:
 
 def aggregate_to_vtd(blocks: pd.DataFrame) -> pd.DataFrame:
     """Aggregate block-level data to VTD level."""
-    log.info("Aggregating blocks to VTD level...")
     vtd = blocks.groupby(["vtd_key", "STATEA", "COUNTYA", "VTDI", "COUNTY"]).agg(
         total_pop=("total_pop", "sum"),
         pop_18_29=("pop_18_29", "sum"),
@@ -85,44 +124,73 @@ def aggregate_to_vtd(blocks: pd.DataFrame) -> pd.DataFrame:
         vtd["pop_18_29"] / vtd["total_pop"].replace(0, float("nan"))
     ).round(4)
 
-    log.info("Aggregated to %d VTDs", len(vtd))
     return vtd
 
 
 def upsert_vtd_demographics(vtd: pd.DataFrame, engine) -> None:
-    """Upsert VTD demographics into census_block_groups table."""
-    log.info("Upserting %d VTD rows into database...", len(vtd))
+    """
+    Upsert VTD demographics into census_block_groups: COPY the county's rows
+    into a temp table, then one INSERT ... ON CONFLICT from it.
+    """
+    rows = pd.DataFrame({
+        "geoid":       vtd["vtd_key"],
+        "county_fips": vtd["STATEA"] + vtd["COUNTYA"],
+        "total_pop":   vtd["total_pop"].astype("int64"),
+        "pop_18_29":   vtd["pop_18_29"].astype("int64"),
+        "youth_share": vtd["youth_share"],
+    })
+    buf = io.StringIO()
+    rows.to_csv(buf, index=False, header=False)
+    buf.seek(0)
 
     with engine.begin() as conn:
-        for _, row in vtd.iterrows():
-            conn.execute(text("""
-                INSERT INTO census_block_groups
-                    (geoid, county_fips, total_pop, pop_18_29, youth_share, acs_vintage)
-                VALUES
-                    (:geoid, :county_fips, :total_pop, :pop_18_29, :youth_share, :vintage)
-                ON CONFLICT (geoid) DO UPDATE SET
-                    total_pop   = EXCLUDED.total_pop,
-                    pop_18_29   = EXCLUDED.pop_18_29,
-                    youth_share = EXCLUDED.youth_share
-            """), {
-                "geoid":       row["vtd_key"],
-                "county_fips": row["STATEA"] + row["COUNTYA"],
-                "total_pop":   int(row["total_pop"]),
-                "pop_18_29":   int(row["pop_18_29"]),
-                "youth_share": float(row["youth_share"]) if pd.notna(row["youth_share"]) else None,
-                "vintage":     2020,
-            })
-
-    log.info("Upsert complete.")
+        conn.exec_driver_sql("""
+            CREATE TEMP TABLE vtd_load (
+                geoid       VARCHAR(12),
+                county_fips VARCHAR(5),
+                total_pop   INTEGER,
+                pop_18_29   INTEGER,
+                youth_share DOUBLE PRECISION
+            ) ON COMMIT DROP
+        """)
+        with conn.connection.dbapi_connection.cursor() as cur:
+            cur.copy_expert("COPY vtd_load FROM STDIN WITH (FORMAT csv)", buf)
+        conn.execute(text("""
+            INSERT INTO census_block_groups
+                (geoid, county_fips, total_pop, pop_18_29, youth_share, acs_vintage)
+            SELECT geoid, county_fips, total_pop, pop_18_29, youth_share, :vintage
+            FROM vtd_load
+            ON CONFLICT (geoid) DO UPDATE SET
+                total_pop   = EXCLUDED.total_pop,
+                pop_18_29   = EXCLUDED.pop_18_29,
+                youth_share = EXCLUDED.youth_share,
+                acs_vintage = EXCLUDED.acs_vintage
+        """), {"vintage": cfg.ACS_VINTAGE})
+
+
+def load_county(county_fips: str, blocks: pd.DataFrame) -> int:
+    """Shard: aggregate one county's blocks and upsert them in one transaction."""
+    vtd = aggregate_to_vtd(blocks)
+    upsert_vtd_demographics(vtd, shard_engine())
+    log.info("County %s — %d VTDs upserted.", county_fips, len(vtd))
+    return len(vtd)
 
 
 def main():
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-    blocks = load_nhgis_blocks()
-    vtd    = aggregate_to_vtd(blocks)
-    upsert_vtd_demographics(vtd, engine)
-    log.info("Script 01 complete — %d VTDs loaded.", len(vtd))
+    options = parse_shard_options()
+    if cfg.CENSUS_SOURCE == "api":
+        by_county = load_api_vtds(options)
+    else:
+        blocks = load_nhgis_blocks()
+        by_county = {c: g for c, g in blocks.groupby(blocks["STATEA"] + blocks["COUNTYA"])}
+    counties = select_counties(by_county, options)
+    with current_stage().step("aggregate_upsert"):
+        loaded = run_sharded(load_county, counties, options, payloads=by_county)
+    n = sum(loaded.values())
+    current_stage().rows_out += n
+    current_stage().details["counties"] = len(counties)
+    log.info("Script 01 complete — %d VTDs loaded.", n)
 
 
 if __name__ == "__main__":
-    main()
+    run_stage("01_fetch_census", main)
@@ -1,15 +1,15 @@
 """
 Script 02 — Load precinct geometries from TIGER/Line VTD shapefiles.
 
-Downloads the statewide CA VTD shapefile from Census and loads precinct
-boundaries into the precincts table. This provides the geometry column
+Downloads the statewide VTD shapefile for cfg.STATE_FIPS from Census (or uses a local copy at
+cfg.VTD_SHAPEFILE when present) and loads precinct boundaries into the
+precincts table. This provides the geometry column
 that the map uses — election results are joined in script 03.
 
 Usage:
-    DATABASE_URL=<url> python 02_fetch_shapefiles.py
+    DATABASE_URL=<url> [PIPELINE_RUN_ID=<id>] python 02_fetch_shapefiles.py [--profile]
 """
 
-import os
 import sys
 import logging
 import zipfile
@@ -18,28 +18,23 @@ from pathlib import Path
 
 import requests
 import geopandas as gpd
-from sqlalchemy import create_engine, text
+from shapely.geometry import MultiPolygon
+from sqlalchemy import text
 
 sys.path.insert(0, str(Path(__file__).parent))
 import config as cfg
+from db_engine import pipeline_engine
+from partitions import ensure_state_partition
+from profiling import current_stage, run_stage
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 log = logging.getLogger(__name__)
 
-DATABASE_URL = os.environ["DATABASE_URL"]
-
-# CA statewide VTD shapefile (single zip, all counties)
-TIGER_VTD_URL = (
-    "https://www2.census.gov/geo/tiger/TIGER2020PL/STATE/"
-    "06_CALIFORNIA/06/tl_2020_06_vtd20.zip"
-)
-
-
 def download_vtd_shapefile(dest_dir: Path) -> Path:
-    """Download CA statewide VTD shapefile zip."""
-    zip_path = dest_dir / "tl_2020_06_vtd20.zip"
-    log.info("Downloading CA VTD shapefile (~75 MB)...")
-    resp = requests.get(TIGER_VTD_URL, timeout=300, stream=True)
+    """Download the statewide VTD shapefile zip."""
+    zip_path = dest_dir / Path(cfg.TIGER_VTD_URL).name
+    log.info("Downloading %s VTD shapefile (CA ~75 MB)...", cfg.STATE_ABBR)
+    resp = requests.get(cfg.TIGER_VTD_URL, timeout=300, stream=True)
     resp.raise_for_status()
     with open(zip_path, "wb") as f:
         for chunk in resp.iter_content(chunk_size=131072):
@@ -66,13 +61,13 @@ def load_vtd_shapefile(shp_path: Path) -> gpd.GeoDataFrame:
     # NAMELSAD20 = human-readable name
     # COUNTYFP20 = 3-digit county FIPS
     gdf["precinct_id"]  = gdf["GEOID20"].str.strip()
-    gdf["county_fips"]  = "06" + gdf["COUNTYFP20"].str.strip()
+    gdf["county_fips"]  = cfg.STATE_FIPS + gdf["COUNTYFP20"].str.strip()
     gdf["vtdi"]         = gdf["VTDI20"].str.strip() if "VTDI20" in gdf.columns else gdf["GEOID20"].str[5:]
 
     # Ensure MultiPolygon
     gdf["geometry"] = gdf["geometry"].apply(
         lambda g: g if g is None or g.geom_type == "MultiPolygon"
-        else g.__class__([g]) if g.geom_type == "Polygon"
+        else MultiPolygon([g]) if g.geom_type == "Polygon"
         else g
     )
 
@@ -88,17 +83,22 @@ def upsert_precinct_geometries(gdf: gpd.GeoDataFrame, engine) -> int:
         for _, row in gdf.iterrows():
             if row["geometry"] is None:
                 continue
-            conn.execute(text("""
-                INSERT INTO precincts (precinct_id, county_name, geom)
+            conn.execute(text(f"""
+                INSERT INTO {cfg.PRECINCTS_TABLE} (state_fips, precinct_id, county_fips, county_name, geom)
                 VALUES (
+                    :state_fips,
                     :precinct_id,
+                    :county_fips,
                     :county_name,
                     ST_Multi(ST_GeomFromText(:wkt, 4326))
                 )
-                ON CONFLICT (precinct_id) DO UPDATE SET
-                    geom = EXCLUDED.geom
+                ON CONFLICT (state_fips, precinct_id) DO UPDATE SET
+                    county_fips = EXCLUDED.county_fips,
+                    geom        = EXCLUDED.geom
             """), {
+                "state_fips":  cfg.STATE_FIPS,
                 "precinct_id": row["precinct_id"],
+                "county_fips": row["county_fips"],
                 "county_name": row["county_fips"],
                 "wkt":         row["geometry"].wkt,
             })
@@ -111,15 +111,25 @@ def upsert_precinct_geometries(gdf: gpd.GeoDataFrame, engine) -> int:
 
 
 def main():
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    engine = pipeline_engine()
+    if cfg.PRECINCTS_TABLE == "precincts":
+        ensure_state_partition(engine, cfg.STATE_FIPS)
 
     with tempfile.TemporaryDirectory() as tmpdir:
-        shp_path = download_vtd_shapefile(Path(tmpdir))
+        if Path(cfg.VTD_SHAPEFILE).exists():
+            shp_path = Path(cfg.VTD_SHAPEFILE)
+            log.info("Using local VTD shapefile %s", shp_path)
+        else:
+            with current_stage().step("download"):
+                shp_path = download_vtd_shapefile(Path(tmpdir))
         gdf = load_vtd_shapefile(shp_path)
-        n = upsert_precinct_geometries(gdf, engine)
+        current_stage().rows_in += len(gdf)
+        with current_stage().step("upsert"):
+            n = upsert_precinct_geometries(gdf, engine)
+        current_stage().rows_out += n
 
     log.info("Script 02 complete — %d precincts loaded.", n)
 
 
 if __name__ == "__main__":
-    main()
+    run_stage("02_fetch_shapefiles", main)
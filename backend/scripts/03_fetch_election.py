@@ -8,25 +8,24 @@ The RDH UNIQUE_ID field encodes state+county+precinct and maps to
 the TIGER VTD GEOID20 used as precinct_id in our precincts table.
 
 Usage:
-    DATABASE_URL=<url> python 03_fetch_election.py
+    DATABASE_URL=<url> [PIPELINE_RUN_ID=<id>] python 03_fetch_election.py [--profile]
 """
 
-import os
 import sys
 import logging
 from pathlib import Path
 
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 
 sys.path.insert(0, str(Path(__file__).parent))
 import config as cfg
+from db_engine import pipeline_engine
+from profiling import current_stage, run_stage
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 log = logging.getLogger(__name__)
 
-DATABASE_URL = os.environ["DATABASE_URL"]
-
 
 def load_rdh_csv() -> pd.DataFrame:
     """Load and process RDH 2024 precinct election results."""
@@ -58,33 +57,45 @@ def load_rdh_csv() -> pd.DataFrame:
     # Also try building an 11-char key from COUNTYFP + PRECINCT
     df["COUNTYFP_3"] = df[cfg.RDH_COUNTYFP_COL].str.strip().str[-3:].str.zfill(3)
     df["PRECINCT_6"] = df["PRECINCT"].str.strip().str.zfill(6).str[-6:]
-    df["vtd_key_11"] = "06" + df["COUNTYFP_3"] + df["PRECINCT_6"]
+    df["vtd_key_11"] = cfg.STATE_FIPS + df["COUNTYFP_3"] + df["PRECINCT_6"]
 
     df["county_name"] = df[cfg.RDH_COUNTY_COL].str.strip()
+    df["state_fips"]  = cfg.STATE_FIPS
     df["election_date"] = cfg.ELECTION_DATE
     df["contest_name"]  = cfg.ELECTION_CONTEST
 
     return df[[
-        "precinct_id", "vtd_key_11", "county_name",
+        "state_fips", "precinct_id", "vtd_key_11", "county_name",
         "dem_votes", "rep_votes", "total_votes",
         "dem_pct", "dem_margin", "election_date", "contest_name"
     ]]
 
 
 def upsert_election_results(df: pd.DataFrame, engine) -> None:
-    """Insert election results into election_results table."""
-    log.info("Inserting %d rows into election_results...", len(df))
+    """
+    Upsert election results into election_results, keyed by state, date,
+    contest and precinct, so a re-run refreshes the rows instead of adding
+    copies of them.
+    """
+    log.info("Upserting %d rows into election_results...", len(df))
     with engine.begin() as conn:
         for _, row in df.iterrows():
             conn.execute(text("""
                 INSERT INTO election_results
-                    (election_date, county_name, precinct_id, contest_name,
+                    (state_fips, election_date, county_name, precinct_id, contest_name,
                      dem_votes, rep_votes, total_votes, dem_pct, dem_margin)
                 VALUES
-                    (:election_date, :county_name, :precinct_id, :contest_name,
+                    (:state_fips, :election_date, :county_name, :precinct_id, :contest_name,
                      :dem_votes, :rep_votes, :total_votes, :dem_pct, :dem_margin)
-                ON CONFLICT DO NOTHING
+                ON CONFLICT (state_fips, election_date, contest_name, precinct_id) DO UPDATE SET
+                    county_name = EXCLUDED.county_name,
+                    dem_votes   = EXCLUDED.dem_votes,
+                    rep_votes   = EXCLUDED.rep_votes,
+                    total_votes = EXCLUDED.total_votes,
+                    dem_pct     = EXCLUDED.dem_pct,
+                    dem_margin  = EXCLUDED.dem_margin
             """), {
+                "state_fips":    row["state_fips"],
                 "election_date": row["election_date"],
                 "county_name":   row["county_name"],
                 "precinct_id":   row["precinct_id"],
@@ -95,7 +106,7 @@ def upsert_election_results(df: pd.DataFrame, engine) -> None:
                 "dem_pct":       float(row["dem_pct"]) if pd.notna(row.get("dem_pct")) else None,
                 "dem_margin":    float(row["dem_margin"]) if pd.notna(row.get("dem_margin")) else None,
             })
-    log.info("Election results inserted.")
+    log.info("Election results upserted.")
 
 
 def update_precinct_election_data(df: pd.DataFrame, engine) -> int:
@@ -107,16 +118,17 @@ def update_precinct_election_data(df: pd.DataFrame, engine) -> int:
     with engine.begin() as conn:
         for _, row in df.iterrows():
             # Try direct match first (RDH UNIQUE_ID = TIGER GEOID20)
-            result = conn.execute(text("""
-                UPDATE precincts SET
+            result = conn.execute(text(f"""
+                UPDATE {cfg.PRECINCTS_TABLE} SET
                     county_name = :county_name,
                     dem_votes   = :dem_votes,
                     rep_votes   = :rep_votes,
                     total_votes = :total_votes,
                     dem_pct     = :dem_pct,
                     dem_margin  = :dem_margin
-                WHERE precinct_id = :precinct_id
+                WHERE state_fips = :state_fips AND precinct_id = :precinct_id
             """), {
+                "state_fips":  cfg.STATE_FIPS,
                 "precinct_id": row["precinct_id"],
                 "county_name": row["county_name"],
                 "dem_votes":   int(row["dem_votes"]),
@@ -128,16 +140,17 @@ def update_precinct_election_data(df: pd.DataFrame, engine) -> int:
 
             if result.rowcount == 0:
                 # Fallback: try 11-char VTD key
-                result2 = conn.execute(text("""
-                    UPDATE precincts SET
+                result2 = conn.execute(text(f"""
+                    UPDATE {cfg.PRECINCTS_TABLE} SET
                         county_name = :county_name,
                         dem_votes   = :dem_votes,
                         rep_votes   = :rep_votes,
                         total_votes = :total_votes,
                         dem_pct     = :dem_pct,
                         dem_margin  = :dem_margin
-                    WHERE precinct_id = :precinct_id
+                    WHERE state_fips = :state_fips AND precinct_id = :precinct_id
                 """), {
+                    "state_fips":  cfg.STATE_FIPS,
                     "precinct_id": row["vtd_key_11"],
                     "county_name": row["county_name"],
                     "dem_votes":   int(row["dem_votes"]),
@@ -157,12 +170,16 @@ def update_precinct_election_data(df: pd.DataFrame, engine) -> int:
 
 
 def main():
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    engine = pipeline_engine()
     df = load_rdh_csv()
-    upsert_election_results(df, engine)
-    update_precinct_election_data(df, engine)
+    current_stage().rows_in += len(df)
+    with current_stage().step("insert_election_results"):
+        upsert_election_results(df, engine)
+    with current_stage().step("update_precincts"):
+        matched = update_precinct_election_data(df, engine)
+    current_stage().rows_out += matched
     log.info("Script 03 complete.")
 
 
 if __name__ == "__main__":
-    main()
+    run_stage("03_fetch_election", main)
@@ -4,115 +4,125 @@ Script 04 — Join VTD demographics to precincts and assign congressional distri
 Two joins:
 1. VTD demographics (from census_block_groups table) → precincts
    Matches on VTD GEOID: state(2)+county(3)+vtdi
-2. Block→CD assignment (from BAF file) → precincts via majority CD
+2. Congressional district → precincts via a centroid spatial join
+
+Both joins run per county over a process pool, one transaction per county
+(see sharding.py).
 
 Usage:
-    DATABASE_URL=<url> python 04_crosswalk.py
+    DATABASE_URL=<url> [PIPELINE_RUN_ID=<id>] python 04_crosswalk.py [--county 037,059] [--workers N] [--profile]
 """
 
-import os
 import sys
 import logging
+from functools import lru_cache
 from pathlib import Path
-from collections import Counter
 
 import pandas as pd
 import geopandas as gpd
-from sqlalchemy import create_engine, text
+from shapely import wkt
+from sqlalchemy import text
 
 sys.path.insert(0, str(Path(__file__).parent))
 import config as cfg
+from db_engine import pipeline_engine
+from profiling import current_stage, run_stage
+from sharding import parse_shard_options, run_sharded, select_counties, shard_engine, state_counties
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 log = logging.getLogger(__name__)
 
-DATABASE_URL = os.environ["DATABASE_URL"]
-
 
-def join_demographics(engine) -> int:
+def join_demographics(conn, county_fips: str) -> int:
     """
-    Match census_block_groups (VTD-level demographics) to precincts.
+    Match census_block_groups (VTD-level demographics) to one county's precincts.
     The geoid in census_block_groups = state+county+vtdi (same as TIGER GEOID20).
     """
-    log.info("Joining VTD demographics to precincts...")
-    sql = text("""
-        UPDATE precincts p
+    sql = text(f"""
+        UPDATE {cfg.PRECINCTS_TABLE} p
         SET
             total_pop   = cbg.total_pop,
             pop_18_29   = cbg.pop_18_29,
             youth_share = cbg.youth_share
         FROM census_block_groups cbg
-        WHERE p.precinct_id = cbg.geoid
+        WHERE p.state_fips = :state_fips
+          AND p.county_fips = :county_fips
+          AND cbg.county_fips = :county_fips
+          AND p.precinct_id = cbg.geoid
     """)
-    with engine.begin() as conn:
-        result = conn.execute(sql)
-        log.info("Matched %d precincts with demographics.", result.rowcount)
-        return result.rowcount
+    return conn.execute(sql, {"state_fips": cfg.STATE_FIPS, "county_fips": county_fips}).rowcount
+
+
+@lru_cache(maxsize=1)
+def load_congressional_districts() -> gpd.GeoDataFrame:
+    """CD polygons, read once per worker process."""
+    cds = gpd.read_file(cfg.CD_SHAPEFILE).to_crs(epsg=4326)
+    cds["cd_number"] = pd.to_numeric(cds["CD118FP"], errors="coerce")
+    return cds[["cd_number", "geometry"]]
 
 
-def assign_congressional_districts(engine) -> int:
+def assign_congressional_districts(conn, county_fips: str) -> tuple[int, int]:
     """
-    Assign congressional district to each precinct using BAF CD file.
-    For each precinct, find the most common CD among its blocks.
+    Assign a congressional district to each of one county's precincts by
+    spatially joining precinct centroids to the CD shapefile.
+    Returns (precincts read, precincts assigned).
     """
-    log.info("Loading BAF CD crosswalk...")
-    baf = pd.read_csv(cfg.BAF_CD_TXT, sep="|", dtype=str)
-    baf.columns = ["block_geoid", "cd_number"]
-    baf["block_geoid"] = baf["block_geoid"].str.strip()
-    baf["cd_number"]   = pd.to_numeric(baf["cd_number"], errors="coerce")
-
-    # Construct VTD key from block GEOID: state(2)+county(3)+remaining is tract+block
-    # VTD key = state(2)+county(3)+vtdi — but block GEOID = state(2)+county(3)+tract(6)+block(4)
-    # We need to group blocks by VTD. Use state+county as grouping + get majority CD per VTD.
-    # Since we don't have the VTD→block direct mapping here without the VTD BAF file,
-    # we use the spatial join via PostGIS as fallback.
-
-    log.info("Loading precincts with geometry for CD spatial join...")
-    with engine.connect() as conn:
-        precincts = pd.read_sql(
-            "SELECT precinct_id, ST_AsText(ST_Centroid(geom)) as centroid_wkt FROM precincts WHERE geom IS NOT NULL",
-            conn
-        )
-
+    precincts = pd.read_sql(
+        text(f"""
+            SELECT precinct_id, ST_AsText(ST_Centroid(geom)) as centroid_wkt
+            FROM {cfg.PRECINCTS_TABLE}
+            WHERE state_fips = :state_fips AND county_fips = :county_fips AND geom IS NOT NULL
+        """),
+        conn,
+        params={"state_fips": cfg.STATE_FIPS, "county_fips": county_fips},
+    )
     if precincts.empty:
-        log.warning("No precincts with geometry found — skipping CD assignment.")
-        return 0
+        return 0, 0
 
-    # Load CD shapefile
-    log.info("Loading congressional district shapefile...")
-    cds = gpd.read_file(cfg.CD_SHAPEFILE).to_crs(epsg=4326)
-    cds["cd_number"] = pd.to_numeric(cds["CD118FP"], errors="coerce")
-
-    # Build precinct centroids GeoDataFrame
-    from shapely import wkt
     precincts["geometry"] = precincts["centroid_wkt"].apply(wkt.loads)
     prec_gdf = gpd.GeoDataFrame(precincts, geometry="geometry", crs="EPSG:4326")
 
     # Spatial join centroids → CD
-    joined = gpd.sjoin(prec_gdf, cds[["cd_number", "geometry"]], how="left", predicate="within")
-    joined = joined.drop_duplicates("precinct_id")
+    joined = gpd.sjoin(prec_gdf, load_congressional_districts(), how="left", predicate="within")
+    joined = joined.drop_duplicates("precinct_id").dropna(subset=["cd_number"])
+
+    if not joined.empty:
+        conn.execute(text(f"""
+            UPDATE {cfg.PRECINCTS_TABLE} SET cd_number = :cd
+            WHERE state_fips = :state_fips AND precinct_id = :pid
+        """), [
+            {"cd": int(cd), "state_fips": cfg.STATE_FIPS, "pid": pid}
+            for pid, cd in zip(joined["precinct_id"], joined["cd_number"])
+        ])
+    return len(precincts), len(joined)
 
-    log.info("Updating CD numbers in precincts table...")
-    matched = 0
-    with engine.begin() as conn:
-        for _, row in joined.iterrows():
-            if pd.isna(row.get("cd_number_right")):
-                continue
-            conn.execute(text("""
-                UPDATE precincts SET cd_number = :cd WHERE precinct_id = :pid
-            """), {"cd": int(row["cd_number_right"]), "pid": row["precinct_id"]})
-            matched += 1
 
-    log.info("Assigned CD to %d precincts.", matched)
-    return matched
+def crosswalk_county(county_fips: str) -> dict:
+    """Shard: demographics join + CD assignment for one county, in one transaction."""
+    with shard_engine().begin() as conn:
+        demographics = join_demographics(conn, county_fips)
+        read, assigned = assign_congressional_districts(conn, county_fips)
+    log.info("County %s — %d demographics matched, %d/%d CDs assigned.", county_fips, demographics, assigned, read)
+    return {"demographics_matched": demographics, "rows_in": read, "cd_assigned": assigned}
 
 
 def main():
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-    join_demographics(engine)
-    assign_congressional_districts(engine)
-    log.info("Script 04 complete.")
+    options = parse_shard_options()
+    engine = pipeline_engine()
+    counties = select_counties(state_counties(engine), options)
+    if not counties:
+        log.warning("No precincts loaded for state %s — nothing to crosswalk.", cfg.STATE_FIPS)
+        return
+
+    stage = current_stage()
+    with stage.step("crosswalk"):
+        results = run_sharded(crosswalk_county, counties, options).values()
+    stage.rows_in += sum(r["rows_in"] for r in results)
+    stage.rows_out += sum(r["cd_assigned"] for r in results)
+    stage.details["demographics_matched"] = sum(r["demographics_matched"] for r in results)
+    stage.details["counties"] = len(counties)
+    log.info("Script 04 complete — CD assigned to %d precincts.", stage.rows_out)
 
 
 if __name__ == "__main__":
-    main()
+    run_stage("04_crosswalk", main)
@@ -0,0 +1,168 @@
+"""
+Script 04b — Data-quality checks between the crosswalk and scoring.
+
+Broken joins, empty or invalid geometries and out-of-range values otherwise
+only show up when the map looks wrong, after the expensive scoring and
+simplification stages. This stage measures the loaded state in a couple of
+set-based passes (one aggregate query per table, ST_IsValid over every
+geometry in bulk):
+
+    match rates      precincts with demographics, a CD, an election result
+    null rates       youth_share
+    value ranges     shares in [0, 1], margins in [-1, 1], pop_18_29 <= total_pop
+    geometry         NULL or NOT ST_IsValid
+    duplicate keys   precinct_id in precincts and in the contest's results (ELECTION_DATE)
+    population       SUM(total_pop) against the state's 2020 Census total
+
+Metrics, thresholds and verdicts land in pipeline_run_stages.details
+("validation"). Any check past its threshold (cfg.VALIDATION_THRESHOLDS)
+marks the run failed and exits non-zero, unless VALIDATION_MODE=warn.
+
+Usage:
+    DATABASE_URL=<url> python 04b_validate.py [pipeline_run_id] [--profile]
+"""
+
+import sys
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).parent))
+import config as cfg
+from db_engine import pipeline_engine
+from profiling import current_stage, resolve_run_id, run_stage
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+log = logging.getLogger(__name__)
+
+SAMPLE_SIZE = 10   # offending precinct_ids kept per check, for debugging
+
+
+class ValidationFailed(RuntimeError):
+    """One or more checks crossed their threshold; the message lists them."""
+
+
+def precinct_metrics(conn) -> dict:
+    has_result = """EXISTS (
+        SELECT 1 FROM election_results er
+        WHERE er.state_fips = :state_fips AND er.election_date = :election_date
+          AND er.contest_name = :contest AND er.precinct_id = p.precinct_id
+    )"""
+    invalid_geom = "(p.geom IS NULL OR NOT ST_IsValid(p.geom))"
+    out_of_range = """(p.youth_share NOT BETWEEN 0 AND 1
+                       OR p.pop_18_29 > p.total_pop
+                       OR p.total_pop < 0)"""
+    row = conn.execute(text(f"""
+        SELECT
+            COUNT(*)                                          AS precincts,
+            COUNT(*) - COUNT(DISTINCT p.precinct_id)          AS duplicate_precinct_ids,
+            COUNT(*) FILTER (WHERE p.total_pop IS NOT NULL)   AS demographics_matched,
+            COUNT(*) FILTER (WHERE p.cd_number IS NOT NULL)   AS cd_assigned,
+            COUNT(*) FILTER (WHERE {has_result})              AS election_matched,
+            COUNT(*) FILTER (WHERE p.total_pop = 0)           AS zero_population,
+            COUNT(*) FILTER (WHERE p.youth_share IS NULL)     AS null_youth_share,
+            COUNT(*) FILTER (WHERE {invalid_geom})            AS invalid_geometries,
+            COUNT(*) FILTER (WHERE {out_of_range})            AS out_of_range,
+            COALESCE(SUM(p.total_pop), 0)                     AS total_pop,
+            (array_agg(p.precinct_id) FILTER (WHERE {invalid_geom}))[1:{SAMPLE_SIZE}] AS invalid_geometry_sample,
+            (array_agg(p.precinct_id) FILTER (WHERE {out_of_range}))[1:{SAMPLE_SIZE}] AS out_of_range_sample
+        FROM {cfg.PRECINCTS_TABLE} p
+        WHERE p.state_fips = :state_fips
+    """), {"state_fips": cfg.STATE_FIPS, "election_date": cfg.ELECTION_DATE,
+           "contest": cfg.ELECTION_CONTEST}).mappings().one()
+    return dict(row)
+
+
+def election_metrics(conn) -> dict:
+    out_of_range = """(dem_pct NOT BETWEEN 0 AND 1
+                       OR dem_margin NOT BETWEEN -1 AND 1
+                       OR dem_votes + rep_votes > total_votes)"""
+    row = conn.execute(text(f"""
+        SELECT
+            COUNT(*)                                          AS election_results,
+            COUNT(*) - COUNT(DISTINCT precinct_id)            AS duplicate_result_ids,
+            COUNT(*) FILTER (WHERE {out_of_range})            AS election_out_of_range,
+            (array_agg(precinct_id) FILTER (WHERE {out_of_range}))[1:{SAMPLE_SIZE}] AS election_out_of_range_sample
+        FROM election_results
+        WHERE state_fips = :state_fips AND election_date = :election_date AND contest_name = :contest
+    """), {"state_fips": cfg.STATE_FIPS, "election_date": cfg.ELECTION_DATE, "contest": cfg.ELECTION_CONTEST}).mappings().one()
+    return dict(row)
+
+
+def evaluate(metrics: dict) -> dict:
+    """{check: {value, threshold, passed}} for every cfg.VALIDATION_THRESHOLDS entry."""
+    n = metrics["precincts"]
+
+    def rate(count: int) -> float:
+        return round(count / n, 6) if n else 0.0
+
+    values = {
+        "min_demographics_match_rate": rate(metrics["demographics_matched"]),
+        "min_cd_assigned_rate": rate(metrics["cd_assigned"]),
+        "min_election_match_rate": rate(metrics["election_matched"]),
+        "max_zero_population_rate": rate(metrics["zero_population"]),
+        "max_null_youth_share_rate": rate(metrics["null_youth_share"]),
+        "max_invalid_geometry_rate": rate(metrics["invalid_geometries"]),
+        "max_duplicate_keys": metrics["duplicate_precinct_ids"] + metrics["duplicate_result_ids"],
+        "max_out_of_range_values": metrics["out_of_range"] + metrics["election_out_of_range"],
+        "max_population_deviation": round(abs(metrics["total_pop"] / cfg.STATE_POPULATION - 1), 6),
+    }
+    checks = {}
+    for name, threshold in cfg.VALIDATION_THRESHOLDS.items():
+        value = values[name]
+        passed = value >= threshold if name.startswith("min_") else value <= threshold
+        checks[name] = {"value": value, "threshold": threshold, "passed": passed}
+    return checks
+
+
+def mark_pipeline_failed(engine, run_id: int, message: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE pipeline_runs
+            SET status = 'failed', error_message = :message, finished_at = :finished_at
+            WHERE id = :run_id
+        """), {"run_id": run_id, "message": message, "finished_at": datetime.now(timezone.utc)})
+    log.info("Pipeline run %d marked as failed.", run_id)
+
+
+def main():
+    engine = pipeline_engine()
+    stage = current_stage()
+
+    with engine.connect() as conn:
+        with stage.step("precinct_checks"):
+            metrics = precinct_metrics(conn)
+        with stage.step("election_checks"):
+            metrics.update(election_metrics(conn))
+    stage.rows_in = metrics["precincts"]
+
+    checks = evaluate(metrics) if metrics["precincts"] else {
+        "precincts_loaded": {"value": 0, "threshold": 1, "passed": False},
+    }
+    failed = [name for name, check in checks.items() if not check["passed"]]
+    stage.details["validation"] = {"metrics": metrics, "checks": checks, "failed": failed}
+
+    for name, check in checks.items():
+        log.log(logging.INFO if check["passed"] else logging.ERROR,
+                "%-28s %12s (threshold %s)%s", name, check["value"], check["threshold"],
+                "" if check["passed"] else "  FAILED")
+
+    if not failed:
+        stage.rows_out = metrics["precincts"]
+        log.info("Script 04b complete — all %d checks passed for %d precincts.", len(checks), metrics["precincts"])
+        return
+
+    message = f"Validation failed for state {cfg.STATE_FIPS}: {', '.join(failed)}"
+    if cfg.VALIDATION_MODE == "warn":
+        log.warning("%s (VALIDATION_MODE=warn, continuing)", message)
+        return
+    run_id = resolve_run_id()
+    if run_id is not None:
+        mark_pipeline_failed(engine, run_id, message)
+    raise ValidationFailed(message)
+
+
+if __name__ == "__main__":
+    run_stage("04b_validate", main)
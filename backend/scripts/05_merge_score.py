@@ -13,30 +13,35 @@ Tier assignment:
     score >= 0.30 → watchlist
     else          → low
 
+Runs per county over a process pool, one transaction per county (see
+sharding.py). Ranks and percentiles of score — statewide, per district, per
+county and per tier — are then recomputed for the whole state in one pass,
+so a --county re-run still leaves consistent ranks.
+
 Usage:
-    DATABASE_URL=<url> python 05_merge_score.py [pipeline_run_id]
+    DATABASE_URL=<url> python 05_merge_score.py [pipeline_run_id] [--county 037,059] [--workers N] [--profile]
 """
 
-import os
 import sys
 import logging
 from pathlib import Path
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 
 sys.path.insert(0, str(Path(__file__).parent))
 import config as cfg
+from db_engine import pipeline_engine
+from profiling import current_stage, resolve_run_id, run_stage
+from sharding import parse_shard_options, run_sharded, select_counties, shard_engine, state_counties
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 log = logging.getLogger(__name__)
 
-DATABASE_URL = os.environ["DATABASE_URL"]
-
 
-def merge_election_results(engine) -> int:
-    """Copy election results into precincts table by precinct_id."""
-    sql = text("""
-        UPDATE precincts p
+def merge_election_results(conn, county_fips: str) -> int:
+    """Copy election results into one county's precincts by precinct_id."""
+    sql = text(f"""
+        UPDATE {cfg.PRECINCTS_TABLE} p
         SET
             dem_votes   = er.dem_votes,
             rep_votes   = er.rep_votes,
@@ -44,21 +49,22 @@ def merge_election_results(engine) -> int:
             dem_pct     = er.dem_pct,
             dem_margin  = er.dem_margin
         FROM election_results er
-        WHERE p.precinct_id = er.precinct_id
+        WHERE p.state_fips = :state_fips
+          AND p.county_fips = :county_fips
+          AND er.state_fips = :state_fips
+          AND p.precinct_id = er.precinct_id
           AND er.contest_name = :contest
     """)
-    with engine.begin() as conn:
-        result = conn.execute(sql, {"contest": cfg.ELECTION_CONTEST})
-        log.info("Merged election results into %d precincts.", result.rowcount)
-        return result.rowcount
+    params = {"state_fips": cfg.STATE_FIPS, "county_fips": county_fips, "contest": cfg.ELECTION_CONTEST}
+    return conn.execute(sql, params).rowcount
 
 
-def compute_scores(engine) -> int:
+def compute_scores(conn, county_fips: str) -> int:
     """
     Compute normalized composite score and assign tier labels for ALL precincts
-    that have both youth_share and dem_margin data. No threshold filtering here —
-    thresholds are applied at query time in the API so sliders work across the
-    full range.
+    (in one county) that have both youth_share and dem_margin data. No threshold
+    filtering here — thresholds are applied at query time in the API so sliders
+    work across the full range.
 
     Score is normalized using fixed reference points so that a precinct with
     youth_share=1.0 and dem_margin=1.0 scores 1.0, and one with both at 0
@@ -82,56 +88,127 @@ def compute_scores(engine) -> int:
                     {w_youth} * youth_share
                   + {w_margin} * ((dem_margin + 1.0) / 2.0)
                 )) AS score
-            FROM precincts
-            WHERE youth_share IS NOT NULL
+            FROM {cfg.PRECINCTS_TABLE}
+            WHERE state_fips = :state_fips
+              AND county_fips = :county_fips
+              AND youth_share IS NOT NULL
               AND dem_margin IS NOT NULL
         )
-        UPDATE precincts p
+        UPDATE {cfg.PRECINCTS_TABLE} p
         SET
             score = s.score,
             tier  = CASE {tier_cases} ELSE 'low' END
         FROM scored s
-        WHERE p.precinct_id = s.precinct_id
+        WHERE p.state_fips = :state_fips
+          AND p.precinct_id = s.precinct_id
     """)
+    return conn.execute(sql, {"state_fips": cfg.STATE_FIPS, "county_fips": county_fips}).rowcount
 
-    with engine.begin() as conn:
-        result = conn.execute(sql)
-        log.info("Scored %d precincts.", result.rowcount)
-        return result.rowcount
 
-
-def simplify_geometries(engine) -> None:
+def simplify_geometries(conn, county_fips: str) -> int:
     """Populate geom_simplified using ST_SimplifyPreserveTopology."""
-    sql = text("""
-        UPDATE precincts
+    sql = text(f"""
+        UPDATE {cfg.PRECINCTS_TABLE}
         SET geom_simplified = ST_Multi(
             ST_SimplifyPreserveTopology(geom, :tolerance)
         )
-        WHERE geom IS NOT NULL
+        WHERE state_fips = :state_fips AND county_fips = :county_fips AND geom IS NOT NULL
     """)
-    with engine.begin() as conn:
-        result = conn.execute(sql, {"tolerance": cfg.SIMPLIFICATION_TOLERANCE})
-        log.info("Simplified geometry for %d precincts.", result.rowcount)
+    params = {"state_fips": cfg.STATE_FIPS, "county_fips": county_fips, "tolerance": cfg.SIMPLIFICATION_TOLERANCE}
+    return conn.execute(sql, params).rowcount
 
 
-def main():
-    pipeline_run_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+RANK_COLUMNS = [
+    f"{group}_{kind}" for group in ("state", "district", "county", "tier") for kind in ("rank", "percentile")
+]
+
+
+def compute_ranks(conn) -> int:
+    """
+    Store ranks (row_number, 1 = best, ties broken by precinct_id) and
+    percentiles (percent_rank: share of the group scoring lower) of score for
+    every scored precinct — statewide, per district, per county and per tier.
+    Precincts without a district get no district rank. Returns the number of
+    precincts ranked.
+    """
+    params = {"state_fips": cfg.STATE_FIPS}
+    conn.execute(text(f"""
+        UPDATE {cfg.PRECINCTS_TABLE}
+        SET {", ".join(f"{c} = NULL" for c in RANK_COLUMNS)}
+        WHERE state_fips = :state_fips AND score IS NULL AND state_rank IS NOT NULL
+    """), params)
+    return conn.execute(text(f"""
+        WITH r AS (
+            SELECT
+                precinct_id,
+                row_number()   OVER (ORDER BY score DESC, precinct_id)                          AS state_rank,
+                percent_rank() OVER (ORDER BY score)                                            AS state_percentile,
+                row_number()   OVER (PARTITION BY cd_number ORDER BY score DESC, precinct_id)   AS district_rank,
+                percent_rank() OVER (PARTITION BY cd_number ORDER BY score)                     AS district_percentile,
+                row_number()   OVER (PARTITION BY county_fips ORDER BY score DESC, precinct_id) AS county_rank,
+                percent_rank() OVER (PARTITION BY county_fips ORDER BY score)                   AS county_percentile,
+                row_number()   OVER (PARTITION BY tier ORDER BY score DESC, precinct_id)        AS tier_rank,
+                percent_rank() OVER (PARTITION BY tier ORDER BY score)                          AS tier_percentile
+            FROM {cfg.PRECINCTS_TABLE}
+            WHERE state_fips = :state_fips AND score IS NOT NULL
+        )
+        UPDATE {cfg.PRECINCTS_TABLE} p
+        SET state_rank          = r.state_rank,
+            state_percentile    = r.state_percentile,
+            district_rank       = CASE WHEN p.cd_number IS NULL THEN NULL ELSE r.district_rank END,
+            district_percentile = CASE WHEN p.cd_number IS NULL THEN NULL ELSE r.district_percentile END,
+            county_rank         = r.county_rank,
+            county_percentile   = r.county_percentile,
+            tier_rank           = r.tier_rank,
+            tier_percentile     = r.tier_percentile
+        FROM r
+        WHERE p.state_fips = :state_fips AND p.precinct_id = r.precinct_id
+    """), params).rowcount
+
+
+def tag_run(conn, county_fips: str, run_id) -> int:
+    """
+    Tag one county's precincts with this pipeline run (NULL for a run outside
+    pipeline_runs), in the transaction that re-scores them. Feature fragments
+    06_export stored for an earlier run stop being served for these rows.
+    """
+    return conn.execute(text(f"""
+        UPDATE {cfg.PRECINCTS_TABLE} SET pipeline_run_id = :run_id
+        WHERE state_fips = :state_fips AND county_fips = :county_fips
+          AND pipeline_run_id IS DISTINCT FROM :run_id
+    """), {"state_fips": cfg.STATE_FIPS, "county_fips": county_fips, "run_id": run_id}).rowcount
+
 
-    merge_election_results(engine)
-    scored_count = compute_scores(engine)
-    simplify_geometries(engine)
+def score_county(county_fips: str, run_id=None) -> dict:
+    """Shard: merge, score, simplify and tag one county in one transaction."""
+    with shard_engine().begin() as conn:
+        merged = merge_election_results(conn, county_fips)
+        scored = compute_scores(conn, county_fips)
+        simplified = simplify_geometries(conn, county_fips)
+        tag_run(conn, county_fips, run_id)
+    log.info("County %s — %d merged, %d scored, %d simplified.", county_fips, merged, scored, simplified)
+    return {"merged": merged, "scored": scored}
 
-    # Tag precincts with this pipeline run
-    if pipeline_run_id:
-        with engine.begin() as conn:
-            conn.execute(
-                text("UPDATE precincts SET pipeline_run_id = :rid WHERE pipeline_run_id IS NULL"),
-                {"rid": pipeline_run_id},
-            )
+
+def main():
+    options = parse_shard_options()
+    pipeline_run_id = resolve_run_id()
+    engine = pipeline_engine()
+    counties = select_counties(state_counties(engine), options)
+
+    stage = current_stage()
+    with stage.step("score_counties"):
+        results = run_sharded(score_county, counties, options, {c: pipeline_run_id for c in counties}).values()
+    scored_count = sum(r["scored"] for r in results)
+    stage.rows_in += sum(r["merged"] for r in results)
+    stage.rows_out += scored_count
+    stage.details["counties"] = len(counties)
+
+    with stage.step("ranks"), engine.begin() as conn:
+        stage.details["ranked"] = compute_ranks(conn)
 
     log.info("Script 05 complete — %d precincts scored.", scored_count)
 
 
 if __name__ == "__main__":
-    main()
+    run_stage("05_merge_score", main)
@@ -0,0 +1,137 @@
+"""
+Script 05b — Precompute low-zoom aggregates for the map.
+
+For each county, congressional district and hexbin cell (several sizes, see
+cfg.AGGREGATE_HEX_SIZES_M) of the state, writes one precinct_aggregates row:
+a dissolved, simplified polygon (hexbins use the cell itself) with
+population-weighted youth share and score, vote-weighted margin and tier
+counts. Served by /api/aggregates?level= so statewide views draw a few
+hundred shapes instead of every precinct.
+
+All levels are replaced in one transaction, so the API never sees a
+half-built state.
+
+Usage:
+    DATABASE_URL=<url> python 05b_aggregates.py [pipeline_run_id] [--profile]
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).parent))
+import config as cfg
+from db_engine import pipeline_engine
+from profiling import current_stage, resolve_run_id, run_stage
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+log = logging.getLogger(__name__)
+
+STATS_SQL = """
+    COUNT(*)                                                   AS precinct_count,
+    SUM(p.total_pop)                                           AS total_pop,
+    SUM(p.pop_18_29)                                           AS pop_18_29,
+    SUM(p.pop_18_29)::float / NULLIF(SUM(p.total_pop), 0)      AS youth_share,
+    SUM(p.dem_votes - p.rep_votes)::float / NULLIF(SUM(p.total_votes), 0) AS dem_margin,
+    SUM(p.score * p.total_pop) / NULLIF(SUM(p.total_pop) FILTER (WHERE p.score IS NOT NULL), 0) AS score,
+    COUNT(*) FILTER (WHERE p.tier = 'priority')                AS priority_count,
+    COUNT(*) FILTER (WHERE p.tier = 'target')                  AS target_count"""
+
+INSERT_COLUMNS = """
+    (state_fips, level, key, precinct_count, total_pop, pop_18_29, youth_share,
+     dem_margin, score, priority_count, target_count, geom, pipeline_run_id)"""
+
+# Dissolved outline per group; CollectionExtract drops slivers that union
+# down to lines or points
+DISSOLVED_GEOM_SQL = """ST_Multi(ST_CollectionExtract(
+        ST_SimplifyPreserveTopology(ST_Union(p.geom), :tolerance), 3))"""
+
+
+def build_dissolved(conn, level: str, key_sql: str, params: dict) -> int:
+    """County / district rows: ST_Union of member precincts, simplified."""
+    result = conn.execute(text(f"""
+        INSERT INTO precinct_aggregates {INSERT_COLUMNS}
+        SELECT :state_fips, :level, {key_sql}, {STATS_SQL},
+               {DISSOLVED_GEOM_SQL}, :run_id
+        FROM {cfg.PRECINCTS_TABLE} p
+        WHERE p.state_fips = :state_fips
+          AND p.geom IS NOT NULL
+          AND {key_sql} IS NOT NULL
+        GROUP BY {key_sql}
+    """), {**params, "level": level})
+    return result.rowcount
+
+
+def build_hexbins(conn, level: str, size_m: int, params: dict) -> int:
+    """
+    Hexbin rows: each precinct is counted in the one ST_HexagonGrid cell that
+    holds its point-on-surface. Cells are materialized with a GiST index so
+    the point lookup is an index probe rather than a scan per precinct.
+    """
+    conn.execute(text(f"""
+        CREATE TEMP TABLE hex_points ON COMMIT DROP AS
+        SELECT p.precinct_id, ST_Transform(ST_PointOnSurface(p.geom), 3857) AS pt
+        FROM {cfg.PRECINCTS_TABLE} p
+        WHERE p.state_fips = :state_fips AND p.geom IS NOT NULL
+    """), params)
+    conn.execute(text("""
+        CREATE TEMP TABLE hex_cells ON COMMIT DROP AS
+        SELECT h.i, h.j, h.geom
+        FROM ST_HexagonGrid(:size, (SELECT ST_SetSRID(ST_Extent(pt)::geometry, 3857) FROM hex_points)) h
+    """), {"size": size_m})
+    conn.execute(text("CREATE INDEX ON hex_cells USING GIST (geom)"))
+    conn.execute(text("ANALYZE hex_cells"))
+
+    result = conn.execute(text(f"""
+        WITH assigned AS (
+            SELECT DISTINCT ON (hp.precinct_id) hp.precinct_id, c.i, c.j
+            FROM hex_points hp
+            JOIN hex_cells c ON ST_Intersects(c.geom, hp.pt)
+            ORDER BY hp.precinct_id, c.i, c.j
+        )
+        INSERT INTO precinct_aggregates {INSERT_COLUMNS}
+        SELECT :state_fips, :level, a.i || '_' || a.j, {STATS_SQL},
+               ST_Multi(ST_Transform(c.geom, 4326)), :run_id
+        FROM assigned a
+        JOIN hex_cells c ON c.i = a.i AND c.j = a.j
+        JOIN {cfg.PRECINCTS_TABLE} p
+          ON p.state_fips = :state_fips AND p.precinct_id = a.precinct_id
+        GROUP BY a.i, a.j, c.geom
+    """), {**params, "level": level})
+
+    conn.execute(text("DROP TABLE hex_points, hex_cells"))
+    return result.rowcount
+
+
+def main():
+    pipeline_run_id = resolve_run_id()
+    engine = pipeline_engine()
+    stage = current_stage()
+    params = {
+        "state_fips": cfg.STATE_FIPS,
+        "run_id": pipeline_run_id,
+        "tolerance": cfg.AGGREGATE_SIMPLIFICATION_TOLERANCE,
+    }
+    counts = {}
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM precinct_aggregates WHERE state_fips = :state_fips"), params)
+        with stage.step("county"):
+            counts["county"] = build_dissolved(conn, "county", "p.county_fips", params)
+        with stage.step("district"):
+            counts["district"] = build_dissolved(conn, "district", "p.cd_number::text", params)
+        for level, size_m in cfg.AGGREGATE_HEX_SIZES_M.items():
+            with stage.step(level):
+                counts[level] = build_hexbins(conn, level, size_m, params)
+
+    for level, n in counts.items():
+        log.info("  %-10s %6d shapes", level, n)
+    stage.rows_out += sum(counts.values())
+    stage.details["aggregates"] = counts
+    log.info("Script 05b complete — %d aggregate shapes.", stage.rows_out)
+
+
+if __name__ == "__main__":
+    run_stage("05b_aggregates", main)
@@ -0,0 +1,93 @@
+"""
+Script 05c — Precompute the precinct adjacency graph.
+
+Writes one precinct_adjacency row per pair of precincts that share a stretch
+of boundary (rook contiguity — corners touching at a point do not count),
+with the shared length in meters. /api/turfs loads the graph into memory and
+grows canvassing turfs over it, so nothing at request time runs ST_Touches.
+
+Candidate pairs come from a GiST-filtered self-join (bounding boxes overlap),
+and only those are tested with ST_Relate. The work is sharded by the county
+of the lower precinct_id of each pair; the neighbor may sit in any county,
+so edges across county lines are kept. Each pair is stored once
+(precinct_id < neighbor_id).
+
+Usage:
+    DATABASE_URL=<url> python 05c_adjacency.py [pipeline_run_id] [--profile] [--county 037,059] [--workers N]
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).parent))
+import config as cfg
+from db_engine import pipeline_engine
+from profiling import current_stage, resolve_run_id, run_stage
+from sharding import parse_shard_options, run_sharded, select_counties, shard_engine, state_counties
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+log = logging.getLogger(__name__)
+
+
+def build_county_edges(county_fips: str, run_id=None) -> int:
+    """Shard: replace the edges whose lower precinct lies in one county."""
+    params = {"state_fips": cfg.STATE_FIPS, "county_fips": county_fips, "run_id": run_id}
+    with shard_engine().begin() as conn:
+        conn.execute(text(f"""
+            DELETE FROM precinct_adjacency e
+            USING {cfg.PRECINCTS_TABLE} p
+            WHERE e.state_fips = :state_fips
+              AND p.state_fips = :state_fips AND p.county_fips = :county_fips
+              AND e.precinct_id = p.precinct_id
+        """), params)
+        # '****1****': the boundaries meet in a line; 'T********': the
+        # interiors overlap (sloppy digitizing), which is also contiguity
+        inserted = conn.execute(text(f"""
+            INSERT INTO precinct_adjacency (state_fips, precinct_id, neighbor_id, shared_m, pipeline_run_id)
+            SELECT :state_fips, a.precinct_id, b.precinct_id,
+                   COALESCE(ST_Length(ST_CollectionExtract(
+                       ST_Intersection(ST_Boundary(a.geom), ST_Boundary(b.geom)), 2)::geography), 0),
+                   :run_id
+            FROM {cfg.PRECINCTS_TABLE} a
+            JOIN {cfg.PRECINCTS_TABLE} b
+              ON b.state_fips = :state_fips
+             AND b.precinct_id > a.precinct_id
+             AND b.geom && a.geom
+            WHERE a.state_fips = :state_fips AND a.county_fips = :county_fips
+              AND a.geom IS NOT NULL
+              AND (ST_Relate(a.geom, b.geom, '****1****') OR ST_Relate(a.geom, b.geom, 'T********'))
+        """), params).rowcount
+    log.info("County %s — %d edges.", county_fips, inserted)
+    return inserted
+
+
+def main():
+    options = parse_shard_options()
+    run_id = resolve_run_id()
+    engine = pipeline_engine()
+    counties = select_counties(state_counties(engine), options)
+    stage = current_stage()
+
+    if options.counties is None:
+        # Full rebuild: also drops edges of precincts that no longer exist
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM precinct_adjacency WHERE state_fips = :state_fips"),
+                         {"state_fips": cfg.STATE_FIPS})
+
+    with stage.step("edges"):
+        results = run_sharded(build_county_edges, counties, options, {c: run_id for c in counties})
+
+    with engine.connect() as conn:
+        stage.rows_in = conn.execute(text(f"""
+            SELECT count(*) FROM {cfg.PRECINCTS_TABLE} WHERE state_fips = :state_fips AND geom IS NOT NULL
+        """), {"state_fips": cfg.STATE_FIPS}).scalar()
+    stage.rows_out = sum(results.values())
+    stage.details["adjacency"] = {"counties": len(counties), "edges": stage.rows_out}
+    log.info("Script 05c complete — %d adjacency edges over %d precincts.", stage.rows_out, stage.rows_in)
+
+
+if __name__ == "__main__":
+    run_stage("05c_adjacency", main)
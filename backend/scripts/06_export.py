@@ -1,31 +1,49 @@
 """
 Script 06 — Export CSV snapshot of scored precincts and record pipeline_run audit.
 
-Creates data/output/precincts_YYYYMMDD.csv and updates the pipeline_runs row
-for this run (status=success, precincts_scored=N, finished_at=NOW()).
+Creates data/output/precincts_YYYYMMDD.csv, the per-run attribute arrays used
+for client-side filtering (data/output/attributes/<run_id>.bin), the vector
+tile pyramid as a PMTiles archive (data/output/tiles/<run_id>.pmtiles),
+the run's score history (data/output/history/<run_id>.parquet), CSV, gzipped
+CSV and Parquet export bundles for the common /api/export/csv filters
+(data/output/exports/<run_id>/), a Parquet snapshot of the published
+precincts and election results for the API's DuckDB analytics engine
+(data/output/analytics/<run_id>/),
+rebuilds the pre-encoded GeoJSON Features in precinct_features, and updates
+the pipeline_runs row for this run (status=success, precincts_scored=N,
+finished_at=NOW()).
 
 Usage:
-    DATABASE_URL=<url> python 06_export.py <pipeline_run_id>
+    DATABASE_URL=<url> python 06_export.py <pipeline_run_id> [--profile]
 """
 
-import os
 import sys
+import csv
+import gzip
+import io
 import json
+import shutil
+import struct
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, text
+from pmtiles.tile import Compression, TileType, zxy_to_tileid
+from pmtiles.writer import Writer
+from sqlalchemy import text
 
 sys.path.insert(0, str(Path(__file__).parent))
 import config as cfg
+from db_engine import pipeline_engine
+from profiling import current_stage, resolve_run_id, run_stage
+from app.artifacts import export_bundle_name                         # backend/ is on sys.path via db_engine
+from app.features import GEOMETRY_MODES, PRECISIONS, feature_sql
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 log = logging.getLogger(__name__)
 
-DATABASE_URL = os.environ["DATABASE_URL"]
-
 EXPORT_COLUMNS = [
     "precinct_id", "county_name", "cd_number",
     "total_pop", "pop_18_29", "youth_share",
@@ -38,13 +56,13 @@ def export_csv(engine, output_path: Path) -> int:
     """Export scored precincts to CSV, return row count."""
     cols = ", ".join(EXPORT_COLUMNS)
     sql = text(f"""
-        SELECT {cols} FROM precincts
-        WHERE score IS NOT NULL
+        SELECT {cols} FROM {cfg.PRECINCTS_TABLE}
+        WHERE state_fips = :state_fips AND score IS NOT NULL
         ORDER BY score DESC NULLS LAST
     """)
 
     with engine.connect() as conn:
-        df = pd.read_sql(sql, conn)
+        df = pd.read_sql(sql, conn, params={"state_fips": cfg.STATE_FIPS})
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(output_path, index=False)
@@ -52,8 +70,340 @@ def export_csv(engine, output_path: Path) -> int:
     return len(df)
 
 
+def export_bundles(engine, output_dir: Path) -> int:
+    """
+    Pre-render the exports /api/export/csv serves from disk: for each
+    cfg.EXPORT_BUNDLE_THRESHOLDS pair, statewide and per district, for all
+    tiers and each tier, as CSV, CSV.gz and Parquet (the plain CSV lets clients
+    that don't accept gzip get a file with Content-Length and Range support too).
+
+    Rows and their order are those of the live query (NULL youth_share or
+    dem_margin never pass a threshold; score DESC NULLS LAST), and CSV lines
+    are written by the same csv.writer from the same values, so a bundle is
+    byte-for-byte the live response. Each line is encoded once and reused by
+    every bundle that contains it.
+    """
+    cols = ", ".join(EXPORT_COLUMNS)
+    sql = text(f"""
+        SELECT {cols} FROM {cfg.PRECINCTS_TABLE}
+        WHERE state_fips = :state_fips
+        ORDER BY score DESC NULLS LAST, precinct_id
+    """)
+    with engine.connect() as conn:
+        rows = conn.execute(sql, {"state_fips": cfg.STATE_FIPS}).all()
+
+    line = io.StringIO()
+    writer = csv.writer(line)
+    writer.writerow(EXPORT_COLUMNS)
+    header = line.getvalue().encode()
+    lines = []
+    for row in rows:
+        line.seek(0)
+        line.truncate(0)
+        writer.writerow(row)
+        lines.append(line.getvalue().encode())
+
+    df = pd.DataFrame(rows, columns=EXPORT_COLUMNS)
+    for col in ("cd_number", "total_pop", "pop_18_29", "dem_votes", "rep_votes", "total_votes"):
+        df[col] = df[col].astype("Int64")
+    youth = df["youth_share"].to_numpy(dtype=float, na_value=np.nan)
+    margin = df["dem_margin"].to_numpy(dtype=float, na_value=np.nan)
+    cd = df["cd_number"].to_numpy(dtype=float, na_value=np.nan)
+    tier_col = df["tier"].to_numpy(dtype=object)
+    districts = [None] + sorted(int(d) for d in df["cd_number"].dropna().unique())
+    tiers = [None] + list(cfg.TIER_CODES)
+
+    tmp_dir = output_dir.with_name(output_dir.name + ".tmp")
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for youth_min, margin_floor in cfg.EXPORT_BUNDLE_THRESHOLDS:
+        passes = (youth >= youth_min) & (margin >= margin_floor)
+        for district in districts:
+            in_district = passes & (cd == district) if district is not None else passes
+            for tier in tiers:
+                mask = in_district & (tier_col == tier) if tier is not None else in_district
+                idx = np.flatnonzero(mask)
+                with open(tmp_dir / export_bundle_name(youth_min, margin_floor, district, tier, "csv"), "wb") as f:
+                    f.write(header)
+                    f.writelines(lines[i] for i in idx)
+                name = export_bundle_name(youth_min, margin_floor, district, tier, "csv.gz")
+                with gzip.GzipFile(tmp_dir / name, "wb", mtime=0) as f:
+                    f.write(header)
+                    f.writelines(lines[i] for i in idx)
+                df.iloc[idx].to_parquet(
+                    tmp_dir / export_bundle_name(youth_min, margin_floor, district, tier, "parquet"),
+                    engine="pyarrow", compression="zstd", index=False,
+                )
+                count += 1
+
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    tmp_dir.replace(output_dir)
+    log.info("Wrote %d export bundles (CSV, CSV.gz + Parquet) to %s", count, output_dir)
+    return count
+
+
+ANALYTICS_INTEGER_COLUMNS = ["cd_number", "total_pop", "pop_18_29", "dem_votes", "rep_votes", "total_votes"]
+
+
+def export_analytics_snapshot(engine, output_dir: Path) -> dict:
+    """
+    Snapshot the state's published rows for app/analytics.py: precincts with
+    their bounding box and simplified geometry as WKB, and every contest's
+    election results. Columns keep their PostgreSQL types (doubles stay
+    doubles), so DuckDB reproduces the live query results exactly.
+    """
+    params = {"state_fips": cfg.STATE_FIPS}
+    with engine.connect() as conn:
+        precincts = pd.read_sql(text(f"""
+            SELECT precinct_id, county_fips, county_name, cd_number,
+                   total_pop, pop_18_29, youth_share,
+                   dem_votes, rep_votes, total_votes, dem_pct, dem_margin,
+                   score, tier,
+                   ST_XMin(geom) AS xmin, ST_YMin(geom) AS ymin, ST_XMax(geom) AS xmax, ST_YMax(geom) AS ymax,
+                   ST_AsBinary(geom_simplified) AS geom
+            FROM {cfg.PRECINCTS_TABLE}
+            WHERE state_fips = :state_fips
+            ORDER BY score DESC NULLS LAST, precinct_id
+        """), conn, params=params)
+        results = pd.read_sql(text("""
+            SELECT precinct_id, election_date, contest_name,
+                   dem_votes, rep_votes, total_votes, dem_pct, dem_margin
+            FROM election_results
+            WHERE state_fips = :state_fips
+            ORDER BY contest_name, precinct_id
+        """), conn, params=params)
+
+    precincts[ANALYTICS_INTEGER_COLUMNS] = precincts[ANALYTICS_INTEGER_COLUMNS].astype("Int64")
+    precincts["geom"] = precincts["geom"].map(lambda g: None if g is None else bytes(g))
+
+    tmp_dir = output_dir.with_name(output_dir.name + ".tmp")
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    precincts.to_parquet(tmp_dir / "precincts.parquet", engine="pyarrow", compression="zstd", index=False)
+    results.to_parquet(tmp_dir / "election_results.parquet", engine="pyarrow", compression="zstd", index=False)
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    tmp_dir.replace(output_dir)
+
+    log.info("Wrote analytics snapshot (%d precincts, %d election results) to %s",
+             len(precincts), len(results), output_dir)
+    return {"precincts": len(precincts), "election_results": len(results)}
+
+
+# Binary attribute artifact: little-endian header followed by one typed-array
+# column per attribute. Float columns precede the uint8 columns so every column
+# starts 4-byte aligned and can be wrapped in a JS typed array without copying.
+ATTRIBUTES_MAGIC   = b"YVA1"
+ATTRIBUTES_VERSION = 1
+ATTRIBUTES_HEADER  = struct.Struct("<4sIII")   # magic, version, run_id, count
+
+
+def export_attributes(engine, run_id: int, output_path: Path) -> int:
+    """
+    Write the filterable precinct attributes as columnar typed arrays.
+
+    Layout after the 16-byte header (count = N):
+        id          uint32[N]   precincts.id — the map feature id
+        youth_share float32[N]  NaN when unknown
+        dem_margin  float32[N]  NaN when unknown
+        score       float32[N]  NaN when unscored
+        tier        uint8[N]    cfg.TIER_CODES, 0 when unscored
+        cd_number   uint8[N]    0 when unassigned
+    """
+    sql = text(f"""
+        SELECT id, youth_share, dem_margin, score, tier, cd_number
+        FROM {cfg.PRECINCTS_TABLE}
+        WHERE state_fips = :state_fips
+        ORDER BY id
+    """)
+    with engine.connect() as conn:
+        df = pd.read_sql(sql, conn, params={"state_fips": cfg.STATE_FIPS})
+
+    count = len(df)
+    tier_codes = df["tier"].map(cfg.TIER_CODES).fillna(0)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(ATTRIBUTES_HEADER.pack(ATTRIBUTES_MAGIC, ATTRIBUTES_VERSION, run_id, count))
+        f.write(df["id"].to_numpy(dtype="<u4").tobytes())
+        for col in ("youth_share", "dem_margin", "score"):
+            f.write(df[col].to_numpy(dtype="<f4", na_value=np.nan).tobytes())
+        f.write(tier_codes.to_numpy(dtype="u1").tobytes())
+        f.write(df["cd_number"].fillna(0).to_numpy(dtype="u1").tobytes())
+    tmp_path.replace(output_path)
+
+    log.info("Wrote attribute arrays for %d precincts to %s", count, output_path)
+    return count
+
+
+def export_history(engine, run_id: int, output_path: Path) -> int:
+    """
+    Append this run to the score history: one Parquet file per run with the
+    columns /api/runs/{a}/diff/{b} compares. Floats are stored as float32 and
+    tier as a dictionary column, zstd-compressed — a few bytes per precinct.
+    """
+    sql = text(f"""
+        SELECT precinct_id, score, tier, youth_share, dem_margin
+        FROM {cfg.PRECINCTS_TABLE}
+        WHERE state_fips = :state_fips
+        ORDER BY precinct_id
+    """)
+    with engine.connect() as conn:
+        df = pd.read_sql(sql, conn, params={"state_fips": cfg.STATE_FIPS})
+    for col in ("score", "youth_share", "dem_margin"):
+        df[col] = df[col].astype("float32")
+    df["tier"] = df["tier"].astype(pd.CategoricalDtype(list(cfg.TIER_CODES)))
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(".tmp")
+    df.to_parquet(tmp_path, engine="pyarrow", compression="zstd", index=False)
+    tmp_path.replace(output_path)
+
+    log.info("Wrote score history for %d precincts to %s", len(df), output_path)
+    return len(df)
+
+
+# Web Mercator half-width; tile x/y ranges are derived from it per zoom
+MERCATOR_ORIGIN = 20037508.342789244
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+STRING_COLUMNS = {"precinct_id", "county_name", "tier"}
+
+
+def export_tiles(engine, run_id: int, output_path: Path) -> int:
+    """
+    Render the precinct tile pyramid (cfg.TILE_MIN_ZOOM..TILE_MAX_ZOOM) into
+    one PMTiles archive. Every feature carries EXPORT_COLUMNS and the map
+    feature id (precincts.id), so the map never needs the API for styling.
+
+    Geometries are projected to EPSG:3857 once into a GiST-indexed temp
+    table; each zoom then lists the tiles the precinct bboxes touch and
+    renders them with ST_AsMVT in a single streamed query. Returns the
+    number of tiles written.
+    """
+    cols = ", ".join(f"t.{c}" for c in EXPORT_COLUMNS)
+    params = {"state_fips": cfg.STATE_FIPS}
+    tiles = 0
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(".tmp")
+    with engine.begin() as conn, open(tmp_path, "wb") as f:
+        conn.execute(text(f"""
+            CREATE TEMP TABLE tile_source ON COMMIT DROP AS
+            SELECT p.id, {", ".join(f"p.{c}" for c in EXPORT_COLUMNS)},
+                   ST_Transform(p.geom, 3857) AS geom,
+                   ST_Transform(COALESCE(p.geom_simplified, p.geom), 3857) AS geom_simplified
+            FROM {cfg.PRECINCTS_TABLE} p
+            WHERE p.state_fips = :state_fips AND p.geom IS NOT NULL
+        """), params)
+        conn.execute(text("CREATE INDEX ON tile_source USING GIST (geom)"))
+        conn.execute(text("ANALYZE tile_source"))
+        bounds = conn.execute(text("""
+            SELECT ST_XMin(e), ST_YMin(e), ST_XMax(e), ST_YMax(e)
+            FROM (SELECT ST_Transform(ST_SetSRID(ST_Extent(geom)::geometry, 3857), 4326) AS e FROM tile_source) x
+        """)).one()
+
+        writer = Writer(f)
+        for z in range(cfg.TILE_MIN_ZOOM, cfg.TILE_MAX_ZOOM + 1):
+            geom_col = "geom_simplified" if z <= cfg.TILE_SIMPLIFIED_MAX_ZOOM else "geom"
+            rows = conn.execution_options(stream_results=True, yield_per=500).execute(text(f"""
+                WITH tile_ids AS (
+                    SELECT DISTINCT x, y
+                    FROM tile_source s
+                    CROSS JOIN LATERAL generate_series(
+                        floor((ST_XMin(s.geom) + :origin) / :size)::int,
+                        floor((ST_XMax(s.geom) + :origin) / :size)::int) AS x
+                    CROSS JOIN LATERAL generate_series(
+                        floor((:origin - ST_YMax(s.geom)) / :size)::int,
+                        floor((:origin - ST_YMin(s.geom)) / :size)::int) AS y
+                )
+                SELECT i.x, i.y, (
+                    SELECT ST_AsMVT(mvt, '{cfg.TILE_LAYER}', {TILE_EXTENT}, 'geom', 'id')
+                    FROM (
+                        SELECT t.id, {cols},
+                               ST_AsMVTGeom(t.{geom_col}, ST_TileEnvelope(:z, i.x, i.y),
+                                            {TILE_EXTENT}, {TILE_BUFFER}, true) AS geom
+                        FROM tile_source t
+                        WHERE t.geom && ST_TileEnvelope(:z, i.x, i.y, margin => {TILE_BUFFER / TILE_EXTENT})
+                    ) mvt
+                    WHERE mvt.geom IS NOT NULL
+                ) AS tile
+                FROM tile_ids i
+            """), {"z": z, "origin": MERCATOR_ORIGIN, "size": 2 * MERCATOR_ORIGIN / 2 ** z})
+            zoom_tiles = 0
+            for x, y, tile in rows:
+                if tile:
+                    writer.write_tile(zxy_to_tileid(z, x, y), gzip.compress(bytes(tile)))
+                    zoom_tiles += 1
+            log.info("  z%-2d %7d tiles", z, zoom_tiles)
+            tiles += zoom_tiles
+
+        if tiles:
+            min_lon, min_lat, max_lon, max_lat = bounds
+            writer.finalize(
+                {
+                    "tile_type": TileType.MVT,
+                    "tile_compression": Compression.GZIP,
+                    "min_lon_e7": int(min_lon * 1e7), "min_lat_e7": int(min_lat * 1e7),
+                    "max_lon_e7": int(max_lon * 1e7), "max_lat_e7": int(max_lat * 1e7),
+                },
+                {
+                    "name": f"precincts_{cfg.STATE_ABBR.lower()}",
+                    "pipeline_run_id": run_id,
+                    "vector_layers": [{
+                        "id": cfg.TILE_LAYER,
+                        "minzoom": cfg.TILE_MIN_ZOOM,
+                        "maxzoom": cfg.TILE_MAX_ZOOM,
+                        "fields": {c: "String" if c in STRING_COLUMNS else "Number" for c in EXPORT_COLUMNS},
+                    }],
+                },
+            )
+    if not tiles:
+        tmp_path.unlink()
+        log.warning("No precinct geometries — no tile archive written.")
+        return 0
+    tmp_path.replace(output_path)
+
+    log.info("Wrote %d tiles (z%d–z%d) to %s", tiles, cfg.TILE_MIN_ZOOM, cfg.TILE_MAX_ZOOM, output_path)
+    return tiles
+
+
+def store_feature_fragments(engine) -> int:
+    """
+    Encode every precinct once per list geometry mode and coordinate
+    precision into precinct_features, replacing the state's previous
+    fragments in one transaction. Each fragment records the pipeline_run_id
+    of the row it encodes; the list route ignores it once a later run has
+    re-tagged the precinct. Returns the number of fragments written.
+    """
+    written = 0
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM precinct_features WHERE state_fips = :state_fips"),
+                     {"state_fips": cfg.STATE_FIPS})
+        for mode in GEOMETRY_MODES:
+            for precision in PRECISIONS:
+                written += conn.execute(text(f"""
+                    INSERT INTO precinct_features
+                        (state_fips, precinct_id, geometry_mode, coord_precision, feature, pipeline_run_id)
+                    SELECT p.state_fips, p.precinct_id, :mode, :precision, {feature_sql(mode, precision)}::text,
+                           p.pipeline_run_id
+                    FROM {cfg.PRECINCTS_TABLE} p
+                    WHERE p.state_fips = :state_fips AND p.score IS NOT NULL
+                """), {"state_fips": cfg.STATE_FIPS, "mode": mode, "precision": precision}).rowcount
+    log.info("Stored %d pre-encoded features (%d modes x %d precisions).",
+             written, len(GEOMETRY_MODES), len(PRECISIONS))
+    return written
+
+
 def mark_pipeline_success(engine, run_id: int, precincts_scored: int) -> None:
+    """
+    Record the run's results and mark it successful. A run claimed by
+    pipeline_worker.py (worker_id set) stays running: stages after 06 still
+    have to pass, and the worker marks it successful once the last one has.
+    """
     config_snapshot = {
+        "state_fips": cfg.STATE_FIPS,
         "youth_share_min": cfg.YOUTH_SHARE_MIN,
         "dem_margin_floor": cfg.DEM_MARGIN_FLOOR,
         "score_weights": cfg.SCORE_WEIGHTS,
@@ -64,34 +414,50 @@ def mark_pipeline_success(engine, run_id: int, precincts_scored: int) -> None:
     with engine.begin() as conn:
         conn.execute(text("""
             UPDATE pipeline_runs
-            SET status           = 'success',
+            SET status           = CASE WHEN worker_id IS NULL THEN 'success' ELSE status END,
+                state_fips       = :state_fips,
                 precincts_scored = :precincts_scored,
                 config_snapshot  = :config_snapshot,
-                finished_at      = :finished_at
+                finished_at      = CASE WHEN worker_id IS NULL THEN :finished_at ELSE finished_at END
             WHERE id = :run_id
         """), {
             "run_id": run_id,
+            "state_fips": cfg.STATE_FIPS,
             "precincts_scored": precincts_scored,
             "config_snapshot": json.dumps(config_snapshot),
             "finished_at": datetime.now(timezone.utc),
         })
-    log.info("Pipeline run %d marked as success.", run_id)
+    log.info("Pipeline run %d results recorded.", run_id)
 
 
 def main():
-    if len(sys.argv) < 2:
+    pipeline_run_id = resolve_run_id()
+    if pipeline_run_id is None:
         log.error("Usage: python 06_export.py <pipeline_run_id>")
         sys.exit(1)
-
-    pipeline_run_id = int(sys.argv[1])
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    engine = pipeline_engine()
 
     output_path = Path(cfg.OUTPUT_DIR) / cfg.EXPORT_FILENAME
-    n = export_csv(engine, output_path)
+    stage = current_stage()
+    with stage.step("export_csv"):
+        n = export_csv(engine, output_path)
+    with stage.step("export_attributes"):
+        export_attributes(engine, pipeline_run_id, Path(cfg.ATTRIBUTES_DIR) / f"{pipeline_run_id}.bin")
+    with stage.step("export_bundles"):
+        stage.details["export_bundles"] = export_bundles(engine, Path(cfg.EXPORTS_DIR) / str(pipeline_run_id))
+    with stage.step("analytics_snapshot"):
+        stage.details["analytics_snapshot"] = export_analytics_snapshot(engine, Path(cfg.ANALYTICS_DIR) / str(pipeline_run_id))
+    with stage.step("export_history"):
+        export_history(engine, pipeline_run_id, Path(cfg.HISTORY_DIR) / f"{pipeline_run_id}.parquet")
+    with stage.step("export_tiles"):
+        stage.details["tiles"] = export_tiles(engine, pipeline_run_id, Path(cfg.TILES_DIR) / f"{pipeline_run_id}.pmtiles")
+    with stage.step("feature_fragments"):
+        stage.details["feature_fragments"] = store_feature_fragments(engine)
+    stage.rows_out += n
     mark_pipeline_success(engine, pipeline_run_id, n)
 
     log.info("Script 06 complete — pipeline run %d finished.", pipeline_run_id)
 
 
 if __name__ == "__main__":
-    main()
+    run_stage("06_export", main)
@@ -0,0 +1,138 @@
+"""
+Script 07 — Post-publish physical maintenance of the state's partition.
+
+Rows land in load order and every pipeline UPDATE pass scatters them
+further, so a viewport or district query touches many more heap pages than
+it returns rows. This stage rewrites the partition in geohash order of each
+precinct's point-on-surface (cfg.MAINTENANCE_GEOHASH_PRECISION), with
+fillfactor cfg.MAINTENANCE_FILLFACTOR, into precincts_<fips>_next and swaps
+it in (see partitions.py) — reads keep using the old copy until the swap
+instead of waiting on a CLUSTER lock. It then runs VACUUM ANALYZE.
+
+The benchmark query shapes (bbox viewport, district list, county list) are
+EXPLAIN (ANALYZE, BUFFERS)-ed before and after; buffer hits/reads, execution
+time and heap size land in pipeline_run_stages.details ("maintenance").
+
+Usage:
+    DATABASE_URL=<url> python 07_maintenance.py [pipeline_run_id] [--profile]
+"""
+
+import sys
+import json
+import logging
+from pathlib import Path
+
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).parent))
+import config as cfg
+from db_engine import pipeline_engine
+from partitions import partition_name, prepare_staging, swap_partition, vacuum_partition
+from profiling import current_stage, run_stage
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+log = logging.getLogger(__name__)
+
+LAYOUT_ORDER = f"ST_GeoHash(ST_PointOnSurface(geom), {cfg.MAINTENANCE_GEOHASH_PRECISION}) NULLS LAST, id"
+
+# Same shapes as the API's list queries; the parameters are fixed once per
+# run so before and after measure identical work.
+BENCHMARK_QUERIES = {
+    "viewport": """
+        SELECT precinct_id, score, tier, geom_simplified FROM precincts
+        WHERE state_fips = :state_fips AND geom && ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326)
+    """,
+    "district": """
+        SELECT precinct_id, score, tier, geom_simplified FROM precincts
+        WHERE state_fips = :state_fips AND cd_number = :cd_number
+        ORDER BY score DESC NULLS LAST
+    """,
+    "county": """
+        SELECT precinct_id, score, tier, geom_simplified FROM precincts
+        WHERE state_fips = :state_fips AND county_fips = :county_fips
+        ORDER BY score DESC NULLS LAST
+    """,
+}
+
+
+def benchmark_params(conn) -> dict:
+    """A viewport around the top-scored precinct, its district and its county."""
+    half = cfg.MAINTENANCE_VIEWPORT_DEG / 2
+    row = conn.execute(text("""
+        SELECT ST_X(pt) AS x, ST_Y(pt) AS y, cd_number, county_fips
+        FROM (
+            SELECT ST_PointOnSurface(geom) AS pt, cd_number, county_fips
+            FROM precincts
+            WHERE state_fips = :state_fips AND geom IS NOT NULL
+            ORDER BY score DESC NULLS LAST
+            LIMIT 1
+        ) top
+    """), {"state_fips": cfg.STATE_FIPS}).one()
+    return {
+        "state_fips": cfg.STATE_FIPS,
+        "minx": row.x - half, "miny": row.y - half, "maxx": row.x + half, "maxy": row.y + half,
+        "cd_number": row.cd_number,
+        "county_fips": row.county_fips,
+    }
+
+
+def measure(engine, params: dict) -> dict:
+    """Buffer usage and timing of each benchmark query, plus the partition's heap size."""
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in BENCHMARK_QUERIES.items():
+            plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()
+            plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]
+            top = plan["Plan"]
+            results[name] = {
+                "rows": top.get("Actual Rows", 0),
+                "shared_hit_blocks": top.get("Shared Hit Blocks", 0),
+                "shared_read_blocks": top.get("Shared Read Blocks", 0),
+                "pages_touched": top.get("Shared Hit Blocks", 0) + top.get("Shared Read Blocks", 0),
+                "execution_ms": round(plan.get("Execution Time", 0.0), 2),
+            }
+        results["heap_bytes"] = conn.execute(
+            text("SELECT pg_relation_size(:name)"), {"name": partition_name(cfg.STATE_FIPS)}
+        ).scalar()
+    return results
+
+
+def main():
+    engine = pipeline_engine()
+    stage = current_stage()
+    live = partition_name(cfg.STATE_FIPS)
+
+    with engine.connect() as conn:
+        stage.rows_in = conn.execute(text(f"SELECT count(*) FROM {live}")).scalar()
+        if not stage.rows_in:
+            log.warning("%s is empty — nothing to maintain.", live)
+            return
+        params = benchmark_params(conn)
+
+    with stage.step("measure_before"):
+        before = measure(engine, params)
+    with stage.step("reorder"):
+        prepare_staging(engine, cfg.STATE_FIPS, order_by=LAYOUT_ORDER, fillfactor=cfg.MAINTENANCE_FILLFACTOR)
+        swap_partition(engine, cfg.STATE_FIPS)
+    with stage.step("vacuum_analyze"):
+        vacuum_partition(engine, cfg.STATE_FIPS)
+    with stage.step("measure_after"):
+        after = measure(engine, params)
+
+    stage.rows_out = stage.rows_in
+    stage.details["maintenance"] = {
+        "order": LAYOUT_ORDER,
+        "fillfactor": cfg.MAINTENANCE_FILLFACTOR,
+        "benchmark_params": params,
+        "before": before,
+        "after": after,
+    }
+    for name in BENCHMARK_QUERIES:
+        log.info("  %-8s pages %6d → %6d   %8.2f ms → %8.2f ms", name,
+                 before[name]["pages_touched"], after[name]["pages_touched"],
+                 before[name]["execution_ms"], after[name]["execution_ms"])
+    log.info("Script 07 complete — %s rewritten (%d → %d heap bytes).", live, before["heap_bytes"], after["heap_bytes"])
+
+
+if __name__ == "__main__":
+    run_stage("07_maintenance", main)
@@ -0,0 +1,150 @@
+"""
+Census Data API client for 01_fetch_census.py (CENSUS_SOURCE=api).
+
+Fetches only the P12 columns the pipeline uses (cfg.CENSUS_API_VARS) at
+voting-district level, one request per county, so a new vintage is a few MB
+of JSON instead of the full NHGIS block extract:
+
+    GET {CENSUS_API_URL}/{dataset}?get=NAME,P12_001N,...
+        &for=voting district:*&in=state:06 county:037&key=...
+
+Requests run on a bounded thread pool (cfg.CENSUS_API_WORKERS). 429 and 5xx
+responses are retried with exponential backoff, honouring Retry-After. Every
+successful response is cached on disk under cfg.CENSUS_API_CACHE_DIR, keyed
+by URL and query without the API key, so re-runs and partial retries cost
+no requests. Point CENSUS_API_URL at bench/mock_census_api.py to run offline.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import requests
+
+import config as cfg
+
+log = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CensusAPIError(RuntimeError):
+    """A request still failed after all retries."""
+
+
+class CensusClient:
+    def __init__(
+        self,
+        base_url: str = cfg.CENSUS_API_URL,
+        dataset: str = cfg.CENSUS_API_DATASET,
+        key: str = cfg.CENSUS_API_KEY,
+        cache_dir: Optional[str] = cfg.CENSUS_API_CACHE_DIR,
+        workers: int = cfg.CENSUS_API_WORKERS,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        timeout: float = 60.0,
+    ):
+        self.url = f"{base_url.rstrip('/')}/{dataset}"
+        self.key = key
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.requests_made = 0
+        self.cache_hits = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        # One session (connection pool) per worker thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _cache_path(self, params: dict) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        digest = hashlib.sha256(json.dumps([self.url, sorted(params.items())]).encode()).hexdigest()
+        return self.cache_dir / f"{digest[:32]}.json"
+
+    def get(self, params: dict) -> list[list[str]]:
+        """
+        Rows of one API call (first row is the header; [] when the API has
+        no data for the geography), from cache when present.
+        """
+        cache_path = self._cache_path(params)
+        if cache_path is not None and cache_path.exists():
+            with self._lock:
+                self.cache_hits += 1
+            return json.loads(cache_path.read_text())
+
+        query = {**params, "key": self.key} if self.key else params
+        for attempt in range(self.max_retries + 1):
+            with self._lock:
+                self.requests_made += 1
+            try:
+                resp = self._session().get(self.url, params=query, timeout=self.timeout)
+            except requests.ConnectionError as exc:
+                error, retry_after = exc, None
+            else:
+                if resp.status_code not in RETRY_STATUSES:
+                    resp.raise_for_status()
+                    # "No data" for the geography comes back as 204 / an empty body
+                    rows = resp.json() if resp.status_code != 204 and resp.content.strip() else []
+                    if cache_path is not None:
+                        cache_path.parent.mkdir(parents=True, exist_ok=True)
+                        tmp = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                        tmp.write_text(json.dumps(rows))
+                        tmp.replace(cache_path)
+                    return rows
+                error, retry_after = f"HTTP {resp.status_code}", resp.headers.get("Retry-After")
+            if attempt == self.max_retries:
+                break
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else (
+                self.backoff_seconds * 2 ** attempt * (1 + random.random() / 2)
+            )
+            log.warning("Census API %s (%s) — retry %d/%d in %.1fs",
+                        params.get("in", params.get("for")), error, attempt + 1, self.max_retries, delay)
+            time.sleep(delay)
+        raise CensusAPIError(f"Census API request failed after {self.max_retries} retries: {params} ({error})")
+
+    def county_names(self, state_fips: str) -> dict[str, str]:
+        """{5-char county FIPS: "Los Angeles County"} for one state."""
+        rows = self.get({"get": "NAME", "for": "county:*", "in": f"state:{state_fips}"})
+        if not rows:
+            return {}
+        header, body = rows[0], rows[1:]
+        i_name, i_state, i_county = header.index("NAME"), header.index("state"), header.index("county")
+        return {r[i_state] + r[i_county]: r[i_name].split(",")[0] for r in body}
+
+    def county_vtds(self, county_fips: str) -> pd.DataFrame:
+        """
+        One county's voting districts with the P12 variables, columns renamed
+        to the NHGIS codes so 01's aggregation code reads both sources.
+        """
+        rows = self.get({
+            "get": ",".join(cfg.CENSUS_API_VARS.values()),
+            "for": "voting district:*",
+            "in": f"state:{county_fips[:2]} county:{county_fips[2:]}",
+        })
+        if not rows:
+            rows = [[*cfg.CENSUS_API_VARS.values(), "state", "county", "voting district"]]
+        df = pd.DataFrame(rows[1:], columns=rows[0])
+        return df.rename(columns={
+            **{api: nhgis for nhgis, api in cfg.CENSUS_API_VARS.items()},
+            "state": "STATEA", "county": "COUNTYA", "voting district": "VTDI",
+        })
+
+    def fetch_counties(self, counties: list[str]) -> dict[str, pd.DataFrame]:
+        """county_vtds for every county, at most self.workers requests in flight."""
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="census-api") as pool:
+            return dict(zip(counties, pool.map(self.county_vtds, counties)))
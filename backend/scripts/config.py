@@ -3,13 +3,112 @@ Pipeline configuration — single source of truth for all thresholds and file pa
 """
 import os
 
+# --- State selection ---
+# Each pipeline run loads one state (STATE_FIPS env var, default California).
+# name = TIGER/Line directory name, e.g. .../STATE/06_CALIFORNIA/
+# pop_2020 = 2020 Census resident population (checked by 04b_validate.py)
+STATES = {
+    "01": {"abbr": "AL", "name": "ALABAMA",              "pop_2020": 5_024_279},
+    "02": {"abbr": "AK", "name": "ALASKA",               "pop_2020": 733_391},
+    "04": {"abbr": "AZ", "name": "ARIZONA",              "pop_2020": 7_151_502},
+    "05": {"abbr": "AR", "name": "ARKANSAS",             "pop_2020": 3_011_524},
+    "06": {"abbr": "CA", "name": "CALIFORNIA",           "pop_2020": 39_538_223},
+    "08": {"abbr": "CO", "name": "COLORADO",             "pop_2020": 5_773_714},
+    "09": {"abbr": "CT", "name": "CONNECTICUT",          "pop_2020": 3_605_944},
+    "10": {"abbr": "DE", "name": "DELAWARE",             "pop_2020": 989_948},
+    "11": {"abbr": "DC", "name": "DISTRICT_OF_COLUMBIA", "pop_2020": 689_545},
+    "12": {"abbr": "FL", "name": "FLORIDA",              "pop_2020": 21_538_187},
+    "13": {"abbr": "GA", "name": "GEORGIA",              "pop_2020": 10_711_908},
+    "15": {"abbr": "HI", "name": "HAWAII",               "pop_2020": 1_455_271},
+    "16": {"abbr": "ID", "name": "IDAHO",                "pop_2020": 1_839_106},
+    "17": {"abbr": "IL", "name": "ILLINOIS",             "pop_2020": 12_812_508},
+    "18": {"abbr": "IN", "name": "INDIANA",              "pop_2020": 6_785_528},
+    "19": {"abbr": "IA", "name": "IOWA",                 "pop_2020": 3_190_369},
+    "20": {"abbr": "KS", "name": "KANSAS",               "pop_2020": 2_937_880},
+    "21": {"abbr": "KY", "name": "KENTUCKY",             "pop_2020": 4_505_836},
+    "22": {"abbr": "LA", "name": "LOUISIANA",            "pop_2020": 4_657_757},
+    "23": {"abbr": "ME", "name": "MAINE",                "pop_2020": 1_362_359},
+    "24": {"abbr": "MD", "name": "MARYLAND",             "pop_2020": 6_177_224},
+    "25": {"abbr": "MA", "name": "MASSACHUSETTS",        "pop_2020": 7_029_917},
+    "26": {"abbr": "MI", "name": "MICHIGAN",             "pop_2020": 10_077_331},
+    "27": {"abbr": "MN", "name": "MINNESOTA",            "pop_2020": 5_706_494},
+    "28": {"abbr": "MS", "name": "MISSISSIPPI",          "pop_2020": 2_961_279},
+    "29": {"abbr": "MO", "name": "MISSOURI",             "pop_2020": 6_154_913},
+    "30": {"abbr": "MT", "name": "MONTANA",              "pop_2020": 1_084_225},
+    "31": {"abbr": "NE", "name": "NEBRASKA",             "pop_2020": 1_961_504},
+    "32": {"abbr": "NV", "name": "NEVADA",               "pop_2020": 3_104_614},
+    "33": {"abbr": "NH", "name": "NEW_HAMPSHIRE",        "pop_2020": 1_377_529},
+    "34": {"abbr": "NJ", "name": "NEW_JERSEY",           "pop_2020": 9_288_994},
+    "35": {"abbr": "NM", "name": "NEW_MEXICO",           "pop_2020": 2_117_522},
+    "36": {"abbr": "NY", "name": "NEW_YORK",             "pop_2020": 20_201_249},
+    "37": {"abbr": "NC", "name": "NORTH_CAROLINA",       "pop_2020": 10_439_388},
+    "38": {"abbr": "ND", "name": "NORTH_DAKOTA",         "pop_2020": 779_094},
+    "39": {"abbr": "OH", "name": "OHIO",                 "pop_2020": 11_799_448},
+    "40": {"abbr": "OK", "name": "OKLAHOMA",             "pop_2020": 3_959_353},
+    "41": {"abbr": "OR", "name": "OREGON",               "pop_2020": 4_237_256},
+    "42": {"abbr": "PA", "name": "PENNSYLVANIA",         "pop_2020": 13_002_700},
+    "44": {"abbr": "RI", "name": "RHODE_ISLAND",         "pop_2020": 1_097_379},
+    "45": {"abbr": "SC", "name": "SOUTH_CAROLINA",       "pop_2020": 5_118_425},
+    "46": {"abbr": "SD", "name": "SOUTH_DAKOTA",         "pop_2020": 886_667},
+    "47": {"abbr": "TN", "name": "TENNESSEE",            "pop_2020": 6_910_840},
+    "48": {"abbr": "TX", "name": "TEXAS",                "pop_2020": 29_145_505},
+    "49": {"abbr": "UT", "name": "UTAH",                 "pop_2020": 3_271_616},
+    "50": {"abbr": "VT", "name": "VERMONT",              "pop_2020": 643_077},
+    "51": {"abbr": "VA", "name": "VIRGINIA",             "pop_2020": 8_631_393},
+    "53": {"abbr": "WA", "name": "WASHINGTON",           "pop_2020": 7_705_281},
+    "54": {"abbr": "WV", "name": "WEST_VIRGINIA",        "pop_2020": 1_793_716},
+    "55": {"abbr": "WI", "name": "WISCONSIN",            "pop_2020": 5_893_718},
+    "56": {"abbr": "WY", "name": "WYOMING",              "pop_2020": 576_851},
+}
+STATE_FIPS = os.environ.get("STATE_FIPS", "06")
+STATE_ABBR = STATES[STATE_FIPS]["abbr"]
+STATE_NAME = STATES[STATE_FIPS]["name"]
+STATE_POPULATION = STATES[STATE_FIPS]["pop_2020"]
+
+# Table the pipeline writes precincts into. Defaults to the partitioned parent;
+# point it at a staging table (scripts/partitions.py prepare) to rebuild a
+# state off to the side and swap it in atomically.
+PRECINCTS_TABLE = os.environ.get("PRECINCTS_TABLE", "precincts")
+
+# Process pool size for the per-county stages (01, 04, 05; see sharding.py)
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", os.cpu_count() or 1))
+
+# Stage scripts of a full run, in order (pipeline_worker.py, bench/run_benchmarks.py)
+PIPELINE_STAGES = [
+    "01_fetch_census.py",
+    "02_fetch_shapefiles.py",
+    "03_fetch_election.py",
+    "04_crosswalk.py",
+    "04b_validate.py",
+    "05_merge_score.py",
+    "05b_aggregates.py",
+    "05c_adjacency.py",
+    "06_export.py",
+    "07_maintenance.py",
+]
+
+# A running stage upserts its pipeline_run_stages row (status=running, rows so
+# far) this often, for GET /api/pipeline/runs/{id}/events. The worker polls the
+# queue for new runs every PIPELINE_POLL_SECONDS.
+PIPELINE_PROGRESS_SECONDS = float(os.environ.get("PIPELINE_PROGRESS_SECONDS", 5))
+PIPELINE_POLL_SECONDS     = float(os.environ.get("PIPELINE_POLL_SECONDS", 5))
+
 # --- File paths (relative to backend/ working directory) ---
-RAW_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "raw")
+# RAW_DIR / OUTPUT_DIR can be overridden (e.g. to point at bench/ synthetic data)
+RAW_DIR = os.environ.get("RAW_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "raw"))
 
-NHGIS_BLOCK_CSV   = os.path.join(RAW_DIR, "nhgis", "nhgis0002_ds258_2020_block.csv")
-RDH_PRECINCT_CSV  = os.path.join(RAW_DIR, "rdh",   "ca_2024_gen_prec_csv.csv")
-BAF_CD_TXT        = os.path.join(RAW_DIR, "baf",   "BlockAssign_ST06_CA_CD.txt")
-CD_SHAPEFILE      = os.path.join(RAW_DIR, "cd",    "tl_2023_06_cd118.shp")
+# NHGIS extracts may cover several states; rows are filtered to STATE_FIPS.
+NHGIS_BLOCK_CSV   = os.environ.get("NHGIS_BLOCK_CSV", os.path.join(RAW_DIR, "nhgis", "nhgis0002_ds258_2020_block.csv"))
+RDH_PRECINCT_CSV  = os.path.join(RAW_DIR, "rdh",   f"{STATE_ABBR.lower()}_2024_gen_prec_csv.csv")
+BAF_CD_TXT        = os.path.join(RAW_DIR, "baf",   f"BlockAssign_ST{STATE_FIPS}_{STATE_ABBR}_CD.txt")
+CD_SHAPEFILE      = os.path.join(RAW_DIR, "cd",    f"tl_2023_{STATE_FIPS}_cd118.shp")
+VTD_SHAPEFILE     = os.path.join(RAW_DIR, "vtd",   f"tl_2020_{STATE_FIPS}_vtd20.shp")   # used instead of downloading when present
+
+# Statewide VTD shapefile (single zip, all counties)
+TIGER_VTD_URL = (
+    "https://www2.census.gov/geo/tiger/TIGER2020PL/STATE/"
+    f"{STATE_FIPS}_{STATE_NAME}/{STATE_FIPS}/tl_2020_{STATE_FIPS}_vtd20.zip"
+)
 
 # --- NHGIS variable codes (2020 Decennial DHC, Table P12 / U7S) ---
 # Male 18–29
@@ -29,6 +128,19 @@ RDH_COUNTYFP_COL  = "COUNTYFP"
 # --- Election metadata ---
 ELECTION_DATE    = "2024-11-05"
 ELECTION_CONTEST = "PRESIDENT OF THE UNITED STATES"
+ACS_VINTAGE      = int(os.environ.get("ACS_VINTAGE", 2020))   # Census vintage recorded with the demographics
+
+# --- Census demographics source (01_fetch_census.py) ---
+# nhgis: the bulk block CSV above; api: the Census Data API, VTD-level P12
+# columns per county (scripts/census_api.py)
+CENSUS_SOURCE        = os.environ.get("CENSUS_SOURCE", "nhgis")   # nhgis | api
+CENSUS_API_URL       = os.environ.get("CENSUS_API_URL", "https://api.census.gov/data")
+CENSUS_API_KEY       = os.environ.get("CENSUS_API_KEY", "")
+CENSUS_API_DATASET   = os.environ.get("CENSUS_API_DATASET", f"{ACS_VINTAGE}/dec/dhc")   # path under CENSUS_API_URL
+CENSUS_API_WORKERS   = int(os.environ.get("CENSUS_API_WORKERS", 8))   # concurrent requests
+CENSUS_API_CACHE_DIR = os.path.join(RAW_DIR, "census_api", str(ACS_VINTAGE))
+# NHGIS U7Sxxx code → API P12_xxxN name (same table, same cell order)
+CENSUS_API_VARS = {code: f"P12_{code[3:]}N" for code in [TOTAL_POP_VAR] + MALE_18_29_VARS + FEMALE_18_29_VARS}
 
 # --- Scoring thresholds ---
 YOUTH_SHARE_MIN  = 0.15    # Minimum 18–29 share to include precinct
@@ -46,9 +158,65 @@ TIERS = {
     "low":       {"score_min": 0.00, "color": "#c5cae9"},
 }
 
+# Compact tier codes for binary artifacts (0 = unscored)
+TIER_CODES = {"priority": 1, "target": 2, "watchlist": 3, "low": 4}
+
+# --- Validation (scripts/04b_validate.py) ---
+# Checked after the crosswalk, before scoring; any check past its threshold
+# fails the run. Rates are fractions of the state's precincts.
+# VALIDATION_MODE=warn logs failures without stopping (e.g. synthetic data).
+VALIDATION_MODE = os.environ.get("VALIDATION_MODE", "enforce")   # enforce | warn
+VALIDATION_THRESHOLDS = {
+    "min_demographics_match_rate": 0.95,   # precincts with VTD demographics
+    "min_cd_assigned_rate":        0.99,   # precincts with a congressional district
+    "min_election_match_rate":     0.90,   # precincts with an ELECTION_CONTEST result
+    "max_zero_population_rate":    0.10,   # parks, water and other empty VTDs
+    "max_null_youth_share_rate":   0.05,
+    "max_invalid_geometry_rate":   0.001,  # NOT ST_IsValid or NULL geom
+    "max_duplicate_keys":          0,      # repeated precinct_id in precincts / election results
+    "max_out_of_range_values":     0,      # shares outside [0, 1], margins outside [-1, 1], pop_18_29 > total_pop
+    "max_population_deviation":    0.01,   # |SUM(total_pop) / STATE_POPULATION - 1|
+}
+
 # Geometry simplification tolerance (~50m at CA latitude)
 SIMPLIFICATION_TOLERANCE = 0.0005
 
+# Low-zoom aggregates (scripts/05b_aggregates.py): dissolved county/district
+# outlines are simplified more coarsely than precincts (~500m); hexbin levels
+# are ST_HexagonGrid cell sizes in metres (EPSG:3857).
+AGGREGATE_SIMPLIFICATION_TOLERANCE = 0.005
+AGGREGATE_HEX_SIZES_M = {
+    "hex_25km": 25_000,
+    "hex_10km": 10_000,
+    "hex_4km":  4_000,
+}
+
+# Physical layout maintenance (scripts/07_maintenance.py): rows are rewritten
+# in geohash order of their point-on-surface (a Z-order curve, so nearby
+# precincts share pages), leaving 10% free per page so later in-place UPDATE
+# passes keep new row versions on the same page instead of scattering them.
+MAINTENANCE_GEOHASH_PRECISION = 10
+MAINTENANCE_FILLFACTOR        = 90
+MAINTENANCE_VIEWPORT_DEG      = 0.5   # side of the bbox benchmark query window
+
 # Output
-OUTPUT_DIR      = os.path.join(os.path.dirname(__file__), "..", "data", "output")
-EXPORT_FILENAME = f"precincts_{ELECTION_DATE.replace('-', '')}.csv"
+OUTPUT_DIR      = os.environ.get("OUTPUT_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "output"))
+EXPORT_FILENAME = f"precincts_{STATE_ABBR.lower()}_{ELECTION_DATE.replace('-', '')}.csv"
+ATTRIBUTES_DIR  = os.path.join(OUTPUT_DIR, "attributes")   # <run_id>.bin per pipeline run
+TILES_DIR       = os.path.join(OUTPUT_DIR, "tiles")        # <run_id>.pmtiles per pipeline run
+HISTORY_DIR     = os.path.join(OUTPUT_DIR, "history")      # <run_id>.parquet per pipeline run
+EXPORTS_DIR     = os.path.join(OUTPUT_DIR, "exports")      # <run_id>/ pre-rendered export bundles
+ANALYTICS_DIR   = os.path.join(OUTPUT_DIR, "analytics")    # <run_id>/ Parquet snapshot for the DuckDB engine
+
+# /api/export/csv threshold pairs (youth_min, margin_floor) pre-rendered by 06
+# for statewide / every district × every tier / all tiers: the endpoint's
+# defaults and the dashboard's initial filters. Other slider values are
+# streamed live.
+EXPORT_BUNDLE_THRESHOLDS = [(0.0, -1.0), (0.15, 0.0)]
+
+# Vector tile pyramid rendered by 06_export.py. Zooms up to
+# TILE_SIMPLIFIED_MAX_ZOOM draw geom_simplified (~50 m), deeper ones full geom.
+TILE_MIN_ZOOM            = int(os.environ.get("TILE_MIN_ZOOM", 4))
+TILE_MAX_ZOOM            = int(os.environ.get("TILE_MAX_ZOOM", 14))
+TILE_SIMPLIFIED_MAX_ZOOM = 11
+TILE_LAYER               = "precincts"
@@ -0,0 +1,24 @@
+"""
+Engine for the pipeline scripts — built by the same factory as the API's
+(app/engine.py), with a small pool and no statement timeout.
+
+DB_PGBOUNCER=true when DATABASE_URL points at PgBouncer in transaction mode;
+long stages are better pointed straight at PostgreSQL.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.engine import make_engine
+
+
+def pipeline_engine(pool_size: int = 2):
+    return make_engine(
+        os.environ["DATABASE_URL"],
+        pool_size=pool_size,
+        max_overflow=0,
+        pgbouncer=os.environ.get("DB_PGBOUNCER", "").lower() in ("1", "true", "yes"),
+        application_name=f"youthvoting-pipeline:{Path(sys.argv[0]).stem}",
+    )
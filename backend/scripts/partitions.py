@@ -0,0 +1,128 @@
+"""
+Per-state partition management for the list-partitioned precincts table.
+
+Each state lives in its own partition (precincts_<fips>) with partition-local
+GiST and score indexes, so a state can be loaded, rebuilt, swapped and
+vacuumed without touching any other state's rows.
+
+Rebuilding a state off to the side:
+    python scripts/partitions.py prepare 06      # copy live rows → precincts_06_next
+    PRECINCTS_TABLE=precincts_06_next STATE_FIPS=06 python scripts/02_fetch_shapefiles.py  # ... 05
+    python scripts/partitions.py swap 06         # atomically replace precincts_06
+
+Usage:
+    DATABASE_URL=<url> python partitions.py {create|prepare|swap|vacuum|drop} <state_fips>
+"""
+
+import re
+import sys
+import logging
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).parent))
+import config as cfg
+from db_engine import pipeline_engine
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+log = logging.getLogger(__name__)
+
+
+def partition_name(state_fips: str) -> str:
+    if not re.fullmatch(r"\d{2}", state_fips):
+        raise ValueError(f"Invalid state FIPS code: {state_fips!r}")
+    return f"precincts_{state_fips}"
+
+
+def ensure_state_partition(engine, state_fips: str) -> str:
+    """Create the state's partition if missing (indexes are inherited from the parent)."""
+    name = partition_name(state_fips)
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF precincts FOR VALUES IN ('{state_fips}')"
+        ))
+    return name
+
+
+def prepare_staging(
+    engine, state_fips: str, order_by: Optional[str] = None, fillfactor: Optional[int] = None
+) -> str:
+    """
+    Create precincts_<fips>_next as a copy of the live partition, ready to
+    rebuild. order_by writes the copy in that physical order (see
+    07_maintenance.py); fillfactor sets the new heap's page fill.
+    """
+    live = ensure_state_partition(engine, state_fips)
+    staging = f"{live}_next"
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+        conn.execute(text(f"CREATE TABLE {staging} (LIKE {live} INCLUDING ALL)"))
+        # Lets ATTACH PARTITION skip its validation scan. A live partition
+        # swapped in before swap_partition dropped this CHECK still has it,
+        # and LIKE ... INCLUDING ALL copies it under the same name.
+        conn.execute(text(f"ALTER TABLE {staging} DROP CONSTRAINT IF EXISTS {staging}_state"))
+        conn.execute(text(
+            f"ALTER TABLE {staging} ADD CONSTRAINT {staging}_state CHECK (state_fips = '{state_fips}')"
+        ))
+        if fillfactor is not None:
+            conn.execute(text(f"ALTER TABLE {staging} SET (fillfactor = {int(fillfactor)})"))
+        order = f" ORDER BY {order_by}" if order_by else ""
+        conn.execute(text(f"INSERT INTO {staging} SELECT * FROM {live}{order}"))
+    log.info("Prepared %s from %s.", staging, live)
+    return staging
+
+
+def swap_partition(engine, state_fips: str, keep_old: bool = False) -> None:
+    """Atomically replace the live partition with precincts_<fips>_next."""
+    live = partition_name(state_fips)
+    staging, old = f"{live}_next", f"{live}_old"
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {old}"))
+        conn.execute(text(f"ALTER TABLE precincts DETACH PARTITION {live}"))
+        conn.execute(text(f"ALTER TABLE {live} RENAME TO {old}"))
+        conn.execute(text(f"ALTER TABLE {staging} RENAME TO {live}"))
+        conn.execute(text(f"ALTER TABLE precincts ATTACH PARTITION {live} FOR VALUES IN ('{state_fips}')"))
+        # The partition bound enforces it from here on
+        conn.execute(text(f"ALTER TABLE {live} DROP CONSTRAINT IF EXISTS {staging}_state"))
+        if not keep_old:
+            conn.execute(text(f"DROP TABLE {old}"))
+    log.info("Swapped %s into precincts%s.", live, f" (previous kept as {old})" if keep_old else "")
+
+
+def vacuum_partition(engine, state_fips: str) -> None:
+    """VACUUM ANALYZE a single state's partition."""
+    name = partition_name(state_fips)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"VACUUM (ANALYZE) {name}"))
+    log.info("Vacuumed %s.", name)
+
+
+def drop_partition(engine, state_fips: str) -> None:
+    name = partition_name(state_fips)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    log.info("Dropped %s.", name)
+
+
+COMMANDS = {
+    "create": ensure_state_partition,
+    "prepare": prepare_staging,
+    "swap": swap_partition,
+    "vacuum": vacuum_partition,
+    "drop": drop_partition,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        log.error("Usage: python partitions.py {%s} [state_fips]", "|".join(COMMANDS))
+        sys.exit(1)
+    state_fips = sys.argv[2] if len(sys.argv) > 2 else cfg.STATE_FIPS
+    engine = pipeline_engine(pool_size=1)
+    COMMANDS[sys.argv[1]](engine, state_fips)
+
+
+if __name__ == "__main__":
+    main()
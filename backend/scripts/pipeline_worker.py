@@ -0,0 +1,171 @@
+"""
+Pipeline worker — runs queued pipeline runs in the background.
+
+POST /api/pipeline/runs inserts a pipeline_runs row with status=queued. This
+process claims the oldest one with FOR UPDATE SKIP LOCKED (several workers
+can share a queue without claiming the same run), marks it running and runs
+cfg.PIPELINE_STAGES as subprocesses with PIPELINE_RUN_ID and STATE_FIPS set,
+exactly as they would run by hand. Each stage reports its progress to
+pipeline_run_stages (see profiling.py). The worker marks the run successful
+once every stage has exited cleanly (06_export leaves runs it claimed at
+running), and a stage exiting non-zero marks it failed and skips the rest,
+07_maintenance included.
+
+For the whole run the worker holds a session-level advisory lock on the
+run's state, so two runs of the same state never execute at once: a claim
+whose lock is taken is left queued for later. A run left at status=running
+by a worker that died is marked failed once its state lock is free again.
+Session locks need a real server session, so point DATABASE_URL at
+PostgreSQL, not PgBouncer in transaction mode.
+
+Usage:
+    DATABASE_URL=<url> python pipeline_worker.py [--once]
+"""
+
+import os
+import sys
+import json
+import socket
+import logging
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).parent))
+import config as cfg
+from db_engine import pipeline_engine
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+log = logging.getLogger(__name__)
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPTS_DIR.parent
+
+# pg_advisory_lock(RUN_LOCK_CLASS, state_fips::int) is held while a state runs
+RUN_LOCK_CLASS = 0x59560001
+CLAIM_CANDIDATES = 10
+
+
+def try_state_lock(conn, state_fips: str) -> bool:
+    return conn.execute(text("SELECT pg_try_advisory_lock(:cls, :state)"),
+                        {"cls": RUN_LOCK_CLASS, "state": int(state_fips)}).scalar()
+
+
+def release_state_lock(conn, state_fips: str) -> None:
+    conn.execute(text("SELECT pg_advisory_unlock(:cls, :state)"), {"cls": RUN_LOCK_CLASS, "state": int(state_fips)})
+
+
+def mark_failed(engine, run_id: int, message: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE pipeline_runs
+            SET status = 'failed', error_message = :message, finished_at = :finished_at
+            WHERE id = :run_id AND status IN ('queued', 'running')
+        """), {"run_id": run_id, "message": message, "finished_at": datetime.now(timezone.utc)})
+
+
+def mark_success(engine, run_id: int) -> bool:
+    """Mark a run successful unless a stage already finished it; False if it was not running."""
+    with engine.begin() as conn:
+        return conn.execute(text("""
+            UPDATE pipeline_runs
+            SET status = 'success', finished_at = :finished_at
+            WHERE id = :run_id AND status = 'running'
+        """), {"run_id": run_id, "finished_at": datetime.now(timezone.utc)}).rowcount == 1
+
+
+def fail_orphaned_runs(engine, lock_conn) -> None:
+    """Runs a worker claimed but never finished, whose state lock nobody holds any more."""
+    with engine.connect() as conn:
+        orphans = conn.execute(text("""
+            SELECT id, state_fips, worker_id FROM pipeline_runs
+            WHERE status = 'running' AND worker_id IS NOT NULL
+        """)).all()
+    for run in orphans:
+        if try_state_lock(lock_conn, run.state_fips):
+            release_state_lock(lock_conn, run.state_fips)
+            mark_failed(engine, run.id, f"worker {run.worker_id} exited before the run finished")
+            log.warning("Run %d (state %s) was orphaned by %s — marked failed.", run.id, run.state_fips, run.worker_id)
+
+
+def claim_run(engine, lock_conn, worker_id: str) -> Optional[tuple[int, str]]:
+    """
+    Claim the oldest queued run whose state is free. The state lock is taken
+    on lock_conn (held for the run); the claim itself commits right away.
+    """
+    with engine.begin() as conn:
+        candidates = conn.execute(text("""
+            SELECT id, state_fips FROM pipeline_runs
+            WHERE status = 'queued'
+            ORDER BY id
+            LIMIT :n
+            FOR UPDATE SKIP LOCKED
+        """), {"n": CLAIM_CANDIDATES}).all()
+        for run in candidates:
+            if not try_state_lock(lock_conn, run.state_fips):
+                continue
+            conn.execute(text("""
+                UPDATE pipeline_runs
+                SET status = 'running', started_at = :now, worker_id = :worker, planned_stages = :stages
+                WHERE id = :run_id
+            """), {
+                "run_id": run.id,
+                "now": datetime.now(timezone.utc),
+                "worker": worker_id,
+                "stages": json.dumps([Path(s).stem for s in cfg.PIPELINE_STAGES]),
+            })
+            return run.id, run.state_fips
+    return None
+
+
+def execute_run(engine, run_id: int, state_fips: str) -> bool:
+    env = {**os.environ, "PIPELINE_RUN_ID": str(run_id), "STATE_FIPS": state_fips}
+    for script in cfg.PIPELINE_STAGES:
+        log.info("Run %d: %s...", run_id, script)
+        result = subprocess.run([sys.executable, str(SCRIPTS_DIR / script)], env=env, cwd=BACKEND_DIR)
+        if result.returncode != 0:
+            # 04b marks its own failures; anything else is recorded here
+            mark_failed(engine, run_id, f"{Path(script).stem} exited with code {result.returncode}")
+            log.error("Run %d failed in %s.", run_id, script)
+            return False
+    if not mark_success(engine, run_id):
+        log.error("Run %d: all stages exited cleanly but the run was no longer running.", run_id)
+        return False
+    return True
+
+
+def main():
+    once = "--once" in sys.argv
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    engine = pipeline_engine()
+
+    with engine.connect() as lock_conn:
+        lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        fail_orphaned_runs(engine, lock_conn)
+        log.info("Pipeline worker %s polling for queued runs every %.0fs.", worker_id, cfg.PIPELINE_POLL_SECONDS)
+        while True:
+            claimed = claim_run(engine, lock_conn, worker_id)
+            if claimed is None:
+                if once:
+                    break
+                time.sleep(cfg.PIPELINE_POLL_SECONDS)
+                continue
+            run_id, state_fips = claimed
+            start = time.perf_counter()
+            try:
+                ok = execute_run(engine, run_id, state_fips)
+            except Exception as exc:
+                mark_failed(engine, run_id, repr(exc))
+                raise
+            finally:
+                release_state_lock(lock_conn, state_fips)
+            log.info("Run %d (state %s) %s in %.0fs.", run_id, state_fips,
+                     "succeeded" if ok else "failed", time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Stage profiling harness — wraps each pipeline script's main() and records
+wall time, CPU time, peak RSS, rows in/out and DB round trips.
+
+When the stage runs as part of a pipeline run (PIPELINE_RUN_ID env var, or
+the run id passed as the script's first argument), the numbers are written
+to pipeline_run_stages so regressions show up run over run. While the stage
+runs, its row is kept at status=running with the rows counted so far,
+refreshed every cfg.PIPELINE_PROGRESS_SECONDS (progress for the pipeline
+events stream).
+
+Pass --profile to any script to also dump cProfile output to
+data/output/profiles/<run>_<stage>.prof (+ a .txt top-N summary).
+
+Usage inside a script:
+    from profiling import current_stage, run_stage
+
+    current_stage().rows_in += len(df)
+    with current_stage().step("upsert"):
+        ...
+
+    if __name__ == "__main__":
+        run_stage("01_fetch_census", main)
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+import config as cfg
+from db_engine import pipeline_engine
+
+log = logging.getLogger(__name__)
+
+PROFILE_FLAG = "--profile"
+PROFILE_TOP_N = 40
+
+
+@dataclass
+class StageStats:
+    stage: str
+    rows_in: int = 0
+    rows_out: int = 0
+    db_round_trips: int = 0
+    details: dict = field(default_factory=dict)
+
+    @contextmanager
+    def step(self, name: str):
+        """Time a sub-step; durations land in details["steps"]."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.details.setdefault("steps", {})[name] = round(time.perf_counter() - start, 3)
+
+
+_current: Optional[StageStats] = None
+
+
+def current_stage() -> StageStats:
+    """Stats of the running stage (a detached instance when not under run_stage)."""
+    global _current
+    if _current is None:
+        _current = StageStats(stage="adhoc")
+    return _current
+
+
+def resolve_run_id() -> Optional[int]:
+    env_id = os.environ.get("PIPELINE_RUN_ID")
+    if env_id:
+        return int(env_id)
+    if len(sys.argv) > 1 and sys.argv[1].isdigit():
+        return int(sys.argv[1])
+    return None
+
+
+# Engines whose queries are the harness's own bookkeeping, not the stage's
+_uncounted_engines: set = set()
+
+
+def _count_round_trip(conn, cursor, statement, parameters, context, executemany):
+    if _current is not None and conn.engine not in _uncounted_engines:
+        _current.db_round_trips += 1
+
+
+def _peak_rss_mb() -> float:
+    """Largest RSS of this process or any finished shard worker (see sharding.py)."""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _cpu_seconds() -> float:
+    """User + system CPU of this process and its finished shard workers."""
+    return sum(
+        usage.ru_utime + usage.ru_stime
+        for usage in (resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN))
+    )
+
+
+def _dump_profile(profiler: cProfile.Profile, run_id: Optional[int], stage: str) -> Path:
+    out_dir = Path(cfg.OUTPUT_DIR) / "profiles"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    base = out_dir / f"{run_id if run_id is not None else 'adhoc'}_{stage}"
+
+    profiler.dump_stats(f"{base}.prof")
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+    Path(f"{base}.txt").write_text(summary.getvalue())
+    return Path(f"{base}.prof")
+
+
+def record_stage(run_id: int, stats: StageStats, record: dict, engine: Optional[Engine] = None) -> None:
+    """Upsert one pipeline_run_stages row (re-running a stage replaces it)."""
+    own_engine = engine is None
+    if own_engine:
+        engine = pipeline_engine(pool_size=1)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO pipeline_run_stages
+                (pipeline_run_id, stage, status, wall_seconds, cpu_seconds, peak_rss_mb,
+                 rows_in, rows_out, rows_per_second, db_round_trips, details,
+                 error_message, started_at, finished_at)
+            VALUES
+                (:run_id, :stage, :status, :wall_seconds, :cpu_seconds, :peak_rss_mb,
+                 :rows_in, :rows_out, :rows_per_second, :db_round_trips, :details,
+                 :error_message, :started_at, :finished_at)
+            ON CONFLICT (pipeline_run_id, stage) DO UPDATE SET
+                status          = EXCLUDED.status,
+                wall_seconds    = EXCLUDED.wall_seconds,
+                cpu_seconds     = EXCLUDED.cpu_seconds,
+                peak_rss_mb     = EXCLUDED.peak_rss_mb,
+                rows_in         = EXCLUDED.rows_in,
+                rows_out        = EXCLUDED.rows_out,
+                rows_per_second = EXCLUDED.rows_per_second,
+                db_round_trips  = EXCLUDED.db_round_trips,
+                details         = EXCLUDED.details,
+                error_message   = EXCLUDED.error_message,
+                started_at      = EXCLUDED.started_at,
+                finished_at     = EXCLUDED.finished_at
+        """), {
+            "run_id": run_id,
+            "stage": stats.stage,
+            "rows_in": stats.rows_in,
+            "rows_out": stats.rows_out,
+            "details": json.dumps(stats.details),
+            **record,
+        })
+    if own_engine:
+        engine.dispose()
+
+
+class ProgressReporter:
+    """Background thread keeping the stage's row at status=running with its current counts."""
+
+    def __init__(self, run_id: int, stats: StageStats, started_at: datetime, wall_start: float):
+        self.run_id = run_id
+        self.stats = stats
+        self.started_at = started_at
+        self.wall_start = wall_start
+        self._stop = threading.Event()
+        self._engine = pipeline_engine(pool_size=1)
+        _uncounted_engines.add(self._engine)
+        self._thread = threading.Thread(target=self._run, name="stage-progress", daemon=True)
+
+    def report(self) -> None:
+        wall = time.perf_counter() - self.wall_start
+        record_stage(self.run_id, self.stats, {
+            "status": "running",
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": None,
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "rows_per_second": round(self.stats.rows_out / wall, 1) if wall > 0 else None,
+            "db_round_trips": self.stats.db_round_trips,
+            "error_message": None,
+            "started_at": self.started_at,
+            "finished_at": None,
+        }, self._engine)
+
+    def _run(self) -> None:
+        while not self._stop.wait(cfg.PIPELINE_PROGRESS_SECONDS):
+            try:
+                self.report()
+            except Exception:
+                log.warning("Could not record stage progress for run %d", self.run_id, exc_info=True)
+
+    def start(self) -> None:
+        try:
+            self.report()
+        except Exception:
+            log.warning("Could not record stage start for run %d", self.run_id, exc_info=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._engine.dispose()
+        _uncounted_engines.discard(self._engine)
+
+
+def run_stage(stage: str, main: Callable[[], None]) -> None:
+    """Run a script's main() under the profiling harness."""
+    global _current
+
+    profile = PROFILE_FLAG in sys.argv
+    if profile:
+        sys.argv.remove(PROFILE_FLAG)
+    run_id = resolve_run_id()
+
+    _current = StageStats(stage=stage)
+    event.listen(Engine, "before_cursor_execute", _count_round_trip)
+    profiler = cProfile.Profile() if profile else None
+
+    started_at = datetime.now(timezone.utc)
+    wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+    status, error = "success", None
+    progress = ProgressReporter(run_id, _current, started_at, wall_start) if run_id is not None else None
+    if progress:
+        progress.start()
+    try:
+        if profiler:
+            profiler.enable()
+        main()
+    except BaseException as exc:
+        # SystemExit(0) from a script is still a successful stage
+        if not (isinstance(exc, SystemExit) and not exc.code):
+            status, error = "failed", repr(exc)
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        if progress:
+            progress.stop()
+        event.remove(Engine, "before_cursor_execute", _count_round_trip)
+
+        stats = _current
+        wall = time.perf_counter() - wall_start
+        record = {
+            "status": status,
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(_cpu_seconds() - cpu_start, 3),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "rows_per_second": round(stats.rows_out / wall, 1) if wall > 0 else None,
+            "db_round_trips": stats.db_round_trips,
+            "error_message": error,
+            "started_at": started_at,
+            "finished_at": datetime.now(timezone.utc),
+        }
+        log.info(
+            "Stage %s %s — wall %.1fs, cpu %.1fs, peak RSS %.0f MB, rows %d→%d, %d DB round trips",
+            stage, status, record["wall_seconds"], record["cpu_seconds"], record["peak_rss_mb"],
+            stats.rows_in, stats.rows_out, stats.db_round_trips,
+        )
+        if profiler:
+            log.info("Profile written to %s", _dump_profile(profiler, run_id, stage))
+        if run_id is not None:
+            try:
+                record_stage(run_id, stats, record)
+            except Exception:
+                log.exception("Could not record stage metrics for run %d", run_id)
@@ -0,0 +1,137 @@
+"""
+County sharding for pipeline stages.
+
+Stages split their work by county and fan the shards out over a process
+pool. Each shard opens its own DB connection and commits in its own
+county-sized transaction, so lock windows stay short and a failed county
+can be re-run on its own:
+
+    python scripts/04_crosswalk.py --county 037,059 --workers 2
+
+--county takes 3-digit county FIPS codes (within cfg.STATE_FIPS); --workers
+defaults to cfg.PIPELINE_WORKERS. With one worker shards run in-process.
+"""
+
+import os
+import sys
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import text
+
+import config as cfg
+from db_engine import pipeline_engine
+from profiling import current_stage
+
+log = logging.getLogger(__name__)
+
+
+class ShardFailure(RuntimeError):
+    """One or more county shards failed; the message lists them for a re-run."""
+
+
+@dataclass
+class ShardOptions:
+    counties: Optional[list[str]]   # 5-char state+county FIPS, None = all
+    workers: int
+
+
+def _pop_flag(name: str) -> Optional[str]:
+    if name not in sys.argv:
+        return None
+    i = sys.argv.index(name)
+    if i + 1 >= len(sys.argv):
+        raise SystemExit(f"{name} requires a value")
+    value = sys.argv[i + 1]
+    del sys.argv[i:i + 2]
+    return value
+
+
+def parse_shard_options() -> ShardOptions:
+    """Read (and strip) --county / --workers from the command line."""
+    counties = _pop_flag("--county")
+    workers = _pop_flag("--workers")
+    return ShardOptions(
+        counties=[cfg.STATE_FIPS + c.strip().zfill(3)[-3:] for c in counties.split(",")] if counties else None,
+        workers=int(workers) if workers else cfg.PIPELINE_WORKERS,
+    )
+
+
+def select_counties(available: Iterable[str], options: ShardOptions) -> list[str]:
+    available = sorted(set(available))
+    if options.counties is None:
+        return available
+    missing = set(options.counties) - set(available)
+    if missing:
+        log.warning("No data for requested counties: %s", ", ".join(sorted(missing)))
+    return [c for c in available if c in options.counties]
+
+
+def state_counties(engine) -> list[str]:
+    """Counties with precincts loaded for cfg.STATE_FIPS."""
+    with engine.connect() as conn:
+        return list(conn.execute(text(f"""
+            SELECT DISTINCT county_fips FROM {cfg.PRECINCTS_TABLE}
+            WHERE state_fips = :state_fips
+        """), {"state_fips": cfg.STATE_FIPS}).scalars())
+
+
+_shard_engine: Optional[tuple[int, Any]] = None
+
+
+def shard_engine():
+    """One small engine per process; never reuse a connection across fork."""
+    global _shard_engine
+    if _shard_engine is None or _shard_engine[0] != os.getpid():
+        _shard_engine = (os.getpid(), pipeline_engine(pool_size=1))
+    return _shard_engine[1]
+
+
+def _run_shard(fn: Callable, county: str, payload: Any) -> tuple[Any, int]:
+    before = current_stage().db_round_trips
+    result = fn(county, payload) if payload is not None else fn(county)
+    return result, current_stage().db_round_trips - before
+
+
+def run_sharded(
+    fn: Callable,
+    counties: list[str],
+    options: ShardOptions,
+    payloads: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    """
+    Run fn(county[, payload]) for every county, fanned out over options.workers
+    processes. Returns {county: result}; raises ShardFailure naming the
+    counties that failed after all shards have finished.
+    """
+    payloads = payloads or {}
+    results: dict[str, Any] = {}
+    failed: list[str] = []
+    workers = max(1, min(options.workers, len(counties)))
+    log.info("Running %s over %d county shards with %d worker(s)...", fn.__name__, len(counties), workers)
+
+    if workers == 1:
+        for county in counties:
+            try:
+                results[county], _ = _run_shard(fn, county, payloads.get(county))
+            except Exception:
+                log.exception("Shard %s failed", county)
+                failed.append(county)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_run_shard, fn, c, payloads.get(c)): c for c in counties}
+            for future in as_completed(futures):
+                county = futures[future]
+                try:
+                    results[county], round_trips = future.result()
+                    current_stage().db_round_trips += round_trips
+                except Exception:
+                    log.exception("Shard %s failed", county)
+                    failed.append(county)
+
+    if failed:
+        codes = ",".join(sorted(c[-3:] for c in failed))
+        raise ShardFailure(f"{len(failed)} of {len(counties)} county shards failed — re-run with --county {codes}")
+    return results
@@ -5,10 +5,10 @@ import { useFilters, buildFilterParams } from "@/hooks/useFilters";
 const API_URL = process.env.NEXT_PUBLIC_API_URL ?? "http://localhost:8000";
 
 export default function ExportButton() {
-  const { appliedDistrict, appliedYouthMin, appliedMarginFloor } = useFilters();
+  const { district, youthMin, marginFloor } = useFilters();
 
   const handleExport = () => {
-    const params = buildFilterParams({ appliedDistrict, appliedYouthMin, appliedMarginFloor });
+    const params = buildFilterParams({ district, youthMin, marginFloor });
     window.open(`${API_URL}/api/export/csv?${params}`, "_blank");
   };
 
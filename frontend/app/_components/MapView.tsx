@@ -3,7 +3,8 @@
 import { useEffect, useRef, useState } from "react";
 import mapboxgl from "mapbox-gl";
 import "mapbox-gl/dist/mapbox-gl.css";
-import { useFilters, buildFilterParams } from "@/hooks/useFilters";
+import { useFilters } from "@/hooks/useFilters";
+import { usePrecinctAttributes, filterPrecinctIds } from "@/hooks/usePrecinctAttributes";
 import PrecinctPopup from "./PrecinctPopup";
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL ?? "http://localhost:8000";
@@ -20,6 +21,17 @@ const TIER_COLOR_EXPRESSION: mapboxgl.Expression = [
   "#e0e0e0", // default / null
 ];
 
+// Must match scripts/config.py TILE_LAYER
+const TILE_LAYER = "precincts";
+
+interface TileArchive {
+  run_id: number;
+  url: string;
+  tiles: string;
+  minzoom: number;
+  maxzoom: number;
+}
+
 interface PrecinctProperties {
   precinct_id: string;
   county_name: string;
@@ -40,8 +52,10 @@ export default function MapView() {
   const mapContainer = useRef<HTMLDivElement>(null);
   const map = useRef<mapboxgl.Map | null>(null);
   const [selectedPrecinct, setSelectedPrecinct] = useState<PrecinctProperties | null>(null);
-  const { appliedDistrict, appliedYouthMin, appliedMarginFloor } = useFilters();
-  const [loading, setLoading] = useState(false);
+  const { district, youthMin, marginFloor } = useFilters();
+  const [loading, setLoading] = useState(true);
+  const [layersReady, setLayersReady] = useState(false);
+  const attributes = usePrecinctAttributes();
 
   // Initialize map
   useEffect(() => {
@@ -63,26 +77,46 @@ export default function MapView() {
 
     map.current.addControl(new mapboxgl.NavigationControl(), "top-right");
 
-    map.current.on("load", () => {
-      map.current!.addSource("precincts", {
-        type: "geojson",
-        data: { type: "FeatureCollection", features: [] },
+    map.current.on("load", async () => {
+      // Vector tiles cut from the latest run's PMTiles archive (scripts/06_export.py);
+      // the map never queries the database for shapes or properties
+      let tiles: TileArchive;
+      try {
+        const r = await fetch(`${API_URL}/api/tiles`);
+        if (!r.ok) throw new Error(`GET /api/tiles: ${r.status}`);
+        tiles = await r.json();
+      } catch (err) {
+        console.error(err);
+        return;
+      } finally {
+        setLoading(false);
+      }
+      const m = map.current;
+      if (!m) return;
+
+      m.addSource("precincts", {
+        type: "vector",
+        tiles: [`${API_URL}${tiles.tiles}`],
+        minzoom: tiles.minzoom,
+        maxzoom: tiles.maxzoom,
       });
 
-      map.current!.addLayer({
+      m.addLayer({
         id: "precincts-fill",
         type: "fill",
         source: "precincts",
+        "source-layer": TILE_LAYER,
         paint: {
           "fill-color": TIER_COLOR_EXPRESSION,
           "fill-opacity": 0.7,
         },
       });
 
-      map.current!.addLayer({
+      m.addLayer({
         id: "precincts-outline",
         type: "line",
         source: "precincts",
+        "source-layer": TILE_LAYER,
         paint: {
           "line-color": "#ffffff",
           "line-width": 0.5,
@@ -90,6 +124,8 @@ export default function MapView() {
         },
       });
 
+      setLayersReady(true);
+
       // Click handler
       map.current!.on("click", "precincts-fill", (e) => {
         if (e.features && e.features.length > 0) {
@@ -112,23 +148,34 @@ export default function MapView() {
     };
   }, []);
 
-  // Re-fetch GeoJSON when applied filters change
+  // Filter the tiled (unfiltered) features locally as the sliders move — no
+  // backend round trip. Re-runs once the layers exist, so filters set or
+  // attributes loaded before that still apply.
   useEffect(() => {
-    if (!map.current) return;
-
-    const params = buildFilterParams({ appliedDistrict, appliedYouthMin, appliedMarginFloor });
-    const url = `${API_URL}/api/precincts?${params}`;
-
-    setLoading(true);
-    fetch(url)
-      .then((r) => r.json())
-      .then((geojson) => {
-        const source = map.current?.getSource("precincts") as mapboxgl.GeoJSONSource | undefined;
-        source?.setData(geojson);
-      })
-      .catch(console.error)
-      .finally(() => setLoading(false));
-  }, [appliedDistrict, appliedYouthMin, appliedMarginFloor]);
+    const m = map.current;
+    if (!m || !layersReady) return;
+
+    let filter: mapboxgl.Expression;
+    if (attributes) {
+      const ids = filterPrecinctIds(attributes, { district, youthMin, marginFloor });
+      // match compiles its labels into a lookup table; "in" over a literal
+      // array would scan every id for every feature on each slider tick.
+      // match needs at least one label, so an empty result hides everything.
+      filter = ids.length > 0 ? ["match", ["id"], ids, true, false] : ["boolean", false];
+    } else {
+      // Same filter on the tile properties until the attribute arrays arrive
+      // (null properties are omitted from tiles, so unscored precincts drop out)
+      filter = [
+        "all",
+        ["has", "score"],
+        [">=", ["coalesce", ["get", "youth_share"], -1], youthMin],
+        [">=", ["coalesce", ["get", "dem_margin"], -2], marginFloor],
+        ...(district !== null ? [["==", ["get", "cd_number"], district]] : []),
+      ] as mapboxgl.Expression;
+    }
+    m.setFilter("precincts-fill", filter);
+    m.setFilter("precincts-outline", filter);
+  }, [layersReady, attributes, district, youthMin, marginFloor]);
 
   return (
     <div className="relative w-full h-full">
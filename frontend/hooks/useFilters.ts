@@ -3,45 +3,32 @@
 import { create } from "zustand";
 
 export interface FilterState {
-  // Live slider values
+  // Slider values — the map filters on them locally (see MapView), and the
+  // CSV export uses the same ones
   district: number | null;
   youthMin: number;
   marginFloor: number;
   setDistrict: (d: number | null) => void;
   setYouthMin: (v: number) => void;
   setMarginFloor: (v: number) => void;
-
-  // Applied values — only update on "Apply Filters"
-  appliedDistrict: number | null;
-  appliedYouthMin: number;
-  appliedMarginFloor: number;
-  applyFilters: () => void;
 }
 
-export const useFilters = create<FilterState>((set, get) => ({
+export const useFilters = create<FilterState>((set) => ({
   district: null,
   youthMin: 0.15,
   marginFloor: 0.0,
   setDistrict: (district) => set({ district }),
   setYouthMin: (youthMin) => set({ youthMin }),
   setMarginFloor: (marginFloor) => set({ marginFloor }),
-
-  appliedDistrict: null,
-  appliedYouthMin: 0.15,
-  appliedMarginFloor: 0.0,
-  applyFilters: () => {
-    const { district, youthMin, marginFloor } = get();
-    set({ appliedDistrict: district, appliedYouthMin: youthMin, appliedMarginFloor: marginFloor });
-  },
 }));
 
-export function buildFilterParams(state: Pick<FilterState, "appliedDistrict" | "appliedYouthMin" | "appliedMarginFloor">): string {
+export function buildFilterParams(state: Pick<FilterState, "district" | "youthMin" | "marginFloor">): string {
   const params = new URLSearchParams({
-    youth_min: state.appliedYouthMin.toString(),
-    margin_floor: state.appliedMarginFloor.toString(),
+    youth_min: state.youthMin.toString(),
+    margin_floor: state.marginFloor.toString(),
   });
-  if (state.appliedDistrict !== null) {
-    params.set("district", state.appliedDistrict.toString());
+  if (state.district !== null) {
+    params.set("district", state.district.toString());
   }
   return params.toString();
 }
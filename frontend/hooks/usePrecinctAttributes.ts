@@ -0,0 +1,94 @@
+"use client";
+
+import { useEffect, useState } from "react";
+
+const API_URL = process.env.NEXT_PUBLIC_API_URL ?? "http://localhost:8000";
+
+// Must match scripts/06_export.py (ATTRIBUTES_MAGIC / ATTRIBUTES_HEADER)
+const MAGIC = "YVA1";
+const HEADER_BYTES = 16;
+
+// Must match scripts/config.py TIER_CODES
+export const TIER_CODES: Record<string, number> = {
+  priority: 1,
+  target: 2,
+  watchlist: 3,
+  low: 4,
+};
+
+export interface PrecinctAttributes {
+  runId: number;
+  count: number;
+  id: Uint32Array;
+  youthShare: Float32Array;
+  demMargin: Float32Array;
+  score: Float32Array;
+  tier: Uint8Array;
+  cdNumber: Uint8Array;
+}
+
+export interface AttributeFilters {
+  district: number | null;
+  youthMin: number;
+  marginFloor: number;
+  tier?: string | null;
+}
+
+export function decodeAttributes(buf: ArrayBuffer): PrecinctAttributes {
+  const view = new DataView(buf);
+  const magic = String.fromCharCode(...new Uint8Array(buf, 0, 4));
+  if (magic !== MAGIC) throw new Error(`Unexpected attribute file magic: ${magic}`);
+
+  const runId = view.getUint32(8, true);
+  const count = view.getUint32(12, true);
+
+  let offset = HEADER_BYTES;
+  const take = <T>(ctor: { new (b: ArrayBuffer, o: number, n: number): T; BYTES_PER_ELEMENT: number }): T => {
+    const arr = new ctor(buf, offset, count);
+    offset += count * ctor.BYTES_PER_ELEMENT;
+    return arr;
+  };
+
+  return {
+    runId,
+    count,
+    id: take(Uint32Array),
+    youthShare: take(Float32Array),
+    demMargin: take(Float32Array),
+    score: take(Float32Array),
+    tier: take(Uint8Array),
+    cdNumber: take(Uint8Array),
+  };
+}
+
+/** Feature ids of scored precincts passing the filters — mirrors /api/precincts. */
+export function filterPrecinctIds(attrs: PrecinctAttributes, f: AttributeFilters): number[] {
+  const tierCode = f.tier ? TIER_CODES[f.tier] : 0;
+  const ids: number[] = [];
+  for (let i = 0; i < attrs.count; i++) {
+    // NaN comparisons are false, so unknown values drop out like SQL NULLs
+    if (!(attrs.score[i] === attrs.score[i])) continue;
+    if (!(attrs.youthShare[i] >= f.youthMin)) continue;
+    if (!(attrs.demMargin[i] >= f.marginFloor)) continue;
+    if (f.district !== null && attrs.cdNumber[i] !== f.district) continue;
+    if (tierCode && attrs.tier[i] !== tierCode) continue;
+    ids.push(attrs.id[i]);
+  }
+  return ids;
+}
+
+/** Loads the latest run's attribute arrays once; null until available. */
+export function usePrecinctAttributes(): PrecinctAttributes | null {
+  const [attrs, setAttrs] = useState<PrecinctAttributes | null>(null);
+
+  useEffect(() => {
+    fetch(`${API_URL}/api/attributes`)
+      .then((r) => (r.ok ? r.json() : Promise.reject(r.statusText)))
+      .then(({ url }: { url: string }) => fetch(`${API_URL}${url}`))
+      .then((r) => r.arrayBuffer())
+      .then((buf) => setAttrs(decodeAttributes(buf)))
+      .catch(console.error);
+  }, []);
+
+  return attrs;
+}